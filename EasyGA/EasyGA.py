@@ -4,6 +4,13 @@ import math
 # Import random for many methods
 import random
 
+# Import partial for layering the fitness evaluation
+from functools import partial
+
+# Import futures for asynchronous evolution
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
 # Import all decorators
 import decorators
 
@@ -24,9 +31,21 @@ from survivor import Survivor
 from crossover import Crossover
 from mutation  import Mutation
 
+# Fitness Evaluation Methods
+from evaluation import Evaluation
+
 # Default Attributes for the GA
 from attributes import Attributes
 
+# Timing of each stage of evolve
+from metrics import Metrics, no_timing
+
+# Island model running gas in separate processes
+from islands import Island_Model
+
+# Batches of runs in separate processes
+import batch
+
 # Database class
 from database import sql_database
 from sqlite3  import Error
@@ -60,6 +79,13 @@ class GA(Attributes):
 
         while cond1() and cond3():
 
+            # Time each stage if metrics are enabled
+            if self.metrics is None:
+                stage = no_timing
+            else:
+                self.metrics.start_generation(self.current_generation)
+                stage = self.metrics.stage
+
             # If its the first generation, setup the database.
             if self.current_generation == 0:
 
@@ -72,34 +98,319 @@ class GA(Attributes):
 
             # Otherwise evolve the population.
             else:
-                self.parent_selection_impl()
-                self.crossover_population_impl()
-                self.survivor_selection_impl()
-                self.update_population()
-                self.sort_by_best_fitness()
-                self.mutation_population_impl()
+                with stage('parent_selection'):
+                    self.parent_selection_impl()
+                with stage('crossover'):
+                    self.crossover_population_impl()
+                with stage('survivor_selection'):
+                    self.survivor_selection_impl()
+                with stage('update_population'):
+                    self.update_population()
+                with stage('sort_by_best_fitness'):
+                    self.sort_by_best_fitness()
+                with stage('mutation'):
+                    self.mutation_population_impl()
 
             # Update and sort fitnesses
-            self.set_all_fitness()
-            self.sort_by_best_fitness()
+            with stage('set_all_fitness'):
+                self.set_all_fitness()
+            with stage('sort_by_best_fitness'):
+                self.sort_by_best_fitness()
 
             # Save the population to the database
-            self.save_population()
+            with stage('save_population'):
+                self.save_population()
 
             # Adapt the ga if the generation times the adapt rate
             # passes through an integer value.
             adapt_counter = self.adapt_rate*self.current_generation
             if int(adapt_counter) < int(adapt_counter + self.adapt_rate):
-                self.adapt()
+                with stage('adapt'):
+                    self.adapt()
+
+            # Save the metrics of the generation
+            if self.metrics is not None and self.metrics.save_to_database:
+                self.database.insert_metrics(self)
 
             number_of_generations   -= 1
             self.current_generation += 1
 
 
+    def evolve_steady_state(
+            self,
+            number_of_steps = float('inf'),
+            consider_termination = True,
+            offspring_amount = 2,
+            replacement = 'worst',
+        ):
+        """Evolves the ga using steady-state steps instead of generations.
+        Each step makes the offspring amount of children, evaluates only
+        them, and inserts them into the sorted population in O(log n) time,
+        replacing either the worst chromosome or the loser of a tournament.
+        Only the inserted children are saved to the database.
+
+        Each step counts as a generation, e.g. for the generation goal,
+        and the ga is not adapted.
+        """
+
+        if replacement not in ('worst', 'tournament'):
+            raise ValueError("Unknown replacement, use 'worst' or 'tournament'.")
+
+        if self.population is None:
+            self.initialize_population()
+
+        cond1 = lambda: number_of_steps > 0       # Evolve the specified number of steps.
+        cond2 = lambda: not consider_termination  # If consider_termination flag is set:
+        cond3 = lambda: cond2() or self.active()  #     check termination conditions.
+
+        while cond1() and cond3():
+
+            # Time each stage if metrics are enabled
+            if self.metrics is None:
+                stage = no_timing
+            else:
+                self.metrics.start_generation(self.current_generation)
+                stage = self.metrics.stage
+
+            # If its the first step, setup the database and
+            # evaluate, sort, and save the whole population.
+            if self.current_generation == 0:
+
+                self.database.create_all_tables(self)
+                self.database.insert_config(self)
+
+                with stage('set_all_fitness'):
+                    self.set_all_fitness()
+                with stage('sort_by_best_fitness'):
+                    self.sort_by_best_fitness()
+                with stage('save_population'):
+                    self.save_population()
+
+            # Otherwise only handle the offspring
+            else:
+                with stage('parent_selection'):
+                    self.parent_selection_impl()
+                with stage('crossover'):
+                    offspring = self.make_offspring(offspring_amount)
+                with stage('mutation'):
+                    for chromosome in offspring:
+                        if random.random() < self.chromosome_mutation_rate:
+                            self.mutation_individual_impl(chromosome)
+                with stage('set_all_fitness'):
+                    self.evaluate_chromosomes(offspring)
+                with stage('replacement'):
+                    inserted = [
+                        chromosome
+                        for chromosome
+                        in offspring
+                        if self.insert_by_fitness(chromosome, replacement)
+                    ]
+                with stage('save_population'):
+                    self.database.insert_chromosomes(self.current_generation, inserted)
+
+            # Save the metrics of the step
+            if self.metrics is not None and self.metrics.save_to_database:
+                self.database.insert_metrics(self)
+
+            number_of_steps         -= 1
+            self.current_generation += 1
+
+
+    def make_offspring(self, amount):
+        """Returns the amount of children made by crossing random
+        parents from the mating pool, which is then reset."""
+
+        population = self.population
+        mating_pool = population.mating_pool
+
+        while len(population.next_population) < amount:
+            children_amount = len(population.next_population)
+            self.crossover_individual_impl(random.choice(mating_pool), random.choice(mating_pool))
+
+            # Stop instead of looping forever
+            if len(population.next_population) == children_amount:
+                raise ValueError("The individual crossover did not make any children, e.g. if the parents are too short to cross.")
+
+        offspring = population.next_population[:amount]
+
+        population.reset_mating_pool()
+        population.reset_next_population()
+
+        return offspring
+
+
+    def insert_by_fitness(self, chromosome, replacement = 'worst'):
+        """Inserts the evaluated chromosome into the sorted population
+        using binary search, removing either the worst chromosome or
+        the worst of a random tournament. Returns False if the
+        chromosome would be the one removed instead."""
+
+        population = self.population
+
+        # Sort key increasing from the best to the worst chromosome, with None last
+        if self.target_fitness_type == 'max':
+            key = lambda chromosome: -chromosome.fitness if chromosome.fitness is not None else float('inf')
+        else:
+            key = lambda chromosome: chromosome.fitness if chromosome.fitness is not None else float('inf')
+
+        # Binary search for the index after any equally fit chromosomes
+        new_key = key(chromosome)
+        low, high = 0, len(population)
+        while low < high:
+            middle = (low + high) // 2
+            if new_key < key(population[middle]):
+                high = middle
+            else:
+                low = middle + 1
+        index = low
+
+        # Replace the worst chromosome, unless the new one is worse
+        if replacement == 'worst':
+            if index == len(population):
+                return False
+            population.pop()
+
+        # The worst in the tournament is the one with the largest index
+        else:
+            tournament_size = max(1, int(len(population) * self.tournament_size_ratio))
+            loser = max(random.sample(range(len(population)), tournament_size))
+            population.pop(loser)
+            if loser < index:
+                index -= 1
+
+        population.insert(index, chromosome)
+        return True
+
+
+    def evolve_asynchronous(
+            self,
+            number_of_evaluations = float('inf'),
+            consider_termination = True,
+            in_flight = None,
+            processes = False,
+            replacement = 'worst',
+        ):
+        """Evolves the ga without waiting for generations to finish. The
+        in flight amount of children (default ga.max_workers) are evaluated
+        at the same time on the ga.executor. As soon as any evaluation
+        finishes, the child is inserted into the sorted population as in
+        evolve_steady_state, and a new child is bred and dispatched.
+
+        If no executor is set, a pool of threads is started, or
+        a pool of processes if processes is True. Evaluations bypass the
+        ga.evaluation_impl and the fitness caches.
+
+        Every population size of finished evaluations counts as a
+        generation, e.g. for termination and adapting the ga.
+        """
+
+        if replacement not in ('worst', 'tournament'):
+            raise ValueError("Unknown replacement, use 'worst' or 'tournament'.")
+
+        if self.population is None:
+            self.initialize_population()
+
+        # Evaluate, sort, and save the initial population
+        if self.current_generation == 0:
+            self.database.create_all_tables(self)
+            self.database.insert_config(self)
+            self.set_all_fitness()
+            self.sort_by_best_fitness()
+            self.save_population()
+            self.current_generation += 1
+
+        if in_flight is None:
+            in_flight = self.max_workers or os.cpu_count() or 1
+
+        # Start the pool once and keep it alive, as in the evaluation methods
+        if self.executor is None:
+            if processes:
+                self.executor = ProcessPoolExecutor(max_workers = self.max_workers)
+            else:
+                self.executor = ThreadPoolExecutor(max_workers = in_flight)
+
+        # Worker processes evaluate using a snapshot of the ga
+        if isinstance(self.executor, ProcessPoolExecutor):
+            snapshot = Evaluation._snapshot(self)
+            submit = lambda chromosome: self.executor.submit(Evaluation._evaluate_one, snapshot, chromosome)
+        else:
+            submit = lambda chromosome: self.executor.submit(Evaluation.call_fitness_function, self, chromosome)
+
+        if self.metrics is not None:
+            self.metrics.start_generation(self.current_generation)
+
+        pending = {}  # future -> child
+        evaluations = 0
+        active = True
+
+        while True:
+
+            # Keep the in flight amount of evaluations running
+            while active and len(pending) < in_flight and evaluations + len(pending) < number_of_evaluations:
+                self.parent_selection_impl()
+                child = self.make_offspring(1)[0]
+                if random.random() < self.chromosome_mutation_rate:
+                    self.mutation_individual_impl(child)
+                pending[submit(child)] = child
+
+            if len(pending) == 0:
+                break
+
+            done, _ = wait(pending, return_when = FIRST_COMPLETED)
+
+            for future in done:
+                child = pending.pop(future)
+
+                # Skip evaluations cancelled after terminating
+                if future.cancelled():
+                    continue
+
+                child.fitness = future.result()
+                child.stop_tracking_changes()
+                evaluations += 1
+
+                if self.insert_by_fitness(child, replacement):
+                    self.save_chromosome(child)
+
+                if self.metrics is not None:
+                    self.metrics.count_evaluations(1)
+
+                # Another generation of evaluations finished
+                if evaluations % len(self.population) == 0:
+                    self.next_asynchronous_generation()
+
+            # Stop dispatching once finished, cancelling evaluations not started yet
+            if active and (evaluations >= number_of_evaluations or (consider_termination and not self.active())):
+                active = False
+                for future in pending:
+                    future.cancel()
+
+
+    def next_asynchronous_generation(self):
+        """Counts a generation of evaluations during asynchronous evolution,
+        adapting the ga if the generation times the adapt rate passes
+        through an integer value."""
+
+        adapt_counter = self.adapt_rate*self.current_generation
+        if int(adapt_counter) < int(adapt_counter + self.adapt_rate):
+            self.adapt()
+
+        self.current_generation += 1
+
+        if self.metrics is not None:
+            if self.metrics.save_to_database:
+                self.database.insert_metrics(self)
+            self.metrics.start_generation(self.current_generation)
+
+
     def update_population(self):
         """Updates the population to the new population and resets
          the mating pool and new population."""
 
+        # Free the retiring chromosomes for the next offspring
+        if self.chromosome_pool is not None:
+            self.chromosome_pool.release(self.population)
+
         self.population.update()
 
 
@@ -112,6 +423,36 @@ class GA(Attributes):
         self.run += 1
 
 
+    @classmethod
+    def run_batch(cls, configs, seeds, max_workers = None):
+        """Evolves a new ga for every configuration and seed in parallel using
+        a pool of max_workers processes, and returns the Batch_Results.
+
+        Each configuration is a dict of ga attributes, e.g.
+
+            GA.run_batch([{'population_size': 20}, {'population_size': 50}], range(100))
+
+        and may be given as a dict of configurations to label them. Each
+        run seeds the random module with its seed, and each worker process
+        writes to its own database, e.g. database_worker_1234.db. The
+        configurations must be picklable, e.g. use functions defined at
+        the top level of a module instead of lambdas.
+        """
+
+        return batch.run_batch(cls, configs, seeds, max_workers)
+
+
+    def close_executor(self):
+        """Shuts down the executor used for parallel
+        fitness evaluation, if one was started."""
+
+        if self.executor is not None:
+            self.executor.shutdown()
+
+            # Bypass __setattr__, which ignores None values
+            self.__dict__['executor'] = None
+
+
     def active(self):
         """Returns if the ga should terminate based on the
          termination implimented."""
@@ -228,14 +569,25 @@ class GA(Attributes):
 
         if self.chromosome_impl is not None:
             self.population = self.make_population(
-                self.chromosome_impl()
+                self.make_chromosome(self.chromosome_impl())
                 for _
                 in range(self.population_size)
             )
 
+        # Generate all of the genes at once
+        elif self.gene_domain is not None:
+            self.population = self.make_population(
+                self.make_chromosome(gene_values)
+                for gene_values
+                in self.gene_domain.sample_chromosomes(
+                    self.population_size,
+                    self.chromosome_length,
+                ).tolist()
+            )
+
         elif self.gene_impl is not None:
             self.population = self.make_population(
-                (
+                self.make_chromosome(
                     self.gene_impl()
                     for __
                     in range(self.chromosome_length)
@@ -252,15 +604,85 @@ class GA(Attributes):
         """Will get and set the fitness of each chromosome in the population.
         If update_fitness is set then all fitness values are updated.
         Otherwise only fitness values set to None (i.e. uninitialized
-        fitness values) are updated.
+        fitness values) are updated, see evaluate_chromosomes.
+        """
+
+        # Gather the chromosomes which need their fitness updated,
+        # either because it is not set or because the user asked for it
+        self.evaluate_chromosomes([
+            chromosome
+            for chromosome
+            in self.population
+            if chromosome.fitness is None or self.update_fitness
+        ])
+
+
+    def evaluate_chromosomes(self, chromosome_list):
+        """Sets the fitness of the chromosomes using the evaluation_impl.
+        Unless update_fitness is set, the fitness cache is used if its size
+        is set and the persistent fitness cache is used if it is enabled.
+        Inexact fitness values, e.g. predicted by the surrogate, are never
+        cached.
+        """
+
+        # Set the worst fitness expected to survive for early abort
+        # Bypass __setattr__, which ignores None values
+        if self.early_abort:
+            self.__dict__['fitness_bound'] = self.survival_bound(len(chromosome_list))
+
+        # Evaluate them using the evaluation implementation
+        evaluate = self.evaluation_impl
+
+        # Time and count the evaluations
+        if self.metrics is not None:
+            evaluate = partial(self.metrics.evaluate, evaluate)
+
+        # Fitness values may change if the user asks to update them
+        if not self.update_fitness:
+
+            # Use the tracked changes instead of a full evaluation
+            if self.delta_fitness_impl is not None:
+                evaluate = partial(Evaluation.with_delta_fitness, self, evaluate)
+
+            # Only evaluate the most promising of the
+            # chromosomes missing from the caches exactly
+            if self.surrogate is not None:
+                evaluate = partial(self.surrogate.evaluate, self, evaluate)
+
+            # Check the fitness cache table in the database before evaluating
+            if self.persistent_fitness_cache:
+                evaluate = partial(self.database.evaluate_with_fitness_cache, self, evaluate)
+
+            # Check the in-memory fitness cache first
+            if self.fitness_cache_size is not None:
+                evaluate = partial(self.fitness_cache.evaluate, evaluate)
+
+        evaluate(chromosome_list)
+
+        # Stop tracking changes since the fitness is up to date
+        if self.delta_fitness_impl is not None:
+            for chromosome in chromosome_list:
+                chromosome.stop_tracking_changes()
+
+
+    def survival_bound(self, amount_replaced):
+        """Returns the worst fitness which still survives if the given amount
+        of chromosomes are replaced and the rest are filled in with the best
+        chromosomes, as in Survivor.fill_in_best. Returns None if unknown.
         """
 
-        # Check each chromosome
-        for chromosome in self.population:
+        # Sort the evaluated chromosomes
+        chromosome_list = self.sort_by_best_fitness(
+            [chromosome for chromosome in self.population if chromosome.fitness is not None],
+            in_place = True,
+        )
+
+        survivor_amount = min(len(self.population) - amount_replaced, len(chromosome_list))
+
+        if survivor_amount <= 0:
+            return None
 
-            # Update fitness if needed or asked by the user
-            if chromosome.fitness is None or self.update_fitness:
-                chromosome.fitness = self.fitness_function_impl(chromosome)
+        return chromosome_list[survivor_amount-1].fitness
 
 
     def sort_by_best_fitness(self, chromosome_list = None, in_place = True):
@@ -280,6 +702,16 @@ class GA(Attributes):
         # Reversed sort if max fitness should be first
         reverse = (self.target_fitness_type == 'max')
 
+        # Rank populations using their array of fitness values
+        if isinstance(chromosome_list, make_population):
+
+            if in_place:
+                chromosome_list.sort_by_fitness(reverse)
+                return chromosome_list
+
+            else:
+                return [chromosome_list[index] for index in chromosome_list.ranking(reverse)]
+
         # Sort by fitness, assuming None should be moved to the end of the list
         key = lambda chromosome: (chromosome.fitness if (chromosome.fitness is not None) else (float('inf') * (+1, -1)[int(reverse)]))
 
@@ -300,10 +732,20 @@ class GA(Attributes):
         return self.convert_fitness(self.population[index].fitness)
 
 
+    def get_all_fitness(self):
+        """Returns an array of the fitness values of the sorted
+        population after conversion based on the target fitness
+        type, with NaN for unevaluated chromosomes.
+        """
+
+        return self.convert_fitness(self.population.fitness_values)
+
+
     def convert_fitness(self, fitness_value):
         """Returns the fitness value if the type of problem
         is a maximization problem. Otherwise the fitness is
-        inverted using max - value + min.
+        inverted using max - value + min. Also converts
+        NumPy arrays of fitness values.
         """
 
         # No conversion needed
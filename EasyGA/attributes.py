@@ -1,6 +1,9 @@
 # Import signature tool to check if functions start with self or ga
 from inspect import signature
 
+# Import partial to bind the ga to functions in a picklable way
+from functools import partial
+
 # Import math for square root (ga.dist()) and ceil (crossover methods)
 import math
 
@@ -12,6 +15,9 @@ from copy import deepcopy
 from structure import Population as make_population
 from structure import Chromosome as make_chromosome
 from structure import Gene       as make_gene
+from structure.bit_chromosome import Bit_Chromosome, popcount
+from structure.chromosome_pool import Chromosome_Pool
+from structure.permutation_chromosome import Permutation_Chromosome
 
 # Misc. Methods
 from examples import Fitness
@@ -25,6 +31,9 @@ from survivor import Survivor
 from crossover import Crossover
 from mutation  import Mutation
 
+# Fitness Evaluation Methods
+from evaluation import Evaluation
+
 # Database class
 from database import sql_database
 from sqlite3  import Error
@@ -33,6 +42,47 @@ from sqlite3  import Error
 from database import matplotlib_graph
 import matplotlib.pyplot as plt
 
+# Fitness cache class
+from evaluation import fitness_cache
+
+
+#========================================================#
+# Built-in methods, defined here so they can be pickled: #
+#========================================================#
+
+def euclidean_dist(self, chromosome_1, chromosome_2):
+    """Euclidean norm of the difference between the gene values."""
+
+    return math.sqrt(sum(
+        (gene_1.value - gene_2.value) ** 2
+        for gene_1, gene_2
+        in zip(chromosome_1, chromosome_2)
+    ))
+
+
+def permutation_dist(self, chromosome_1, chromosome_2):
+    """Count the number of gene pairs they don't have in common."""
+
+    return sum(
+        1
+        for x, y
+        in zip(chromosome_1, chromosome_2)
+        if x != y
+    )
+
+
+def bit_dist(self, chromosome_1, chromosome_2):
+    """Count the number of differing bits."""
+    return popcount(chromosome_1.bits ^ chromosome_2.bits)
+
+
+def random_bitstring(self):
+    """Random bit chromosome with the chromosome length."""
+    return Bit_Chromosome.from_bits(
+        random.getrandbits(self.chromosome_length),
+        self.chromosome_length,
+    )
+
 
 class Attributes:
     """Default GA attributes can be found here. If any attributes have not
@@ -49,6 +99,9 @@ class Attributes:
     make_chromosome = make_chromosome
     make_gene = make_gene
 
+    # Recycles the chromosomes of retiring generations if set, see pool_chromosomes
+    chromosome_pool = None
+
     # Methods for accomplishing Parent-Selection -> Crossover -> Survivor_Selection -> Mutation -> Termination
     parent_selection_impl = Parent.Rank.tournament
     crossover_individual_impl = Crossover.Individual.single_point
@@ -58,6 +111,9 @@ class Attributes:
     mutation_population_impl = Mutation.Population.random_avoid_best
     termination_impl = Termination.fitness_generation_tolerance
 
+    # Method for evaluating the fitness of the chromosomes which need it
+    evaluation_impl = Evaluation.serial
+
 
     def dist(self, chromosome_1, chromosome_2):
         """Default distance lambda. Returns the square root of the difference in fitnesses."""
@@ -83,6 +139,17 @@ class Attributes:
     chromosome_impl = None
 
 
+    # Fitness function given the gene values of many chromosomes at
+    # once, used by Evaluation.batch. Returns a list of fitness values.
+    batch_fitness_function_impl = None
+
+
+    # Fitness function given a chromosome, its previous fitness, and
+    # a dictionary of the old values of the changed genes by index,
+    # used instead of a full evaluation when the changes are tracked.
+    delta_fitness_impl = None
+
+
     #=====================================#
     # Special built-in class __methods__: #
     #=====================================#
@@ -99,6 +166,7 @@ class Attributes:
             population = None,
             target_fitness_type = 'max',
             update_fitness = False,
+            gene_domain = None,
 
             parent_ratio = 0.10,
             selection_probability = 0.50,
@@ -134,11 +202,29 @@ class Attributes:
             config_id INTEGER DEFAULT NULL,
             generation INTEGER NOT NULL,
             fitness REAL,
-            chromosome TEXT
+            chromosome BLOB
             ); """,
 
             Graph = matplotlib_graph.Matplotlib_Graph,
 
+            max_workers = None,
+            chunk_size  = None,
+            executor    = None,
+            max_concurrency = None,
+            broker = None,
+            fitness_timeout = None,
+            timeout_fitness = None,
+            speculative_quantile = None,
+            batch_as_array  = False,
+
+            FitnessCache = fitness_cache.Fitness_Cache,
+            fitness_cache_size = None,
+            persistent_fitness_cache = False,
+            fitness_function_version = None,
+            surrogate = None,
+            early_abort = False,
+            metrics = None,
+
             **kwargs
         ):
 
@@ -152,6 +238,10 @@ class Attributes:
         self.target_fitness_type = target_fitness_type
         self.update_fitness = update_fitness
 
+        # Domain of the gene values, e.g. Int_Range(1, 10),
+        # used instead of the gene_impl if it is set
+        self.gene_domain = gene_domain
+
         # Selection variables
         self.parent_ratio = parent_ratio
         self.selection_probability = selection_probability
@@ -190,6 +280,35 @@ class Attributes:
         # Graphing variables
         self.graph = Graph(self.database)
 
+        # Parallel evaluation variables
+        self.max_workers = max_workers
+        self.chunk_size  = chunk_size
+        self.executor    = executor
+        self.max_concurrency = max_concurrency
+        self.broker = broker
+
+        # Straggler variables for parallel evaluation
+        self.fitness_timeout = fitness_timeout
+        self.timeout_fitness = timeout_fitness
+        self.speculative_quantile = speculative_quantile
+        self.batch_as_array  = batch_as_array
+
+        # Fitness cache variables
+        self.fitness_cache = FitnessCache()
+        self.fitness_cache_size = fitness_cache_size
+        self.persistent_fitness_cache = persistent_fitness_cache
+        self.fitness_function_version = fitness_function_version
+
+        # Surrogate model used to skip some evaluations
+        self.surrogate = surrogate
+
+        # Early abort variables
+        self.early_abort = early_abort
+        self.fitness_bound = None
+
+        # Records the time spent in each stage of evolve if set, e.g. Metrics()
+        self.metrics = metrics
+
         # Any other custom kwargs?
         for name, value in kwargs.items():
             self.__setattr__(name, value)
@@ -212,7 +331,8 @@ class Attributes:
 
         # Check for function
         elif callable(value) and next(iter(signature(value).parameters), None) in ('self', 'ga'):
-            foo = lambda *args, **kwargs: value(self, *args, **kwargs)
+            # Use partial instead of a lambda so the ga can be pickled
+            foo = partial(value, self)
             # Reassign name and doc-string for documentation
             foo.__name__ = value.__name__
             foo.__doc__  = value.__doc__
@@ -223,6 +343,42 @@ class Attributes:
             self.__dict__[name] = value
 
 
+    def __getstate__(self):
+        """Allows the ga to be pickled, e.g. to send it to worker processes.
+        The database connection, graph, executor, and broker are not pickled,
+        instead a new database and graph are made when unpickling.
+        """
+
+        state = {
+            name: value
+            for name, value
+            in self.__dict__.items()
+            if name not in ('database', 'graph', 'executor', 'broker')
+        }
+
+        state['Database'] = type(self.database)
+        state['Graph']    = type(self.graph)
+
+        return state
+
+
+    def __setstate__(self, state):
+        """Restores the ga from a pickled state."""
+
+        state = dict(state)
+        Database = state.pop('Database')
+        Graph    = state.pop('Graph')
+
+        self.__dict__.update(state)
+        self.__dict__['executor'] = None
+        self.__dict__['broker'] = None
+
+        # Make a new database and graph using the same database name
+        self.__dict__['database'] = Database()
+        self.database._database_name = self.database_name
+        self.__dict__['graph'] = Graph(self.database)
+
+
     #============================#
     # Built-in database methods: #
     #============================#
@@ -235,7 +391,7 @@ class Attributes:
 
     def save_chromosome(self, chromosome):
         """Saves the given chromosome to the database."""
-        self.database.insert_current_chromosome(self.current_generation, chromosome)
+        self.database.insert_chromosome(self.current_generation, chromosome)
 
 
     #===================#
@@ -256,12 +412,7 @@ class Attributes:
         self.mutation_individual_impl = Mutation.Individual.individual_genes
 
         # Euclidean norm
-        self.dist = lambda self, chromosome_1, chromosome_2:\
-            math.sqrt(sum(
-                (gene_1.value - gene_2.value) ** 2
-                for gene_1, gene_2
-                in zip(chromosome_1, chromosome_2)
-            ))
+        self.dist = euclidean_dist
 
 
     def permutation_chromosomes(self, cycle = True):
@@ -269,20 +420,34 @@ class Attributes:
 
         cycle = int(cycle)
 
+        self.make_chromosome = Permutation_Chromosome
+
         self.crossover_individual_impl = Crossover.Individual.Permutation.ox1
         self.mutation_individual_impl  = Mutation.Individual.Permutation.swap_genes
 
-        def dist(self, chromosome_1, chromosome_2):
-            """Count the number of gene pairs they don't have in common."""
+        self.dist = permutation_dist
+
+
+    def bitstring_chromosomes(self):
+        """Sets default bit chromosome based methods, storing the
+        genes of each chromosome as the bits of an int."""
 
-            return sum(
-                1
-                for x, y
-                in zip(chromosome_1, chromosome_2)
-                if x != y
-            )
+        self.make_chromosome = Bit_Chromosome
+        self.chromosome_impl = random_bitstring
 
-        self.dist = dist
+        self.crossover_individual_impl = Crossover.Individual.Binary.uniform
+        self.mutation_individual_impl  = Mutation.Individual.Binary.flip_bits
+
+        self.dist = bit_dist
+
+
+    def pool_chromosomes(self):
+        """Reuses the chromosomes of each retiring generation for the
+        offspring of the next generation instead of allocating new ones.
+        Call after setting the type of chromosome."""
+
+        self.chromosome_pool = Chromosome_Pool(self.make_chromosome)
+        self.make_chromosome = self.chromosome_pool
 
 
     #===========================#
@@ -415,6 +580,164 @@ class Attributes:
             raise ValueError("Min chromosome mutation rate must be between 0 and 1")
 
 
+    @property
+    def fitness_cache_size(self):
+        """Getter function for the fitness cache size"""
+
+        return self._fitness_cache_size
+
+
+    @fitness_cache_size.setter
+    def fitness_cache_size(self, size):
+        """Setter function with error checking for the fitness cache size.
+        The fitness cache is disabled if the size is None or 0."""
+
+        # Disable the cache, bypassing __setattr__ which ignores None values
+        if size is None or size == 0:
+            self.__dict__['_fitness_cache_size'] = None
+
+        elif not isinstance(size, int) or size < 0:
+            raise ValueError("Fitness cache size must be None or an integer greater than or equal to 0")
+
+        # Resize the cache, evicting fitnesses if needed
+        else:
+            self._fitness_cache_size = size
+            self.fitness_cache.max_size = size
+            self.fitness_cache.evict()
+
+
+    @property
+    def gene_domain(self):
+        """Getter function for the gene domain"""
+
+        return self._gene_domain
+
+
+    @gene_domain.setter
+    def gene_domain(self, domain):
+        """Setter function for the gene domain, which
+        uses the gene_impl instead if it is None."""
+
+        # Bypass __setattr__, which ignores None values
+        self.__dict__['_gene_domain'] = domain
+
+
+    @property
+    def fitness_timeout(self):
+        """Getter function for the fitness timeout"""
+
+        return self._fitness_timeout
+
+
+    @fitness_timeout.setter
+    def fitness_timeout(self, timeout):
+        """Setter function with error checking for the fitness timeout,
+        in seconds. Chromosomes don't time out if it is None."""
+
+        if timeout is not None and not timeout > 0:
+            raise ValueError("Fitness timeout must be None or a number of seconds greater than 0")
+
+        # Bypass __setattr__, which ignores None values
+        self.__dict__['_fitness_timeout'] = timeout
+
+
+    @property
+    def timeout_fitness(self):
+        """Getter function for the fitness given to timed out chromosomes"""
+
+        return self._timeout_fitness
+
+
+    @timeout_fitness.setter
+    def timeout_fitness(self, fitness):
+        """Setter function for the fitness given to timed out chromosomes,
+        which is the worst fitness of the other chromosomes if it is None."""
+
+        # Bypass __setattr__, which ignores None values
+        self.__dict__['_timeout_fitness'] = fitness
+
+
+    @property
+    def speculative_quantile(self):
+        """Getter function for the speculative quantile"""
+
+        return self._speculative_quantile
+
+
+    @speculative_quantile.setter
+    def speculative_quantile(self, quantile):
+        """Setter function with error checking for the speculative quantile.
+        Stragglers are not submitted again if it is None."""
+
+        if quantile is not None and not 0 <= quantile <= 1:
+            raise ValueError("Speculative quantile must be None or between 0 and 1")
+
+        # Bypass __setattr__, which ignores None values
+        self.__dict__['_speculative_quantile'] = quantile
+
+
+    @property
+    def surrogate(self):
+        """Getter function for the surrogate model"""
+
+        return self._surrogate
+
+
+    @surrogate.setter
+    def surrogate(self, surrogate):
+        """Setter function for the surrogate model,
+        which is disabled if set to None."""
+
+        # Bypass __setattr__, which ignores None values
+        self.__dict__['_surrogate'] = surrogate
+
+
+    @property
+    def metrics(self):
+        """Getter function for the metrics"""
+
+        return self._metrics
+
+
+    @metrics.setter
+    def metrics(self, metrics):
+        """Setter function for the metrics, which
+        are not recorded if set to None."""
+
+        # Bypass __setattr__, which ignores None values
+        self.__dict__['_metrics'] = metrics
+
+
+    @property
+    def fitness_function_id(self):
+        """Getter function for the identity of the fitness function, used to tag
+        fitness values in the persistent fitness cache. Made from the module
+        and name of the fitness function and the fitness function version.
+
+        Lambdas and functions defined inside other functions don't have
+        unique names, so their identity is None unless the fitness
+        function version is set, and the persistent cache can't be used.
+        """
+
+        function = self.fitness_function_impl
+
+        # Get the original function from a bound function
+        function = getattr(function, 'func', function)
+        function = getattr(function, '__func__', function)
+
+        # Lambdas and local functions can't be told apart by their names
+        if self.fitness_function_version is None and any(
+                name in function.__qualname__ for name in ('<lambda>', '<locals>')):
+            return None
+
+        function_id = f"{function.__module__}.{function.__qualname__}"
+
+        if self.fitness_function_version is not None:
+            function_id += f":{self.fitness_function_version}"
+
+        return function_id
+
+
     @property
     def database_name(self):
         """Getter function for the database name"""
@@ -0,0 +1,127 @@
+import os
+import random
+from statistics import mean
+from concurrent.futures import ProcessPoolExecutor
+
+from tabulate import tabulate
+
+from metrics import Metrics
+
+
+def _run_one(ga_class, label, config, seed):
+    """Runs the configured ga with the seed inside a worker process,
+    returning (config, seed, best fitness, generations, evaluations,
+    target fitness type)."""
+
+    random.seed(seed)
+
+    ga = ga_class()
+    for name, value in config.items():
+        setattr(ga, name, value)
+
+    # Each worker process writes to its own database
+    name, extension = os.path.splitext(ga.database_name)
+    ga.database_name = f"{name}_worker_{os.getpid()}{extension}"
+
+    # Count the evaluations
+    if ga.metrics is None:
+        ga.metrics = Metrics()
+
+    try:
+        ga.evolve()
+    finally:
+        ga.close_executor()
+
+    evaluation_metrics = ga.metrics.totals().get('evaluation')
+
+    return (
+        label,
+        seed,
+        ga.population[0].fitness,
+        ga.current_generation,
+        0 if evaluation_metrics is None else evaluation_metrics.calls,
+        ga.target_fitness_type,
+    )
+
+
+def run_batch(ga_class, configs, seeds, max_workers = None):
+    """Evolves a ga for every configuration and seed using a pool of
+    worker processes, see GA.run_batch."""
+
+    # Label the configurations by index unless given as a dict
+    if not isinstance(configs, dict):
+        configs = dict(enumerate(configs))
+
+    tasks = [
+        (label, config, seed)
+        for label, config
+        in configs.items()
+        for seed
+        in seeds
+    ]
+
+    with ProcessPoolExecutor(max_workers = max_workers) as executor:
+        futures = [
+            executor.submit(_run_one, ga_class, label, config, seed)
+            for label, config, seed
+            in tasks
+        ]
+        return Batch_Results([future.result() for future in futures])
+
+
+class Batch_Results:
+    """Results of a batch of runs. Each row has the
+    (config, seed, best fitness, generations, evaluations, target fitness type)
+    of a run, and str(results) is a table aggregating the runs of each config.
+    """
+
+
+    def __init__(self, rows):
+        self.rows = rows
+
+
+    def aggregate(self):
+        """Returns a row for each config with the number of runs, the mean, best,
+        and worst of the best fitness of each run, the mean generations,
+        and the mean and total evaluations."""
+
+        rows_by_config = {}
+        for row in self.rows:
+            rows_by_config.setdefault(row[0], []).append(row)
+
+        aggregate_rows = []
+
+        for label, rows in rows_by_config.items():
+            fitness_list = [row[2] for row in rows if row[2] is not None]
+            best, worst = (max, min) if rows[0][5] == 'max' else (min, max)
+
+            aggregate_rows.append((
+                label,
+                len(rows),
+                mean(fitness_list) if fitness_list else None,
+                best(fitness_list, default = None),
+                worst(fitness_list, default = None),
+                mean(row[3] for row in rows),
+                mean(row[4] for row in rows),
+                sum(row[4] for row in rows),
+            ))
+
+        return aggregate_rows
+
+
+    def __str__(self):
+        """Returns a table aggregating the runs of each config."""
+
+        return tabulate(
+            self.aggregate(),
+            headers = [
+                'config',
+                'runs',
+                'mean best fitness',
+                'best fitness',
+                'worst best fitness',
+                'mean generations',
+                'mean evaluations',
+                'total evaluations',
+            ],
+        )
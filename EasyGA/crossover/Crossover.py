@@ -1,13 +1,94 @@
 import random
+from itertools import chain
 
 # Import all crossover decorators
 from decorators import _check_weight, _gene_by_gene
 
+# Plain chromosomes for slicing gene lists directly
+from structure import Chromosome
+
+# Bit chromosomes for the binary crossover methods
+from structure.bit_chromosome import Bit_Chromosome, random_mask
+
+# Gene position indexes for the permutation crossover methods
+from structure.gene import to_hashable
+from structure.permutation_chromosome import position_index
+
 # Round to an integer near x with higher probability
 # the closer it is to that integer.
 randround = lambda x: int(x + random.random())
 
 
+def _weighted_permutation_parents(parent_1, parent_2, weight):
+    """Swaps the parents with a probability of 1 - weight, so that
+    most of the genes are taken directly from parent 1."""
+
+    if len(parent_1) != len(parent_2):
+        raise ValueError("Parents do not have the same lengths.")
+
+    if random.random() < weight:
+        return parent_1, parent_2
+    else:
+        return parent_2, parent_1
+
+
+def _random_slice(length):
+    """Returns two random indexes for a non-empty slice."""
+
+    index_2 = random.randrange(1, length)
+    index_1 = random.randrange(index_2)
+    return index_1, index_2
+
+
+def _positions(parent, values):
+    """Returns the index of the gene positions of the parent,
+    using the one kept by permutation chromosomes."""
+
+    positions = getattr(parent, 'positions', None)
+    return position_index(values) if positions is None else positions
+
+
+def _add_permutation_child(ga, parent, child_values):
+    """Adds a child made from the gene values."""
+
+    child = ga.make_chromosome(child_values)
+
+    # Track the genes changed from the parent for delta fitness evaluation
+    if ga.delta_fitness_impl is not None:
+        child.track_changes_from(parent)
+
+    ga.population.add_child(child)
+
+
+def _to_bit_chromosomes(parent_1, parent_2):
+    """Converts the parents to bit chromosomes of the same length."""
+
+    if len(parent_1) != len(parent_2):
+        raise ValueError("Parents do not have the same lengths.")
+
+    return [
+        parent if isinstance(parent, Bit_Chromosome) else Bit_Chromosome(parent)
+        for parent
+        in (parent_1, parent_2)
+    ]
+
+
+def _add_masked_child(ga, parent_1, parent_2, mask):
+    """Adds a child taking the bits set in the mask from parent 1
+    and the rest from parent 2."""
+
+    child = type(parent_1).from_bits(
+        (parent_1.bits & mask) | (parent_2.bits & ~mask),
+        len(parent_1),
+    )
+
+    # Track the genes changed from the parent for delta fitness evaluation
+    if ga.delta_fitness_impl is not None:
+        child.track_changes_from(parent_1)
+
+    ga.population.add_child(child)
+
+
 class Population:
     """Methods for selecting chromosomes to crossover."""
 
@@ -54,8 +135,25 @@ class Individual:
         # Weighted random integer from 0 to minimum parent length - 1
         swap_index = int(ga.weighted_random(weight) * minimum_parent_length)
 
-        ga.population.add_child(parent_1[:swap_index] + parent_2[swap_index:])
-        ga.population.add_child(parent_2[:swap_index] + parent_1[swap_index:])
+        # Slice the gene lists of plain chromosomes to avoid making temporary
+        # chromosomes, other chromosomes have faster slices of their own
+        if type(parent_1) is Chromosome and type(parent_2) is Chromosome:
+            genes_1 = parent_1.gene_list
+            genes_2 = parent_2.gene_list
+        else:
+            genes_1 = parent_1
+            genes_2 = parent_2
+
+        child_1 = ga.make_chromosome(genes_1[:swap_index] + genes_2[swap_index:])
+        child_2 = ga.make_chromosome(genes_2[:swap_index] + genes_1[swap_index:])
+
+        # Track the genes changed from the parents for delta fitness evaluation
+        if ga.delta_fitness_impl is not None:
+            child_1.track_changes_from(parent_1)
+            child_2.track_changes_from(parent_2)
+
+        ga.population.add_child(child_1)
+        ga.population.add_child(child_2)
 
 
     @_check_weight
@@ -68,7 +166,7 @@ class Individual:
     @_gene_by_gene
     def uniform(ga, value_1, value_2, *, weight = 0.5):
         """Cross two parents by swapping all genes randomly."""
-        return random.choices(gene_pair, cum_weights = [weight, 1])[0]
+        return random.choices((value_1, value_2), cum_weights = [weight, 1])[0]
 
 
     class Arithmetic:
@@ -81,7 +179,7 @@ class Individual:
             average_value = weight*value_1 + (1-weight)*value_2
 
             if type(value_1) == type(value_2) == int:
-                average_value = randround(value)
+                average_value = randround(average_value)
 
             return average_value
 
@@ -95,7 +193,7 @@ class Individual:
             extrapolated_value = weight*value_1 + (1-weight)*value_2
 
             if type(value_1) == type(value_2) == int:
-                extrapolated_value = randround(value)
+                extrapolated_value = randround(extrapolated_value)
 
             return extrapolated_value
 
@@ -119,45 +217,147 @@ class Individual:
         @_check_weight
         def ox1(ga, parent_1, parent_2, *, weight = 0.5):
             """Cross two parents by slicing out a random part of one parent
-            and then filling in the rest of the genes from the second parent.
+            and then filling in the rest of the genes in the order they
+            appear in the second parent, starting after the slice.
+            """
+
+            # Too small to cross
+            if len(parent_1) < 2:
+                return parent_1.gene_list
+
+            parent_1, parent_2 = _weighted_permutation_parents(parent_1, parent_2, weight)
+            index_1, index_2 = _random_slice(len(parent_1))
+
+            values_1 = parent_1.gene_value_list
+            values_2 = parent_2.gene_value_list
+
+            # Genes taken from parent 1
+            child_values = list(values_1)
+            used = set(map(to_hashable, values_1[index_1:index_2]))
+
+            # Unused genes in the order they appear in parent 2 after the slice
+            unused_values = (
+                value
+                for value
+                in chain(values_2[index_2:], values_2[:index_2])
+                if to_hashable(value) not in used
+            )
+
+            # Fill in the rest of the child after the slice
+            for index, value in zip(chain(range(index_2, len(values_1)), range(index_1)), unused_values):
+                child_values[index] = value
+
+            _add_permutation_child(ga, parent_1, child_values)
+
+
+        @_check_weight
+        def pmx(ga, parent_1, parent_2, *, weight = 0.5):
+            """Cross two parents by slicing out a random part of one parent
+            and then filling in the rest of the genes from the second parent,
+            mapping genes already used in the slice through the slice.
             """
 
             # Too small to cross
             if len(parent_1) < 2:
                 return parent_1.gene_list
 
-            # Unequal parent lengths
+            parent_1, parent_2 = _weighted_permutation_parents(parent_1, parent_2, weight)
+            index_1, index_2 = _random_slice(len(parent_1))
+
+            values_1 = parent_1.gene_value_list
+            values_2 = parent_2.gene_value_list
+            positions_1 = _positions(parent_1, values_1)
+
+            child_values = list(values_2)
+            child_values[index_1:index_2] = values_1[index_1:index_2]
+
+            # Follow the mapping of each gene from the slice of parent 1 to parent 2
+            for index in chain(range(index_1), range(index_2, len(values_2))):
+                value = values_2[index]
+                position = positions_1[to_hashable(value)]
+                while index_1 <= position < index_2:
+                    value = values_2[position]
+                    position = positions_1[to_hashable(value)]
+                child_values[index] = value
+
+            _add_permutation_child(ga, parent_1, child_values)
+
+
+        @_check_weight
+        def cycle(ga, parent_1, parent_2, *, weight = 0.5):
+            """Cross two parents by splitting the genes into cycles
+            of positions and taking each cycle from the first parent
+            with a probability of the weight, otherwise from the second.
+            """
+
             if len(parent_1) != len(parent_2):
                 raise ValueError("Parents do not have the same lengths.")
 
-            # Swap with weighted probability so that most of the genes
-            # are taken directly from parent 1.
-            if random.choices([0, 1], cum_weights = [weight, 1]) == 1:
-                parent_1, parent_2 = parent_2, parent_1
+            values_1 = parent_1.gene_value_list
+            values_2 = parent_2.gene_value_list
+            positions_1 = _positions(parent_1, values_1)
+
+            child_values = [None] * len(values_1)
+            visited = [False] * len(values_1)
+
+            for start in range(len(values_1)):
+
+                if visited[start]:
+                    continue
+
+                values = values_1 if random.random() < weight else values_2
+
+                # Follow the cycle of positions
+                index = start
+                while not visited[index]:
+                    visited[index] = True
+                    child_values[index] = values[index]
+                    index = positions_1[to_hashable(values_2[index])]
+
+            _add_permutation_child(ga, parent_1, child_values)
+
+
+    class Binary:
+        """Crossover methods for bit chromosomes,
+        crossing all of the bits at once using masks."""
 
-            # Extract genes from parent 1 between two random indexes
-            index_2 = random.randrange(1, len(parent_1))
-            index_1 = random.randrange(index_2)
+        @_check_weight
+        def single_point(ga, parent_1, parent_2, *, weight = 0.5):
+            """Cross two parents by swapping bits at one random point."""
+
+            parent_1, parent_2 = _to_bit_chromosomes(parent_1, parent_2)
 
-            # Create copies of the gene lists
-            gene_list_1 = [None]*index_1 + parent_1[index_1:index_2] + [None]*(len(parent_1)-index_2)
-            gene_list_2 = list(parent_2)
+            # Weighted random integer from 0 to the parent length - 1
+            swap_index = int(ga.weighted_random(weight) * len(parent_1))
+            mask = (1 << swap_index) - 1
 
-            input_index = 0
+            _add_masked_child(ga, parent_1, parent_2, mask)
+            _add_masked_child(ga, parent_2, parent_1, mask)
 
-            # For each gene from the second parent
-            for _ in range(len(gene_list_2)):
 
-                # Remove it if it is already used
-                if gene_list_2[-1] in gene_list_1:
-                    gene_list_2.pop(-1)
+        @_check_weight
+        def multi_point(ga, parent_1, parent_2, *, weight = 0.5):
+            """Cross two parents by swapping the bits between two random points."""
 
-                # Add it if it has not been used
-                else:
-                    if input_index == index_1:
-                        input_index = index_2
-                    gene_list_1[input_index] = gene_list_2.pop(-1)
-                    input_index += 1
+            parent_1, parent_2 = _to_bit_chromosomes(parent_1, parent_2)
+
+            index_1, index_2 = sorted(
+                int(ga.weighted_random(weight) * len(parent_1))
+                for _
+                in range(2)
+            )
 
-            ga.population.add_child(gene_list_1)
+            # Bits outside of the two points
+            mask = ((1 << index_1) - 1) | ~((1 << index_2) - 1)
+
+            _add_masked_child(ga, parent_1, parent_2, mask)
+            _add_masked_child(ga, parent_2, parent_1, mask)
+
+
+        @_check_weight
+        def uniform(ga, parent_1, parent_2, *, weight = 0.5):
+            """Cross two parents by taking each bit from
+            the first parent with a probability of the weight."""
 
+            parent_1, parent_2 = _to_bit_chromosomes(parent_1, parent_2)
+            _add_masked_child(ga, parent_1, parent_2, random_mask(len(parent_1), weight))
@@ -1,5 +1,11 @@
 import sqlite3
 import os
+from ast import literal_eval
+
+from evaluation.fitness_cache import chromosome_hash
+from structure import Chromosome, Population
+from structure import codec
+from structure.chromosome import is_exact
 
 from tabulate import tabulate
 
@@ -17,6 +23,20 @@ class SQL_Database:
         config_id INTEGER,
         attribute_name TEXT,
         attribute_value TEXT)"""
+        self.fitness_cache_structure = f"""
+        CREATE TABLE IF NOT EXISTS fitness_cache (
+        chromosome_hash TEXT NOT NULL,
+        function_id TEXT NOT NULL,
+        fitness REAL,
+        UNIQUE(chromosome_hash, function_id))"""
+        self.metrics_structure = f"""
+        CREATE TABLE IF NOT EXISTS metrics (
+        config_id INTEGER,
+        generation INTEGER,
+        stage TEXT,
+        wall_time REAL,
+        cpu_time REAL,
+        calls INTEGER)"""
 
 
     #=====================================#
@@ -27,6 +47,13 @@ class SQL_Database:
         """Create the database if it doenst exist and then the data and config
         tables."""
 
+        # Fitness values can't be shared unless the fitness function can be told apart
+        if ga.persistent_fitness_cache and ga.fitness_function_id is None:
+            raise ValueError(
+                "The persistent fitness cache can't tell lambdas or functions defined inside "
+                "other functions apart, set ga.fitness_function_version to name the fitness function."
+            )
+
         # Create the database connection
         self.create_connection()
 
@@ -35,6 +62,12 @@ class SQL_Database:
             self.create_table(ga.sql_create_data_structure)
             # Creare config table
             self.create_table(self.config_structure)
+            # Create fitness cache table if used
+            if ga.persistent_fitness_cache:
+                self.create_table(self.fitness_cache_structure)
+            # Create metrics table if used
+            if ga.metrics is not None and ga.metrics.save_to_database:
+                self.create_table(self.metrics_structure)
             # Set the config id
             self.config_id = self.get_current_config()
 
@@ -211,6 +244,36 @@ class SQL_Database:
         WHERE config_id={config_id};""")
 
 
+    def get_population(self, generation, config_id = None):
+        """Returns the population saved for the generation, decoding the
+        chromosomes with the codec. Chromosomes saved as text by older
+        versions are read as literals, without using eval."""
+
+        config_id = self.config_id if config_id is None else config_id
+
+        cur = self.conn.cursor()
+        cur.execute("""
+        SELECT chromosome, fitness
+        FROM data
+        WHERE config_id = ? AND generation = ?
+        ORDER BY id;""", (config_id, generation))
+
+        chromosome_list = []
+
+        for data, fitness in cur.fetchall():
+            if isinstance(data, bytes):
+                chromosome = codec.loads(data)
+            else:
+                chromosome = Chromosome(literal_eval(data))
+                chromosome.fitness = fitness
+            chromosome_list.append(chromosome)
+
+        # Use the decoded chromosomes instead of copying them
+        population = Population([])
+        population.chromosome_list = chromosome_list
+        return population
+
+
 
     #=====================================#
     # Input information Queries:          #
@@ -225,7 +288,7 @@ class SQL_Database:
             self.config_id,
             generation,
             chromosome.fitness,
-            repr(chromosome)
+            codec.dumps(chromosome)
         )
 
         # Create sql query structure
@@ -240,17 +303,22 @@ class SQL_Database:
 
     def insert_current_population(self, ga):
         """ Insert current generations population """
+        self.insert_chromosomes(ga.current_generation, ga.population)
+
+
+    def insert_chromosomes(self, generation, chromosome_list):
+        """ Insert the chromosomes into the database"""
 
         # Structure the insert data
         db_chromosome_list = [
             (
                 self.config_id,
-                ga.current_generation,
+                generation,
                 chromosome.fitness,
-                repr(chromosome)
+                codec.dumps(chromosome)
             )
             for chromosome
-            in ga.population
+            in chromosome_list
         ]
 
         # Create sql query structure
@@ -263,6 +331,110 @@ class SQL_Database:
 
 
 
+    def insert_metrics(self, ga):
+        """Insert the timing metrics of the latest generation, creating
+        the metrics table if they were turned on after the first
+        generation."""
+
+        self.create_table(self.metrics_structure)
+
+        sql = """INSERT INTO metrics(config_id, generation, stage, wall_time, cpu_time, calls)
+                 VALUES(?,?,?,?,?,?)"""
+
+        cur = self.conn.cursor()
+        cur.executemany(sql, (
+            (self.config_id, *row)
+            for row
+            in ga.metrics.rows()
+        ))
+        self.conn.commit()
+
+
+    @default_config_id
+    def get_metrics(self, config_id):
+        """Get the total wall time, cpu time, and calls of each stage."""
+
+        return self.query_all(f"""
+        SELECT stage, SUM(wall_time), SUM(cpu_time), SUM(calls)
+        FROM metrics
+        WHERE config_id={config_id}
+        GROUP BY stage
+        ORDER BY SUM(wall_time) DESC;""")
+
+
+    #=====================================#
+    # Persistent fitness cache:           #
+    #=====================================#
+
+
+    def get_cached_fitness(self, function_id, hash_list):
+        """Returns a dictionary of the cached fitness values
+        for the given chromosome hashes and fitness function."""
+
+        hash_list = list(hash_list)
+        fitness_dict = {}
+        cur = self.conn.cursor()
+
+        # Query in chunks to stay below SQLite's variable limit
+        for index in range(0, len(hash_list), 500):
+            chunk = hash_list[index : index+500]
+            cur.execute(f"""
+            SELECT chromosome_hash, fitness
+            FROM fitness_cache
+            WHERE function_id = ?
+            AND chromosome_hash IN ({','.join('?' * len(chunk))});""",
+            [function_id, *chunk])
+            fitness_dict.update(cur.fetchall())
+
+        return fitness_dict
+
+
+    def insert_cached_fitness(self, function_id, fitness_dict):
+        """Inserts the fitness values, keyed by chromosome hash, into
+        the fitness cache for the given fitness function. Inexact
+        fitness values are not inserted."""
+
+        sql = """INSERT OR IGNORE INTO fitness_cache(chromosome_hash, function_id, fitness)
+                 VALUES(?,?,?)"""
+
+        cur = self.conn.cursor()
+        cur.executemany(sql, (
+            (hash_value, function_id, fitness)
+            for hash_value, fitness
+            in fitness_dict.items()
+            if is_exact(fitness)
+        ))
+        self.conn.commit()
+
+
+    def evaluate_with_fitness_cache(self, ga, evaluation_impl, chromosome_list):
+        """Sets the fitness of the chromosomes found in the fitness cache
+        table using one query, evaluates the rest with the evaluation_impl,
+        and then inserts the new fitness values into the table."""
+
+        if len(chromosome_list) == 0:
+            return
+
+        function_id = ga.fitness_function_id
+        hash_list = [chromosome_hash(chromosome) for chromosome in chromosome_list]
+        fitness_dict = self.get_cached_fitness(function_id, set(hash_list))
+
+        missed = []
+        for chromosome, hash_value in zip(chromosome_list, hash_list):
+            if hash_value in fitness_dict:
+                chromosome.fitness = fitness_dict[hash_value]
+            else:
+                missed.append((chromosome, hash_value))
+
+        evaluation_impl([chromosome for chromosome, _ in missed])
+
+        self.insert_cached_fitness(function_id, {
+            hash_value: chromosome.fitness
+            for chromosome, hash_value
+            in missed
+        })
+
+
     #=====================================#
     # Functions:                          #
     #=====================================#
@@ -26,18 +26,24 @@ def _check_weight(individual_method):
     return new_method
 
 def _gene_by_gene(individual_method):
-    """Perform crossover by making a single new chromosome by combining each gene by gene."""
+    """Perform crossover by making a single new chromosome by combining each gene by gene.
+    If the gene domain is set, the new genes are clipped or rounded into the domain."""
 
     @wraps(individual_method)
     def new_method(ga, parent_1, parent_2, *, weight = individual_method.__kwdefaults__.get('weight', 'None')):
 
-        ga.population.add_child(
+        gene_values = [
             individual_method(ga, value_1, value_2)
             if weight == 'None' else
             individual_method(ga, value_1, value_2, weight = weight)
             for value_1, value_2
             in zip(parent_1.gene_value_iter, parent_2.gene_value_iter)
-        )
+        ]
+
+        if ga.gene_domain is not None:
+            gene_values = ga.gene_domain.clip_chromosome(gene_values)
+
+        ga.population.add_child(ga.make_chromosome(gene_values))
 
     return new_method
 
@@ -138,10 +144,18 @@ def _check_gene_mutation_rate(individual_method):
 
 
 def _reset_fitness(individual_method):
-    """Resets the fitness value of the chromosome."""
+    """Resets the fitness value of the chromosome. If delta fitness
+    evaluation is used, the changed genes are tracked instead."""
 
     @wraps(individual_method)
     def new_method(ga, chromosome):
+
+        # Start tracking changes if the fitness is known,
+        # otherwise keep tracking any previous changes.
+        if ga.delta_fitness_impl is not None and chromosome.fitness is not None:
+            chromosome.previous_fitness = chromosome.fitness
+            chromosome.changes = {}
+
         chromosome.fitness = None
         individual_method(ga, chromosome)
 
@@ -0,0 +1,596 @@
+import os
+import time
+import pickle
+import asyncio
+from math import ceil
+from inspect import isawaitable, isgenerator, signature
+from functools import partial
+from itertools import chain, repeat
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+from structure import codec
+from structure.array_population import Array_Chromosome
+from structure.chromosome import Inexact_Fitness, is_exact
+from structure.shared_population import Shared_Population, attach_shared_array
+
+
+def serial(ga, chromosome_list):
+    """Evaluates the chromosomes one at a time in the current process."""
+
+    for chromosome in chromosome_list:
+        chromosome.fitness = call_fitness_function(ga, chromosome)
+
+
+def process_pool(ga, chromosome_list):
+    """Evaluates the chromosomes in parallel using a pool of worker processes.
+    The pool is created on first use with ga.max_workers processes and kept
+    alive across generations, unless ga.executor is already set by the user.
+    Chromosomes are sent in chunks of ga.chunk_size and the results are
+    written back in order.
+
+    The fitness function must be picklable, i.e. defined at the top level
+    of a module, and should not rely on the ga's population or database.
+    Other attributes which can't be pickled, e.g. a lambda gene_impl, are
+    not sent to the workers, see _snapshot.
+
+    If ga.fitness_timeout or ga.speculative_quantile is set, chromosomes are
+    sent one at a time instead, see _evaluate_with_deadlines.
+    """
+
+    if len(chromosome_list) == 0:
+        return
+
+    # Start the pool once and keep it alive across generations.
+    if ga.executor is None:
+        ga.executor = ProcessPoolExecutor(max_workers = ga.max_workers)
+
+    snapshot = _snapshot(ga)
+
+    if ga.fitness_timeout is not None or ga.speculative_quantile is not None:
+        _evaluate_with_deadlines(
+            ga,
+            lambda chromosome: ga.executor.submit(_evaluate_one, snapshot, chromosome),
+            chromosome_list,
+        )
+        return
+
+    fitness_lists = ga.executor.map(
+        _evaluate_chunk,
+        repeat(snapshot),
+        map(_encode_chunk, _chunks(chromosome_list, _chunk_size(ga, len(chromosome_list)))),
+    )
+
+    for chromosome, fitness in zip(chromosome_list, chain.from_iterable(fitness_lists)):
+        chromosome.fitness = fitness
+
+
+def shared_memory(ga, chromosome_list):
+    """Evaluates the chromosomes in parallel using a pool of worker processes
+    like process_pool, for a Shared_Population. Only the index ranges of the
+    rows to evaluate are sent, and the workers read the gene values from and
+    write the fitness values into the population's shared memory.
+
+    Chromosomes which are not rows of the population are
+    evaluated using process_pool instead.
+    """
+
+    population = ga.population
+
+    if not isinstance(population, Shared_Population):
+        raise TypeError("Evaluation.shared_memory requires ga.make_population to be a Shared_Population.")
+
+    row_chromosomes = {
+        chromosome._row : chromosome
+        for chromosome
+        in chromosome_list
+        if isinstance(chromosome, Array_Chromosome) and chromosome._store is population.values
+    }
+    rows = sorted(row_chromosomes)
+
+    process_pool(ga, [
+        chromosome
+        for chromosome
+        in chromosome_list
+        if not (isinstance(chromosome, Array_Chromosome) and chromosome._store is population.values)
+    ])
+
+    if len(rows) == 0:
+        return
+
+    # Start the pool once and keep it alive across generations.
+    if ga.executor is None:
+        ga.executor = ProcessPoolExecutor(max_workers = ga.max_workers)
+
+    # Wait for every range to be evaluated, marking the inexact
+    # fitness values since the shared array only holds floats
+    inexact_row_lists = ga.executor.map(
+        _evaluate_rows,
+        repeat(_snapshot(ga)),
+        repeat(population.shared_buffers),
+        _row_ranges(rows, _chunk_size(ga, len(rows))),
+    )
+
+    for row in chain.from_iterable(inexact_row_lists):
+        chromosome = row_chromosomes[row]
+        chromosome.fitness = Inexact_Fitness(chromosome.fitness)
+
+
+def thread_pool(ga, chromosome_list):
+    """Evaluates the chromosomes in parallel using a pool of threads.
+    Useful when the fitness function spends most of its time waiting,
+    e.g. on a server or on disk. The pool is created on first use with
+    ga.max_workers threads and kept alive across generations, unless
+    ga.executor is already set by the user.
+
+    If ga.fitness_timeout or ga.speculative_quantile is set, chromosomes are
+    submitted one at a time instead, see _evaluate_with_deadlines.
+    """
+
+    if len(chromosome_list) == 0:
+        return
+
+    # Start the pool once and keep it alive across generations.
+    if ga.executor is None:
+        ga.executor = ThreadPoolExecutor(max_workers = ga.max_workers)
+
+    if ga.fitness_timeout is not None or ga.speculative_quantile is not None:
+        _evaluate_with_deadlines(
+            ga,
+            lambda chromosome: ga.executor.submit(call_fitness_function, ga, chromosome),
+            chromosome_list,
+        )
+        return
+
+    fitness_list = ga.executor.map(partial(call_fitness_function, ga), chromosome_list)
+
+    for chromosome, fitness in zip(chromosome_list, fitness_list):
+        chromosome.fitness = fitness
+
+
+def asynchronous(ga, chromosome_list):
+    """Evaluates the chromosomes concurrently using asyncio, allowing the
+    fitness function to be a coroutine function (async def). At most
+    ga.max_concurrency evaluations are awaited at the same time.
+    Regular fitness functions are also accepted but run one at a time.
+
+    If an event loop is already running in this thread, e.g. in Jupyter,
+    the chromosomes are evaluated on a new event loop in another thread,
+    blocking until they are done.
+    """
+
+    if len(chromosome_list) == 0:
+        return
+
+    try:
+        asyncio.get_running_loop()
+
+    # No event loop is running, so start one
+    except RuntimeError:
+        asyncio.run(_gather(ga, chromosome_list))
+
+    # asyncio.run can't be used inside a running event loop
+    else:
+        with ThreadPoolExecutor(max_workers = 1) as executor:
+            executor.submit(asyncio.run, _gather(ga, chromosome_list)).result()
+
+
+def batch(ga, chromosome_list):
+    """Evaluates all the chromosomes with one call to the
+    ga.batch_fitness_function_impl, which is given the gene values as
+    a list of lists, or as a 2-D NumPy array if ga.batch_as_array is
+    set, and returns a fitness for each chromosome in the same order.
+    """
+
+    if len(chromosome_list) == 0:
+        return
+
+    gene_values = [chromosome.gene_value_list for chromosome in chromosome_list]
+
+    if ga.batch_as_array:
+        gene_values = np.array(gene_values)
+
+    fitness_list = ga.batch_fitness_function_impl(gene_values)
+
+    # Convert NumPy arrays to built-in types for the database
+    if isinstance(fitness_list, np.ndarray):
+        fitness_list = fitness_list.tolist()
+
+    if len(fitness_list) != len(chromosome_list):
+        raise ValueError("Batch fitness function must return one fitness per chromosome.")
+
+    for chromosome, fitness in zip(chromosome_list, fitness_list):
+        chromosome.fitness = fitness
+
+
+def broker(ga, chromosome_list):
+    """Evaluates the chromosomes on the worker processes connected
+    to ga.broker, which may be shared across gas and runs."""
+
+    ga.broker.evaluate(ga, chromosome_list)
+
+
+#=======================#
+# Early abort protocol: #
+#=======================#
+
+def call_fitness_function(ga, chromosome):
+    """Returns the fitness of the chromosome. If ga.early_abort is set,
+    the evaluation may be stopped early using ga.fitness_bound, the worst
+    fitness expected to survive:
+    - if the fitness function has a bound parameter, the bound is passed in
+      and the function may return early with a fitness worse than the bound.
+    - if the fitness function is a generator, each yielded value is the best
+      fitness it could still reach. It is stopped once that is worse than the
+      bound, using the last yielded value. Otherwise the returned value, or
+      the last yielded value, is used.
+
+    Fitness values which may be from an aborted evaluation, i.e. worse than
+    the bound, are returned as an Inexact_Fitness to keep them out of the
+    fitness caches.
+
+    If the fitness function is a coroutine function, an awaitable of the
+    fitness is returned, which also marks fitness values worse than the bound.
+    """
+
+    if not ga.early_abort:
+        return ga.fitness_function_impl(chromosome)
+
+    bound = ga.fitness_bound
+
+    if 'bound' in signature(ga.fitness_function_impl).parameters:
+        fitness = ga.fitness_function_impl(chromosome, bound = bound)
+    else:
+        fitness = ga.fitness_function_impl(chromosome)
+
+    if isawaitable(fitness):
+        return _await_fitness(ga, bound, fitness)
+
+    if not isgenerator(fitness):
+        return Inexact_Fitness(fitness) if _is_worse(ga, bound, fitness) else fitness
+
+    generator, fitness = fitness, None
+
+    try:
+        while True:
+            fitness = next(generator)
+
+            # Stop once the bound can no longer be beaten
+            if _is_worse(ga, bound, fitness):
+                generator.close()
+                return Inexact_Fitness(fitness)
+
+    # Use the returned value if there is one
+    except StopIteration as stop:
+        return fitness if stop.value is None else stop.value
+
+
+def _is_worse(ga, bound, fitness):
+    """Returns if the fitness can no longer beat the bound."""
+
+    return bound is not None and fitness is not None and (
+        fitness < bound if ga.target_fitness_type == 'max' else fitness > bound)
+
+
+async def _await_fitness(ga, bound, fitness):
+    """Awaits the fitness, marking it as inexact if it is worse than the bound."""
+
+    fitness = await fitness
+    return Inexact_Fitness(fitness) if _is_worse(ga, bound, fitness) else fitness
+
+
+#====================#
+# Evaluation layers: #
+#====================#
+
+def with_delta_fitness(ga, evaluation_impl, chromosome_list):
+    """Uses the ga.delta_fitness_impl for chromosomes whose changes since
+    their previous exact fitness are tracked, and the evaluation_impl for
+    the rest."""
+
+    remaining_list = []
+
+    for chromosome in chromosome_list:
+        if chromosome.changes is None or not is_exact(chromosome.previous_fitness):
+            remaining_list.append(chromosome)
+        else:
+            chromosome.fitness = ga.delta_fitness_impl(
+                chromosome,
+                chromosome.previous_fitness,
+                chromosome.changes,
+            )
+
+    evaluation_impl(remaining_list)
+
+
+#===================#
+# Helper functions: #
+#===================#
+
+def _evaluate_with_deadlines(ga, submit, chromosome_list):
+    """Evaluates each chromosome as its own task using submit(chromosome),
+    which returns a future of its fitness. At most one task per worker is
+    in flight, so a task starts about when it is submitted.
+
+    - If ga.fitness_timeout is set, chromosomes not evaluated within that many
+      seconds are given ga.timeout_fitness, or the worst fitness of the other
+      chromosomes if it is None. Their tasks can't be interrupted and finish in
+      the background, taking up a worker until then. The timed out fitness is
+      an Inexact_Fitness to keep it out of the fitness caches.
+    - If ga.speculative_quantile is set, once that fraction of the chromosomes
+      are evaluated, the oldest outstanding chromosomes are submitted again on
+      the idle workers and the first result is used.
+    """
+
+    workers = ga.max_workers or os.cpu_count() or 1
+
+    fitness_list = [None] * len(chromosome_list)
+    finished = [False] * len(chromosome_list)
+    finished_amount = 0
+
+    in_flight = {}      # future -> index
+    timed_out = set()   # futures no longer needed but still running
+    start_times = {}    # index -> time first submitted, for unfinished chromosomes
+    duplicated = set()  # indexes submitted again
+    penalized = []      # indexes past their deadline
+    next_index = 0
+
+    def finish(index, fitness):
+        nonlocal finished_amount
+        fitness_list[index] = fitness
+        finished[index] = True
+        finished_amount += 1
+        del start_times[index]
+
+        # Drop any other tasks for the same chromosome
+        for future, other_index in list(in_flight.items()):
+            if other_index == index:
+                if not future.cancel():
+                    timed_out.add(future)
+                del in_flight[future]
+
+    while finished_amount < len(chromosome_list):
+
+        # Timed out tasks take up a worker until they finish,
+        # but always allow at least one task to be in flight
+        timed_out = {future for future in timed_out if not future.done()}
+        capacity = max(1, workers - len(timed_out))
+
+        # Fill up the idle workers
+        while len(in_flight) < capacity and next_index < len(chromosome_list):
+            in_flight[submit(chromosome_list[next_index])] = next_index
+            start_times[next_index] = time.monotonic()
+            next_index += 1
+
+        # Re-submit stragglers once enough chromosomes are finished
+        if (ga.speculative_quantile is not None
+                and next_index == len(chromosome_list)
+                and finished_amount >= ga.speculative_quantile * len(chromosome_list)):
+            for index in sorted(start_times, key = start_times.get):
+                if len(in_flight) >= capacity:
+                    break
+                if index not in duplicated:
+                    duplicated.add(index)
+                    in_flight[submit(chromosome_list[index])] = index
+
+        # Wait for a result or for the next deadline
+        timeout = None
+        if ga.fitness_timeout is not None and len(start_times) > 0:
+            timeout = max(0, min(start_times.values()) + ga.fitness_timeout - time.monotonic())
+
+        done, _ = wait([*in_flight, *timed_out], timeout = timeout, return_when = FIRST_COMPLETED)
+
+        for future in done:
+            index = in_flight.pop(future, None)
+            if index is not None and not finished[index]:
+                finish(index, future.result())
+
+        # Penalize chromosomes past their deadline
+        if ga.fitness_timeout is not None:
+            now = time.monotonic()
+            for index, start_time in list(start_times.items()):
+                if now - start_time >= ga.fitness_timeout:
+                    penalized.append(index)
+                    finish(index, None)
+
+    if len(penalized) > 0:
+        penalty = _timeout_penalty(ga, fitness_list)
+        for index in penalized:
+            fitness_list[index] = Inexact_Fitness(penalty)
+
+    for chromosome, fitness in zip(chromosome_list, fitness_list):
+        chromosome.fitness = fitness
+
+
+def _timeout_penalty(ga, fitness_list):
+    """Returns the fitness given to timed out chromosomes, which is
+    ga.timeout_fitness if set. Otherwise it is the worst exact fitness of
+    the evaluated chromosomes and the population, or 0 if there are none,
+    so that it stays finite when the fitness is converted."""
+
+    if ga.timeout_fitness is not None:
+        return ga.timeout_fitness
+
+    fitness_list = [
+        fitness
+        for fitness
+        in chain(fitness_list, (chromosome.fitness for chromosome in ga.population))
+        if is_exact(fitness)
+    ]
+
+    if len(fitness_list) == 0:
+        return 0
+
+    return min(fitness_list) if ga.target_fitness_type == 'max' else max(fitness_list)
+
+
+def _chunk_size(ga, amount):
+    """Returns ga.chunk_size if set, otherwise splits
+    the chromosomes into about 4 chunks per worker."""
+
+    if ga.chunk_size is not None:
+        return ga.chunk_size
+
+    workers = ga.max_workers or os.cpu_count() or 1
+    return max(1, ceil(amount / (4*workers)))
+
+
+def _chunks(chromosome_list, chunk_size):
+    """Splits the chromosome list into consecutive chunks."""
+
+    return (
+        chromosome_list[index : index+chunk_size]
+        for index
+        in range(0, len(chromosome_list), chunk_size)
+    )
+
+
+def _encode_chunk(chromosome_list):
+    """Encodes the chunk compactly to send to a worker, unless it has
+    chromosome types which the codec would decode as their base type."""
+
+    if all(type(chromosome) in codec.chromosome_types for chromosome in chromosome_list):
+        return codec.dumps(chromosome_list)
+
+    return chromosome_list
+
+
+def _decode_chunk(chromosome_list):
+    """Decodes a chunk made by _encode_chunk."""
+
+    if isinstance(chromosome_list, bytes):
+        return codec.loads(chromosome_list)
+
+    return chromosome_list
+
+
+def _is_picklable(ga, value):
+    """Returns if the attribute of the ga can be pickled."""
+
+    # Methods bound to the ga are pickled along with the ga,
+    # so only their function needs to be checked
+    if isinstance(value, partial) and len(value.args) > 0 and value.args[0] is ga:
+        value = value.func
+
+    try:
+        pickle.dumps(value)
+        return True
+    except Exception:
+        return False
+
+
+def _snapshot(ga):
+    """Pickles the ga without its population, fitness cache, surrogate,
+    metrics, or any other attributes which can't be pickled, e.g. a lambda
+    gene_impl, so that workers can call the fitness function. Attributes
+    which are not sent are None in the workers."""
+
+    excluded = ['population', 'fitness_cache', '_surrogate', '_metrics']
+
+    # The fitness function is always sent, failing if it can't be pickled
+    excluded += [
+        name
+        for name, value
+        in ga.__getstate__().items()
+        if name not in excluded
+        and name != 'fitness_function_impl'
+        and not _is_picklable(ga, value)
+    ]
+
+    # Set directly in the __dict__ since the attributes also reach
+    # the pickle through methods bound to the ga
+    saved = {name: ga.__dict__[name] for name in excluded if name in ga.__dict__}
+
+    try:
+        ga.__dict__.update(dict.fromkeys(saved))
+        return pickle.dumps((type(ga), ga.__getstate__()))
+    finally:
+        ga.__dict__.update(saved)
+
+
+# Most recently used ga in a worker process, reused between chunks.
+_worker_ga = (None, None)
+
+
+def _load_snapshot(snapshot):
+    """Rebuilds the ga from the snapshot, reusing
+    the last one if the snapshot has not changed."""
+
+    global _worker_ga
+
+    if _worker_ga[0] != snapshot:
+        ga_class, state = pickle.loads(snapshot)
+        ga = ga_class.__new__(ga_class)
+        ga.__setstate__(state)
+        _worker_ga = (snapshot, ga)
+
+    return _worker_ga[1]
+
+
+def _evaluate_one(snapshot, chromosome):
+    """Evaluates one chromosome inside a worker process."""
+
+    return call_fitness_function(_load_snapshot(snapshot), chromosome)
+
+
+def _evaluate_chunk(snapshot, chromosome_list):
+    """Evaluates a chunk of chromosomes inside a worker process."""
+
+    ga = _load_snapshot(snapshot)
+
+    return [
+        call_fitness_function(ga, chromosome)
+        for chromosome
+        in _decode_chunk(chromosome_list)
+    ]
+
+
+def _row_ranges(rows, chunk_size):
+    """Splits the sorted rows into ranges of consecutive rows,
+    with at most chunk_size rows in each range."""
+
+    ranges = []
+
+    for row in rows:
+        if len(ranges) > 0 and ranges[-1][1] == row and ranges[-1][1] - ranges[-1][0] < chunk_size:
+            ranges[-1][1] += 1
+        else:
+            ranges.append([row, row+1])
+
+    return ranges
+
+
+def _evaluate_rows(snapshot, shared_buffers, row_range):
+    """Evaluates a range of rows of a shared population inside a
+    worker process, writing the fitness values into shared memory.
+    Returns the rows given an inexact fitness."""
+
+    ga = _load_snapshot(snapshot)
+
+    values = attach_shared_array(shared_buffers['values_name'], shared_buffers['shape'], shared_buffers['dtype'])
+    fitness_values = attach_shared_array(shared_buffers['fitness_name'], shared_buffers['shape'][:1], float)
+    inexact_rows = []
+
+    for row in range(*row_range):
+        fitness = call_fitness_function(ga, Array_Chromosome.view(values, fitness_values, row))
+        fitness_values[row] = np.nan if fitness is None else fitness
+        if isinstance(fitness, Inexact_Fitness):
+            inexact_rows.append(row)
+
+    return inexact_rows
+
+
+async def _gather(ga, chromosome_list):
+    """Awaits the fitness of every chromosome, limited by a semaphore."""
+
+    semaphore = asyncio.Semaphore(ga.max_concurrency or len(chromosome_list))
+
+    async def evaluate(chromosome):
+        async with semaphore:
+            fitness = call_fitness_function(ga, chromosome)
+            if isawaitable(fitness):
+                fitness = await fitness
+        chromosome.fitness = fitness
+
+    await asyncio.gather(*map(evaluate, chromosome_list))
@@ -0,0 +1,276 @@
+import time
+import threading
+import traceback
+from collections import deque
+from multiprocessing import Process, ProcessError
+from multiprocessing.connection import Listener, Client, wait
+
+from evaluation import Evaluation
+
+
+def worker(address, authkey = b'EasyGA', initializer = None, initargs = ()):
+    """Connects to the broker at the address and evaluates batches of chromosomes
+    until the broker closes. The initializer is called once on startup, and may
+    be used to load heavy state used by the fitness function, which is then kept
+    warm across every ga and run using the broker. May be run on its own, e.g.
+
+        python -c "from evaluation.broker import worker; worker(('localhost', 6000))"
+    """
+
+    if initializer is not None:
+        initializer(*initargs)
+
+    with Client(address, authkey = authkey) as connection:
+        while True:
+
+            try:
+                message = connection.recv()
+            except EOFError:
+                return
+
+            # Load the ga used for the next batches
+            if message[0] == 'snapshot':
+                ga = Evaluation._load_snapshot(message[1])
+
+            # Evaluate a batch
+            elif message[0] == 'evaluate':
+                _, task_id, chromosome_list = message
+
+                try:
+                    fitness_list = [
+                        Evaluation.call_fitness_function(ga, chromosome)
+                        for chromosome
+                        in Evaluation._decode_chunk(chromosome_list)
+                    ]
+
+                # Send the error back to be raised by the broker
+                except Exception:
+                    connection.send(('error', task_id, traceback.format_exc()))
+
+                else:
+                    connection.send(('result', task_id, fitness_list))
+
+            elif message[0] == 'close':
+                return
+
+
+class Broker:
+    """Streams batches of chromosomes to worker processes connected over a
+    local socket and collects their fitness values. Workers may connect or
+    disconnect at any time, and batches held by a disconnected worker are
+    retried on another worker, at most max_retries times per batch. The
+    same broker may be used by many gas. If no worker is connected for
+    connect_timeout seconds while there are batches to evaluate, evaluate
+    raises a RuntimeError, or waits forever if it is None.
+
+    Errors raised by the fitness function on a worker are raised again
+    by evaluate as a RuntimeError with the worker's traceback.
+    """
+
+
+    def __init__(self, address = ('localhost', 0), authkey = b'EasyGA', batch_size = 16, max_retries = 3, connect_timeout = 60):
+        self.authkey = authkey
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.connect_timeout = connect_timeout
+        self.listener = Listener(address, authkey = authkey)
+        self.address = self.listener.address
+        self.processes = []
+
+        # Idle worker connections and the snapshot each worker has loaded
+        self.idle_connections = deque()
+        self.worker_snapshots = {}
+        self.condition = threading.Condition()
+        self.closed = False
+
+        # Accept new workers in the background
+        self.accept_thread = threading.Thread(target = self._accept_workers, daemon = True)
+        self.accept_thread.start()
+
+
+    def _accept_workers(self):
+        """Adds workers as they connect."""
+
+        while not self.closed:
+
+            # Skip connections which fail, e.g. with the wrong authkey
+            try:
+                connection = self.listener.accept()
+            except (OSError, EOFError, ProcessError):
+                continue
+
+            with self.condition:
+                if self.closed:
+                    connection.close()
+                    return
+                self.idle_connections.append(connection)
+                self.condition.notify_all()
+
+
+    def start_workers(self, amount, initializer = None, initargs = ()):
+        """Starts worker processes on this machine connected to the broker."""
+
+        for _ in range(amount):
+            process = Process(
+                target = worker,
+                args = (self.address, self.authkey, initializer, initargs),
+                daemon = True,
+            )
+            process.start()
+            self.processes.append(process)
+
+
+    @property
+    def worker_amount(self):
+        """Returns the number of connected workers."""
+        return len(set(self.worker_snapshots).union(self.idle_connections))
+
+
+    def evaluate(self, ga, chromosome_list):
+        """Evaluates the chromosomes on the workers, waiting up to
+        connect_timeout seconds for workers to connect if there are
+        none, and writes the fitness values back."""
+
+        if len(chromosome_list) == 0:
+            return
+
+        snapshot = Evaluation._snapshot(ga)
+
+        # Split the chromosomes into batches
+        tasks = list(Evaluation._chunks(chromosome_list, self.batch_size))
+        encoded_tasks = [Evaluation._encode_chunk(task) for task in tasks]
+        pending = deque(range(len(tasks)))
+        results = [None] * len(tasks)
+        retries = [0] * len(tasks)
+        busy = {}  # connection -> task id
+        remaining = len(tasks)
+        lost_workers = 0
+        waiting_since = time.monotonic()
+
+        def retry(task_id):
+            """Retries the task held by a lost worker, unless
+            it has already lost too many workers."""
+
+            nonlocal lost_workers
+            lost_workers += 1
+            retries[task_id] += 1
+
+            if retries[task_id] > self.max_retries:
+                self._release(busy)
+                raise RuntimeError(f"Lost {retries[task_id]} workers while evaluating the same batch of chromosomes.")
+
+            pending.append(task_id)
+
+        while remaining > 0:
+
+            # Hand out pending tasks to idle workers
+            with self.condition:
+                while len(pending) > 0 and len(self.idle_connections) > 0:
+                    connection = self.idle_connections.popleft()
+                    task_id = pending.popleft()
+
+                    try:
+                        if self.worker_snapshots.get(connection) != snapshot:
+                            connection.send(('snapshot', snapshot))
+                            self.worker_snapshots[connection] = snapshot
+                        connection.send(('evaluate', task_id, encoded_tasks[task_id]))
+                        busy[connection] = task_id
+                        waiting_since = None
+
+                    # Worker was already gone, retry the task on another worker
+                    except (OSError, EOFError):
+                        self._drop(connection)
+                        pending.appendleft(task_id)
+
+                # Wait for a worker to connect, unless every worker was lost
+                if len(busy) == 0:
+                    if lost_workers > 0 and self.worker_amount == 0:
+                        raise RuntimeError("Lost every worker while evaluating the chromosomes.")
+                    if waiting_since is None:
+                        waiting_since = time.monotonic()
+                    elif self.connect_timeout is not None and time.monotonic() - waiting_since > self.connect_timeout:
+                        raise RuntimeError(f"No workers connected to the broker within {self.connect_timeout} seconds.")
+                    self.condition.wait(timeout = 0.1)
+                    continue
+
+            # Collect finished tasks
+            for connection in wait(list(busy), timeout = 0.1):
+                task_id = busy.pop(connection)
+
+                try:
+                    kind, result_id, result = connection.recv()
+
+                # Worker is gone, possibly crashed by the
+                # task, retry the task on another worker
+                except (OSError, EOFError):
+                    with self.condition:
+                        self._drop(connection)
+                    retry(task_id)
+                    continue
+
+                with self.condition:
+                    self.idle_connections.append(connection)
+
+                # Raise errors from the fitness function
+                if kind == 'error':
+                    self._release(busy)
+                    raise RuntimeError(f"Fitness function failed on a worker:\n{result}")
+
+                if results[result_id] is None:
+                    results[result_id] = result
+                    remaining -= 1
+
+        for chromosome_batch, fitness_list in zip(tasks, results):
+            for chromosome, fitness in zip(chromosome_batch, fitness_list):
+                chromosome.fitness = fitness
+
+
+    def _release(self, busy):
+        """Waits for the busy workers to finish their tasks, discarding
+        the results, so they can be used again after an error."""
+
+        for connection in busy:
+            try:
+                connection.recv()
+                with self.condition:
+                    self.idle_connections.append(connection)
+            except (OSError, EOFError):
+                with self.condition:
+                    self._drop(connection)
+
+        busy.clear()
+
+
+    def _drop(self, connection):
+        """Forgets a disconnected worker."""
+
+        self.worker_snapshots.pop(connection, None)
+        connection.close()
+
+
+    def close(self):
+        """Disconnects the workers and stops accepting new ones."""
+
+        with self.condition:
+            self.closed = True
+            connection_list = list(self.idle_connections)
+            self.idle_connections.clear()
+
+        for connection in connection_list:
+            try:
+                connection.send(('close',))
+            except (OSError, EOFError):
+                pass
+            self._drop(connection)
+
+        # Wake up the accepting thread
+        try:
+            Client(self.address, authkey = self.authkey).close()
+        except (OSError, EOFError):
+            pass
+
+        self.listener.close()
+
+        for process in self.processes:
+            process.join(timeout = 1)
+        self.processes = []
@@ -0,0 +1,129 @@
+import hashlib
+from collections import OrderedDict
+
+from structure.chromosome import is_exact
+from structure.gene import to_hashable
+
+
+def chromosome_key(chromosome):
+    """Returns a hashable key made from the gene values of the chromosome."""
+    return tuple(to_hashable(value) for value in chromosome.gene_value_iter)
+
+
+def chromosome_hash(chromosome):
+    """Returns a hash of the gene values of the chromosome
+    which is the same across processes and runs."""
+    return hashlib.sha256(repr(chromosome_key(chromosome)).encode()).hexdigest()
+
+
+class Fitness_Cache:
+    """Least recently used (LRU) cache of fitness values,
+    keyed on the gene values of the chromosomes."""
+
+
+    def __init__(self, max_size = 10000):
+        self.max_size = max_size
+        self.fitness_dict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    def key(self, chromosome):
+        """Returns the hashable key used for the chromosome."""
+        return chromosome_key(chromosome)
+
+
+    def get(self, key):
+        """Returns the cached fitness for the key, or None if it is not cached."""
+
+        fitness = self.fitness_dict.get(key)
+
+        if fitness is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.fitness_dict.move_to_end(key)
+
+        return fitness
+
+
+    def set(self, key, fitness):
+        """Caches the fitness for the key, evicting the
+        least recently used fitness if the cache is full.
+        Inexact fitness values are not cached."""
+
+        if not is_exact(fitness):
+            return
+
+        self.fitness_dict[key] = fitness
+        self.fitness_dict.move_to_end(key)
+        self.evict()
+
+
+    def evict(self):
+        """Evicts the least recently used fitness values
+        until the cache is no larger than the max size."""
+
+        while len(self.fitness_dict) > self.max_size:
+            self.fitness_dict.popitem(last = False)
+            self.evictions += 1
+
+
+    def evaluate(self, evaluation_impl, chromosome_list):
+        """Sets the fitness of the chromosomes using the cache where possible.
+        The remaining chromosomes are evaluated with the evaluation_impl,
+        evaluating each distinct set of gene values only once.
+        """
+
+        # Chromosomes to evaluate, grouped by key
+        missed = {}
+
+        for chromosome in chromosome_list:
+            key = self.key(chromosome)
+
+            # Identical to another chromosome already being evaluated
+            if key in missed:
+                self.hits += 1
+                missed[key].append(chromosome)
+                continue
+
+            chromosome.fitness = self.get(key)
+
+            if chromosome.fitness is None:
+                missed[key] = [chromosome]
+
+        # Evaluate one chromosome for each key
+        evaluation_impl([chromosomes[0] for chromosomes in missed.values()])
+
+        # Cache and copy the new fitness values
+        for key, chromosomes in missed.items():
+            self.set(key, chromosomes[0].fitness)
+            for chromosome in chromosomes[1:]:
+                chromosome.fitness = chromosomes[0].fitness
+
+
+    def clear(self):
+        """Removes all cached fitness values and resets the counters."""
+
+        self.fitness_dict.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    @property
+    def stats(self):
+        """Returns the hit, miss, and eviction counters."""
+
+        return {
+            'size'      : len(self.fitness_dict),
+            'hits'      : self.hits,
+            'misses'    : self.misses,
+            'evictions' : self.evictions,
+        }
+
+
+    def __len__(self):
+        """Returns the number of cached fitness values."""
+        return len(self.fitness_dict)
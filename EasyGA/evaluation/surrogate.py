@@ -0,0 +1,155 @@
+from math import ceil
+from itertools import chain, takewhile
+
+import numpy as np
+
+from structure.chromosome import Inexact_Fitness, is_exact
+
+
+class KNN_Surrogate:
+    """Cheap k-nearest neighbours model of the fitness function, fit on the
+    archive of exactly evaluated chromosomes. Only the exact_fraction of
+    chromosomes with the best predicted fitness are evaluated exactly,
+    the rest are given their predicted fitness as an Inexact_Fitness.
+    Requires numeric genes.
+    """
+
+
+    def __init__(self, k = 5, exact_fraction = 0.25, refit_rate = 1, max_archive_size = 5000):
+        self.k = k
+        self.exact_fraction = exact_fraction
+        self.refit_rate = refit_rate
+        self.max_archive_size = max_archive_size
+
+        # Archive of exactly evaluated gene values and fitnesses
+        self.archive_genes = []
+        self.archive_fitness = []
+
+        # Fitted model
+        self.genes = None
+        self.fitness = None
+        self.calls_since_fit = 0
+
+        # Accuracy tracking
+        self.exact_evaluations = 0
+        self.predicted_evaluations = 0
+        self.error_history = []
+
+
+    def add(self, chromosome_list):
+        """Adds the exactly evaluated chromosomes to the archive,
+        dropping the oldest ones if it gets too large."""
+
+        for chromosome in chromosome_list:
+            if is_exact(chromosome.fitness):
+                self.archive_genes.append(chromosome.gene_value_list)
+                self.archive_fitness.append(chromosome.fitness)
+
+        del self.archive_genes[:-self.max_archive_size]
+        del self.archive_fitness[:-self.max_archive_size]
+
+
+    def fit(self):
+        """Fits the model to the archive."""
+
+        self.genes = np.array(self.archive_genes, dtype = float)
+        self.fitness = np.array(self.archive_fitness, dtype = float)
+        self.calls_since_fit = 0
+
+
+    def predict(self, chromosome_list):
+        """Returns the predicted fitness of each chromosome, using the
+        inverse distance weighted mean of the k nearest neighbours."""
+
+        genes = np.array([chromosome.gene_value_list for chromosome in chromosome_list], dtype = float)
+        k = min(self.k, len(self.fitness))
+
+        # Distances to every archived chromosome using |a-b|^2 = |a|^2 + |b|^2 - 2a.b
+        distances = np.sqrt(np.maximum(
+            (genes ** 2).sum(axis = 1)[:, None]
+            + (self.genes ** 2).sum(axis = 1)[None, :]
+            - 2 * genes @ self.genes.T,
+            0,
+        ))
+        nearest = np.argpartition(distances, k-1, axis = 1)[:, :k]
+        nearest_distances = np.take_along_axis(distances, nearest, axis = 1)
+
+        # Exact matches get all of the weight
+        weights = 1 / np.maximum(nearest_distances, 1e-12)
+        return (weights * self.fitness[nearest]).sum(axis = 1) / weights.sum(axis = 1)
+
+
+    @property
+    def is_fit(self):
+        """Returns if the model has enough data to make predictions."""
+        return self.fitness is not None and len(self.fitness) > 0
+
+
+    def evaluate(self, ga, evaluation_impl, chromosome_list):
+        """Evaluates the chromosomes with the best predicted fitness using
+        the evaluation_impl and gives the rest their predicted fitness.
+        Chromosomes predicted to be at least as fit as the best exact
+        fitness in the population are also evaluated exactly, so that
+        the best chromosome never has a predicted fitness."""
+
+        if len(chromosome_list) == 0:
+            return
+
+        # Evaluate everything until the model can be fit
+        if not self.is_fit:
+            evaluation_impl(chromosome_list)
+            self.exact_evaluations += len(chromosome_list)
+            self.add(chromosome_list)
+            self.fit()
+            return
+
+        predictions = self.predict(chromosome_list)
+
+        # Order from best to worst predicted fitness
+        order = np.argsort(predictions)
+        if ga.target_fitness_type == 'max':
+            order = order[::-1]
+
+        exact_amount = ceil(self.exact_fraction * len(chromosome_list))
+        evaluation_impl([chromosome_list[index] for index in order[:exact_amount]])
+
+        # Best exact fitness so far, including the new exact evaluations
+        best = max if ga.target_fitness_type == 'max' else min
+        best_fitness = best(
+            (
+                chromosome.fitness
+                for chromosome
+                in chain(ga.population or (), (chromosome_list[index] for index in order[:exact_amount]))
+                if is_exact(chromosome.fitness)
+            ),
+            default = None,
+        )
+
+        # Evaluate the chromosomes which might be better exactly as well
+        promising = list(takewhile(
+            lambda index: best_fitness is None or best(predictions[index], best_fitness) == predictions[index],
+            order[exact_amount:],
+        ))
+        evaluation_impl([chromosome_list[index] for index in promising])
+        exact_amount += len(promising)
+
+        exact_list = [chromosome_list[index] for index in order[:exact_amount]]
+        self.exact_evaluations += len(exact_list)
+
+        # Track the accuracy of the model on the exact evaluations
+        self.error_history.append(float(np.mean([
+            abs(chromosome.fitness - predictions[index])
+            for chromosome, index
+            in zip(exact_list, order[:exact_amount])
+        ])))
+
+        # Use the predicted fitness for the rest, marked as inexact
+        for index in order[exact_amount:]:
+            chromosome_list[index].fitness = Inexact_Fitness(predictions[index])
+            self.predicted_evaluations += 1
+
+        # Refit periodically
+        self.add(exact_list)
+        self.calls_since_fit += 1
+        if self.calls_since_fit >= self.refit_rate:
+            self.fit()
@@ -0,0 +1,551 @@
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+from EasyGA import GA, Evaluation, Mutation
+from evaluation.fitness_cache import chromosome_hash
+from structure.array_population import Array_Chromosome
+from structure.chromosome import Inexact_Fitness, is_exact
+from structure.shared_population import Shared_Population
+
+
+def test_ga_pickle():
+    ga = GA()
+    ga.generation_goal = 1
+    ga.evolve()
+
+    ga_copy = pickle.loads(pickle.dumps(ga))
+
+    # Functions are bound to the new ga
+    assert ga_copy.fitness_function_impl(ga.population[0]) == ga.population[0].fitness
+    assert ga_copy.population == ga.population
+
+
+def test_process_pool():
+    ga = GA()
+    ga.generation_goal = 3
+    ga.population_size = 20
+    ga.chunk_size = 3
+    ga.max_workers = 2
+    ga.evaluation_impl = Evaluation.process_pool
+
+    # Lambdas which can't be pickled are not sent to the workers
+    ga.gene_impl = lambda: random.randint(1, 10)
+
+    ga.evolve()
+
+    # Same pool is kept across generations
+    assert ga.executor is not None
+    ga.close_executor()
+    assert ga.executor is None
+
+    # Fitnesses are written back to the right chromosomes
+    for chromosome in ga.population:
+        assert chromosome.fitness == ga.fitness_function_impl(chromosome)
+
+
+def test_shared_memory():
+    ga = GA()
+    ga.generation_goal = 3
+    ga.population_size = 20
+    ga.chunk_size = 3
+    ga.max_workers = 2
+    ga.make_population = Shared_Population
+    ga.make_chromosome = Array_Chromosome
+    ga.evaluation_impl = Evaluation.shared_memory
+
+    ga.evolve()
+    ga.close_executor()
+
+    # Workers wrote the fitnesses into the shared array
+    for chromosome in ga.population:
+        assert chromosome.fitness == ga.fitness_function_impl(chromosome)
+
+    # Updating the population swaps between two sets of buffers
+    names = ga.population.shared_buffers['values_name']
+    for _ in range(2):
+        ga.population.next_population = list(ga.population)
+        ga.population.update()
+    assert ga.population.shared_buffers['values_name'] == names
+
+    ga.population.close()
+
+
+def test_thread_pool():
+    ga = GA()
+    ga.generation_goal = 3
+    ga.evaluation_impl = Evaluation.thread_pool
+
+    ga.evolve()
+    ga.close_executor()
+
+    for chromosome in ga.population:
+        assert chromosome.fitness == ga.fitness_function_impl(chromosome)
+
+
+def test_asynchronous():
+    import asyncio
+
+    running = [0, 0]  # current, maximum
+
+    async def fitness(chromosome):
+        running[0] += 1
+        running[1] = max(running)
+        await asyncio.sleep(0.001)
+        running[0] -= 1
+        return sum(gene.value for gene in chromosome)
+
+    ga = GA()
+    ga.generation_goal = 3
+    ga.population_size = 20
+    ga.max_concurrency = 4
+    ga.fitness_function_impl = fitness
+    ga.evaluation_impl = Evaluation.asynchronous
+
+    ga.evolve()
+
+    assert running[1] == 4
+    for chromosome in ga.population:
+        assert chromosome.fitness == sum(chromosome.gene_value_list)
+
+    # Early abort passes in the bound, also inside a running event loop
+    bounds = []
+
+    async def bounded_fitness(chromosome, bound = None):
+        bounds.append(bound)
+        await asyncio.sleep(0.001)
+        return chromosome.gene_value_list.count(5)
+
+    ga = GA()
+    ga.generation_goal = 3
+    ga.early_abort = True
+    ga.fitness_function_impl = bounded_fitness
+    ga.evaluation_impl = Evaluation.asynchronous
+    ga.database_name = 'asynchronous.db'
+
+    async def evolve():
+        ga.evolve()
+
+    asyncio.run(evolve())
+
+    assert any(bound is not None for bound in bounds)
+    for chromosome in ga.population:
+        assert chromosome.fitness == chromosome.gene_value_list.count(5)
+
+
+def test_fitness_cache():
+    calls = []
+
+    def fitness(chromosome):
+        calls.append(chromosome.gene_value_list)
+        return sum(chromosome.gene_value_list)
+
+    ga = GA()
+    ga.generation_goal = 10
+    ga.gene_impl = lambda: random.randint(0, 1)
+    ga.fitness_function_impl = fitness
+    ga.fitness_cache_size = 4
+
+    ga.evolve()
+
+    stats = ga.fitness_cache.stats
+    assert stats['size'] <= 4
+    assert stats['misses'] == len(calls)
+    assert stats['hits'] > 0
+    for chromosome in ga.population:
+        assert chromosome.fitness == sum(chromosome.gene_value_list)
+
+    # Disable the cache
+    ga.fitness_cache_size = None
+    assert ga.fitness_cache_size is None
+
+
+def test_batch():
+    calls = []
+
+    def batch_fitness(gene_values):
+        calls.append(gene_values.shape)
+        return (gene_values == 5).sum(axis = 1)
+
+    ga = GA()
+    ga.generation_goal = 5
+    ga.batch_as_array = True
+    ga.batch_fitness_function_impl = batch_fitness
+    ga.evaluation_impl = Evaluation.batch
+
+    ga.evolve()
+
+    # One call per set_all_fitness with only the chromosomes needing it
+    assert calls[0] == (ga.population_size, ga.chromosome_length)
+    assert all(shape[0] <= ga.population_size for shape in calls)
+    for chromosome in ga.population:
+        assert chromosome.fitness == chromosome.gene_value_list.count(5)
+
+
+def test_persistent_fitness_cache():
+    calls = []
+
+    def fitness(chromosome):
+        calls.append(chromosome)
+        return sum(chromosome.gene_value_list)
+
+    ga = GA()
+    ga.generation_goal = 1
+    ga.persistent_fitness_cache = True
+    ga.fitness_function_impl = fitness
+
+    # Local functions don't have unique names, so they need a version
+    with pytest.raises(ValueError):
+        ga.evolve()
+
+    ga.fitness_function_version = 1
+    ga.evolve()
+
+    assert len(calls) == ga.population_size
+
+    # A new run reuses the fitness values stored in the database
+    ga_2 = GA()
+    ga_2.generation_goal = 1
+    ga_2.persistent_fitness_cache = True
+    ga_2.fitness_function_version = 1
+    ga_2.fitness_function_impl = fitness
+    ga_2.population = ga_2.make_population(ga.population)
+    ga_2.evolve()
+
+    assert len(calls) == ga.population_size
+    assert ga_2.population == ga.population
+
+    # A new version of the fitness function is evaluated again
+    ga_3 = GA()
+    ga_3.generation_goal = 1
+    ga_3.persistent_fitness_cache = True
+    ga_3.fitness_function_version = 2
+    ga_3.fitness_function_impl = fitness
+    ga_3.population = ga_3.make_population(ga.population)
+    ga_3.evolve()
+
+    assert len(calls) == 2*ga.population_size
+
+
+def test_delta_fitness():
+    calls = {'full': 0, 'delta': 0}
+
+    def fitness(chromosome):
+        calls['full'] += 1
+        return sum(chromosome.gene_value_list)
+
+    def delta_fitness(chromosome, old_fitness, changes):
+        calls['delta'] += 1
+        return old_fitness + sum(
+            chromosome[index].value - old_value
+            for index, old_value
+            in changes.items()
+        )
+
+    ga = GA()
+    ga.generation_goal = 20
+    ga.chromosome_length = 50
+    ga.fitness_function_impl = fitness
+    ga.delta_fitness_impl = delta_fitness
+    ga.mutation_population_impl = Mutation.Population.best_replace_worst
+
+    ga.evolve()
+
+    assert calls['delta'] > 0
+    for chromosome in ga.population:
+        assert chromosome.fitness == sum(chromosome.gene_value_list)
+        assert chromosome.changes is None
+
+
+def test_surrogate():
+    from evaluation.surrogate import KNN_Surrogate
+
+    calls = []
+
+    def fitness(chromosome):
+        calls.append(chromosome)
+        return sum(chromosome.gene_value_list)
+
+    ga = GA()
+    ga.generation_goal = 10
+    ga.population_size = 20
+    ga.fitness_function_impl = fitness
+    ga.fitness_cache_size = 1000
+    ga.surrogate = KNN_Surrogate(k = 3, exact_fraction = 0.5, refit_rate = 2)
+
+    ga.evolve()
+
+    surrogate = ga.surrogate
+    assert surrogate.exact_evaluations == len(calls)
+    assert surrogate.predicted_evaluations > 0
+    assert len(surrogate.error_history) > 0
+    assert all(chromosome.fitness is not None for chromosome in ga.population)
+
+    # Predicted fitnesses are marked and never the best or cached
+    assert is_exact(ga.population[0].fitness)
+    for chromosome in ga.population:
+        if chromosome.fitness != sum(chromosome.gene_value_list):
+            assert isinstance(chromosome.fitness, Inexact_Fitness)
+    for key, cached_fitness in ga.fitness_cache.fitness_dict.items():
+        assert cached_fitness == sum(key)
+
+    # Disable the surrogate
+    ga.surrogate = None
+    assert ga.surrogate is None
+
+
+def test_early_abort():
+    calls = {'started': 0, 'finished': 0}
+
+    def fitness(chromosome):
+        """Sum of squared distances to 5, yielding partial sums."""
+        calls['started'] += 1
+        total = 0
+        for gene in chromosome:
+            total += (gene.value - 5) ** 2
+            yield total
+        calls['finished'] += 1
+        return total
+
+    ga = GA()
+    ga.generation_goal = 10
+    ga.chromosome_length = 20
+    ga.target_fitness_type = 'min'
+    ga.early_abort = True
+    ga.fitness_function_impl = fitness
+    ga.fitness_cache_size = 1000
+    ga.persistent_fitness_cache = True
+    ga.fitness_function_version = 1
+    ga.database_name = 'early_abort.db'
+
+    ga.evolve()
+
+    # Some evaluations stopped early
+    assert calls['finished'] < calls['started']
+    assert ga.population[0].fitness == sum((value - 5) ** 2 for value in ga.population[0].gene_value_list)
+
+    # Stopped evaluations are marked as inexact
+    for chromosome in ga.population:
+        if chromosome.fitness != sum((value - 5) ** 2 for value in chromosome.gene_value_list):
+            assert isinstance(chromosome.fitness, Inexact_Fitness)
+
+    # Only exact fitness values are cached
+    for key, cached_fitness in ga.fitness_cache.fitness_dict.items():
+        assert cached_fitness == sum((value - 5) ** 2 for value in key)
+
+    hash_dict = {chromosome_hash(chromosome): chromosome for chromosome in ga.population}
+    cached_dict = ga.database.get_cached_fitness(ga.fitness_function_id, hash_dict)
+    for hash_key, cached_fitness in cached_dict.items():
+        assert cached_fitness == sum((value - 5) ** 2 for value in hash_dict[hash_key].gene_value_list)
+
+
+def test_early_abort_bound():
+    bounds = []
+
+    def fitness(chromosome, bound = None):
+        bounds.append(bound)
+        return chromosome.gene_value_list.count(5)
+
+    ga = GA()
+    ga.generation_goal = 5
+    ga.early_abort = True
+    ga.fitness_function_impl = fitness
+
+    ga.evolve()
+
+    assert bounds[0] is None
+    assert any(bound is not None for bound in bounds)
+
+
+def test_broker():
+    from evaluation.broker import Broker
+
+    broker = Broker(batch_size = 3)
+    broker.start_workers(2)
+
+    try:
+        ga = GA()
+        ga.generation_goal = 3
+        ga.broker = broker
+        ga.evaluation_impl = Evaluation.broker
+        ga.evolve()
+
+        for chromosome in ga.population:
+            assert chromosome.fitness == ga.fitness_function_impl(chromosome)
+
+        # Workers may leave and join between runs
+        broker.processes[0].terminate()
+        broker.processes[0].join()
+        broker.start_workers(1)
+
+        ga.reset_run()
+        assert all(chromosome.fitness is None for chromosome in ga.population)
+        ga.evolve()
+
+        for chromosome in ga.population:
+            assert chromosome.fitness == ga.fitness_function_impl(chromosome)
+
+    finally:
+        broker.close()
+
+
+def fails_on_tens(ga, chromosome):
+    """Fitness function which raises an error if there is a gene equal to 10."""
+    if 10 in chromosome.gene_value_list:
+        raise ValueError("Gene equal to 10")
+    return chromosome.gene_value_list.count(5)
+
+
+def crashes_on_tens(ga, chromosome):
+    """Fitness function which kills the worker if there is a gene equal to 10."""
+    import os
+    if 10 in chromosome.gene_value_list:
+        os._exit(1)
+    return chromosome.gene_value_list.count(5)
+
+
+def test_broker_errors():
+    from evaluation.broker import Broker
+
+    broker = Broker(batch_size = 3, max_retries = 1)
+    broker.start_workers(2)
+
+    try:
+        # Errors from the fitness function are raised, keeping the workers
+        ga = GA(generation_goal = 1, broker = broker, evaluation_impl = Evaluation.broker)
+        ga.gene_impl = lambda: 10
+        ga.fitness_function_impl = fails_on_tens
+        ga.database_name = 'broker_errors.db'
+        with pytest.raises(RuntimeError, match = 'ValueError'):
+            ga.evolve()
+        assert broker.worker_amount == 2
+
+        # Batches crashing the workers are not retried forever
+        ga = GA(generation_goal = 1, broker = broker, evaluation_impl = Evaluation.broker)
+        ga.gene_impl = lambda: 10
+        ga.fitness_function_impl = crashes_on_tens
+        ga.database_name = 'broker_crashes.db'
+        with pytest.raises(RuntimeError, match = 'Lost'):
+            ga.evolve()
+
+    finally:
+        broker.close()
+
+
+def test_broker_connections():
+    from multiprocessing import AuthenticationError
+    from multiprocessing.connection import Client
+    from evaluation.broker import Broker
+
+    broker = Broker(batch_size = 3, connect_timeout = 0.5)
+
+    try:
+        # Evaluating without any workers stops after the timeout
+        ga = GA(generation_goal = 1, broker = broker, evaluation_impl = Evaluation.broker)
+        ga.database_name = 'broker_timeout.db'
+        with pytest.raises(RuntimeError, match = 'No workers'):
+            ga.evolve()
+
+        # Connections with the wrong authkey don't stop workers from connecting
+        with pytest.raises(AuthenticationError):
+            Client(broker.address, authkey = b'wrong')
+        broker.connect_timeout = 10
+        broker.start_workers(1)
+
+        ga = GA(generation_goal = 1, broker = broker, evaluation_impl = Evaluation.broker)
+        ga.evolve()
+
+        for chromosome in ga.population:
+            assert chromosome.fitness == ga.fitness_function_impl(chromosome)
+
+    finally:
+        broker.close()
+
+
+def slow_on_tens(ga, chromosome):
+    """Fitness function which takes a long time if there is a gene equal to 10."""
+    import time
+    if 10 in chromosome.gene_value_list:
+        time.sleep(0.3)
+    return chromosome.gene_value_list.count(5)
+
+
+def test_fitness_timeout():
+    ga = GA()
+    ga.generation_goal = 2
+    ga.max_workers = 32
+    ga.fitness_timeout = 0.1
+    ga.timeout_fitness = -1
+    ga.fitness_function_impl = slow_on_tens
+    ga.evaluation_impl = Evaluation.thread_pool
+    ga.fitness_cache_size = 1000
+    ga.persistent_fitness_cache = True
+    ga.database_name = 'fitness_timeout.db'
+
+    ga.evolve()
+    ga.close_executor()
+
+    for chromosome in ga.population:
+        if 10 in chromosome.gene_value_list:
+            assert chromosome.fitness == -1
+            assert isinstance(chromosome.fitness, Inexact_Fitness)
+        else:
+            assert chromosome.fitness == chromosome.gene_value_list.count(5)
+
+    # Timed out fitnesses are not cached
+    for key, cached_fitness in ga.fitness_cache.fitness_dict.items():
+        assert cached_fitness == list(key).count(5)
+
+    hash_dict = {chromosome_hash(chromosome): chromosome for chromosome in ga.population}
+    cached_dict = ga.database.get_cached_fitness(ga.fitness_function_id, hash_dict)
+    for hash_key, cached_fitness in cached_dict.items():
+        assert cached_fitness == hash_dict[hash_key].gene_value_list.count(5)
+
+    # By default timed out chromosomes get the worst fitness
+    ga_2 = GA()
+    ga_2.generation_goal = 1
+    ga_2.max_workers = 32
+    ga_2.fitness_timeout = 0.1
+    ga_2.target_fitness_type = 'min'
+    ga_2.fitness_function_impl = slow_on_tens
+    ga_2.evaluation_impl = Evaluation.thread_pool
+
+    ga_2.evolve()
+    ga_2.close_executor()
+
+    worst_fitness = max(
+        chromosome.gene_value_list.count(5)
+        for chromosome
+        in ga_2.population
+        if 10 not in chromosome.gene_value_list
+    )
+    for chromosome in ga_2.population:
+        if 10 in chromosome.gene_value_list:
+            assert chromosome.fitness == worst_fitness
+    assert not np.isnan(ga_2.get_all_fitness()).any()
+
+    # Disable the timeout
+    ga.fitness_timeout = None
+    ga.timeout_fitness = None
+    assert ga.fitness_timeout is None
+    assert ga.timeout_fitness is None
+
+
+def test_speculative_quantile():
+    ga = GA()
+    ga.generation_goal = 2
+    ga.max_workers = 4
+    ga.speculative_quantile = 0.5
+    ga.evaluation_impl = Evaluation.process_pool
+
+    ga.evolve()
+    ga.close_executor()
+
+    for chromosome in ga.population:
+        assert chromosome.fitness == ga.fitness_function_impl(chromosome)
+
+    # Stop submitting stragglers again
+    ga.speculative_quantile = None
+    assert ga.speculative_quantile is None
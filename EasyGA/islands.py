@@ -0,0 +1,163 @@
+import os
+from multiprocessing import Pipe, Process
+
+from structure import codec
+
+
+def migration_sources(topology, amount):
+    """Returns the list of islands each island receives migrants from.
+
+    Topologies:
+        'ring'  each island receives from the previous island
+        'star'  the first island receives from every island,
+                which all receive from the first island
+        'full'  each island receives from every other island
+
+    A list of source lists may also be given as the topology.
+    """
+
+    if not isinstance(topology, str):
+        return [list(sources) for sources in topology]
+
+    if topology == 'ring':
+        return [[(index-1) % amount] for index in range(amount)] if amount > 1 else [[]]
+
+    elif topology == 'star':
+        return [list(range(1, amount))] + [[0] for _ in range(1, amount)]
+
+    elif topology == 'full':
+        return [
+            [source for source in range(amount) if source != index]
+            for index
+            in range(amount)
+        ]
+
+    raise ValueError("Unknown topology, use 'ring', 'star', 'full', or a list of source lists.")
+
+
+def insert_migrants(ga, migrant_list):
+    """Replaces the worst chromosomes of the ga with the migrants using
+    the population methods, then sorts the population, evaluating
+    any migrants without a fitness value."""
+
+    for migrant in migrant_list[:len(ga.population)]:
+        ga.population.remove_chromosome(-1)
+        ga.population.add_chromosome(migrant)
+
+    ga.set_all_fitness()
+    ga.sort_by_best_fitness()
+
+
+def _run_island(ga, connection, migration_interval, migration_amount):
+    """Evolves the ga inside an island process, exchanging the best
+    chromosomes through the connection every migration interval."""
+
+    try:
+        while True:
+            ga.evolve(migration_interval)
+
+            # Send the best chromosomes and if this island is finished
+            connection.send((not ga.active(), codec.dumps(ga.population[:migration_amount])))
+
+            message = connection.recv()
+
+            if message[0] == 'stop':
+                break
+
+            for migrants in message[1]:
+                insert_migrants(ga, codec.loads(migrants))
+
+        connection.send((codec.dumps(ga.population), ga.current_generation))
+
+    finally:
+        ga.close_executor()
+        connection.close()
+
+
+class Island_Model:
+    """Evolves several gas in separate processes, each with its own
+    population and possibly different methods. Every migration interval
+    of generations, the best migration amount of chromosomes of each island
+    are sent to the islands receiving from it, see migration_sources,
+    where they replace the worst chromosomes.
+
+    Chromosomes are sent through pipes encoded by structure.codec. The
+    islands stop once all of them are finished, e.g. after reaching their
+    generation goal, after which the gas have the final populations.
+
+    Islands sharing a database name are given separate database files
+    so that they don't write to the same file at the same time.
+    """
+
+
+    def __init__(self, ga_list, topology = 'ring', migration_interval = 10, migration_amount = 2):
+        self.ga_list = list(ga_list)
+        self.sources = migration_sources(topology, len(self.ga_list))
+        self.migration_interval = migration_interval
+        self.migration_amount = migration_amount
+
+        if len(self.sources) != len(self.ga_list):
+            raise ValueError("The topology must give the sources of every island.")
+
+        # Use a separate database for each island
+        database_names = [ga.database_name for ga in self.ga_list]
+        if len(set(database_names)) < len(database_names):
+            for index, ga in enumerate(self.ga_list):
+                name, extension = os.path.splitext(ga.database_name)
+                ga.database_name = f"{name}_island_{index}{extension}"
+
+
+    def evolve(self):
+        """Evolves the islands until all of them are finished."""
+
+        connections = []
+        processes = []
+
+        try:
+            for ga in self.ga_list:
+                connection, island_connection = Pipe()
+                process = Process(
+                    target = _run_island,
+                    args = (ga, island_connection, self.migration_interval, self.migration_amount),
+                    daemon = True,
+                )
+                process.start()
+                island_connection.close()
+                connections.append(connection)
+                processes.append(process)
+
+            while True:
+                messages = [connection.recv() for connection in connections]
+
+                if all(finished for finished, _ in messages):
+                    break
+
+                # Route the encoded migrants without decoding them
+                for connection, sources in zip(connections, self.sources):
+                    connection.send(('migrants', [messages[source][1] for source in sources]))
+
+            for connection in connections:
+                connection.send(('stop',))
+
+            # Collect the final populations
+            for ga, connection in zip(self.ga_list, connections):
+                population, ga.current_generation = connection.recv()
+                ga.population = codec.loads(population)
+
+        finally:
+            for connection in connections:
+                connection.close()
+            for process in processes:
+                process.join(timeout = 1)
+                if process.is_alive():
+                    process.terminate()
+
+
+    def best_chromosome(self):
+        """Returns the best chromosome across every island."""
+
+        ga = self.ga_list[0]
+        return ga.sort_by_best_fitness(
+            [island.population[0] for island in self.ga_list],
+            in_place = False,
+        )[0]
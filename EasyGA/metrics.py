@@ -0,0 +1,179 @@
+import time
+from contextlib import nullcontext
+
+from tabulate import tabulate
+
+
+# Shared context used for every stage when metrics are disabled
+_no_timing = nullcontext()
+
+
+def no_timing(name):
+    """Returns a context which does nothing, used instead
+    of Metrics.stage when metrics are disabled."""
+    return _no_timing
+
+
+class Stage_Metrics:
+    """Total wall time, CPU time, and number of calls of a stage."""
+
+    __slots__ = ('wall_time', 'cpu_time', 'calls')
+
+
+    def __init__(self, wall_time = 0.0, cpu_time = 0.0, calls = 0):
+        self.wall_time = wall_time
+        self.cpu_time = cpu_time
+        self.calls = calls
+
+
+    def __iadd__(self, stage_metrics):
+        self.wall_time += stage_metrics.wall_time
+        self.cpu_time  += stage_metrics.cpu_time
+        self.calls     += stage_metrics.calls
+        return self
+
+
+    def __repr__(self):
+        return f"Stage_Metrics(wall_time={self.wall_time!r}, cpu_time={self.cpu_time!r}, calls={self.calls!r})"
+
+
+class _Timer:
+    """Context adding the time spent inside it to the stage metrics."""
+
+    __slots__ = ('stage_metrics', 'wall_start', 'cpu_start')
+
+
+    def __init__(self, stage_metrics):
+        self.stage_metrics = stage_metrics
+
+
+    def __enter__(self):
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+
+
+    def __exit__(self, *exc_info):
+        stage_metrics = self.stage_metrics
+        stage_metrics.wall_time += time.perf_counter() - self.wall_start
+        stage_metrics.cpu_time  += time.process_time() - self.cpu_start
+        stage_metrics.calls     += 1
+
+
+class Metrics:
+    """Records the wall time, CPU time, and calls of each stage of
+    ga.evolve for every generation, along with the number of chromosomes
+    evaluated by the ga.evaluation_impl, which is timed as the evaluation
+    stage. Enable it using
+
+            ga.metrics = Metrics()
+
+    CPU time only includes the current process,
+    not the workers used for parallel evaluation.
+
+    If save_to_database is True, each generation is also
+    inserted into the metrics table of the database.
+    """
+
+
+    def __init__(self, save_to_database = False):
+        self.save_to_database = save_to_database
+
+        # Generation numbers, and the stage metrics of each generation by name
+        self.generation_list = []
+        self.stage_list = []
+
+
+    def start_generation(self, generation):
+        """Starts recording a new generation."""
+
+        self.generation_list.append(generation)
+        self.stage_list.append({})
+
+
+    def stage(self, name):
+        """Returns a context timing the named stage of the current generation."""
+
+        # Stages run outside of evolve are recorded as generation None
+        if len(self.stage_list) == 0:
+            self.start_generation(None)
+
+        stages = self.stage_list[-1]
+        stage_metrics = stages.get(name)
+
+        if stage_metrics is None:
+            stage_metrics = stages[name] = Stage_Metrics()
+
+        return _Timer(stage_metrics)
+
+
+    def evaluate(self, evaluation_impl, chromosome_list):
+        """Evaluates the chromosomes using the evaluation_impl, timing
+        it as the evaluation stage with a call for each chromosome."""
+
+        with self.stage('evaluation'):
+            evaluation_impl(chromosome_list)
+
+        # Count each chromosome as a call instead of the one timed call
+        self.stage_list[-1]['evaluation'].calls += len(chromosome_list) - 1
+
+
+    def count_evaluations(self, amount):
+        """Counts evaluations which were not timed, e.g.
+        evaluations running in the background."""
+
+        # Get the stage metrics without timing anything
+        self.stage('evaluation').stage_metrics.calls += amount
+
+
+    def evaluations(self, index = -1):
+        """Returns the number of chromosomes evaluated in the indexed generation."""
+
+        stage_metrics = self.stage_list[index].get('evaluation')
+        return 0 if stage_metrics is None else stage_metrics.calls
+
+
+    def totals(self):
+        """Returns the stage metrics summed over every generation."""
+
+        totals = {}
+
+        for stages in self.stage_list:
+            for name, stage_metrics in stages.items():
+                totals.setdefault(name, Stage_Metrics())
+                totals[name] += stage_metrics
+
+        return totals
+
+
+    def rows(self, index = -1):
+        """Returns (generation, stage, wall time, cpu time, calls)
+        rows for the indexed generation."""
+
+        generation = self.generation_list[index]
+
+        return [
+            (generation, name, stage_metrics.wall_time, stage_metrics.cpu_time, stage_metrics.calls)
+            for name, stage_metrics
+            in self.stage_list[index].items()
+        ]
+
+
+    def __str__(self):
+        """Returns a table of the total time spent in each stage."""
+
+        totals = self.totals()
+        total_wall_time = sum(
+            stage_metrics.wall_time
+            for name, stage_metrics
+            in totals.items()
+            if name != 'evaluation'  # Already part of set_all_fitness
+        ) or 1.0
+
+        return tabulate(
+            [
+                (name, stage_metrics.calls, stage_metrics.wall_time, stage_metrics.cpu_time, 100 * stage_metrics.wall_time / total_wall_time)
+                for name, stage_metrics
+                in sorted(totals.items(), key = lambda item: -item[1].wall_time)
+            ],
+            headers = ['stage', 'calls', 'wall time (s)', 'cpu time (s)', '% of wall time'],
+        )
@@ -4,6 +4,9 @@ from math import ceil
 # Import all mutation decorators
 from decorators import _check_chromosome_mutation_rate, _check_gene_mutation_rate, _reset_fitness, _loop_random_mutations
 
+# Random masks for the binary mutation methods
+from structure.bit_chromosome import random_mask
+
 
 class Population:
     """Methods for selecting chromosomes to mutate"""
@@ -39,6 +42,11 @@ class Population:
 
         for i in range(mutation_amount):
             ga.population[-i-1] = ga.make_chromosome(ga.population[i])
+
+            # Track changes from the copied chromosome for delta fitness evaluation
+            if ga.delta_fitness_impl is not None:
+                ga.population[-i-1].track_changes_from(ga.population[i])
+
             ga.mutation_individual_impl(ga.population[-i-1])
 
 
@@ -55,6 +63,10 @@ class Individual:
         if ga.chromosome_impl is not None:
             chromosome[index] = ga.make_gene(ga.chromosome_impl()[index])
 
+        # Using the gene_domain
+        elif ga.gene_domain is not None:
+            chromosome[index] = ga.make_gene(ga.gene_domain.sample_gene(index))
+
         # Using the gene_impl
         elif ga.gene_impl is not None:
             chromosome[index] = ga.make_gene(ga.gene_impl())
@@ -82,6 +94,10 @@ class Individual:
             if ga.chromosome_impl is not None:
                 new_value = ga.chromosome_impl()[index]
 
+            # Using the gene_domain
+            elif ga.gene_domain is not None:
+                new_value = ga.gene_domain.sample_gene(index)
+
             # Using the gene_impl
             elif ga.gene_impl is not None:
                 new_value = ga.gene_impl()
@@ -90,7 +106,13 @@ class Individual:
             else:
                 raise Exception("Did not specify any initialization constraints.")
 
-            chromosome[index] = ga.make_gene((1-weight)*chromosome[index].value + weight*new_value)
+            value = (1-weight)*chromosome[index].value + weight*new_value
+
+            # Clip or round into the domain
+            if ga.gene_domain is not None:
+                value = ga.gene_domain.clip_gene(index, value)
+
+            chromosome[index] = ga.make_gene(value)
 
 
         @_check_gene_mutation_rate
@@ -103,6 +125,11 @@ class Individual:
 
             difference = ga.population[0][index].value - chromosome[index].value
             value = ga.population[0][index].value + 2*difference
+
+            # Clip or round into the domain
+            if ga.gene_domain is not None:
+                value = ga.gene_domain.clip_gene(index, value)
+
             chromosome[index] = ga.make_gene(value)
 
 
@@ -142,3 +169,47 @@ class Individual:
 
             # Put segments back together
             chromosome.gene_list = segments[0] + segments[1] + segments[2]
+
+
+        @_check_gene_mutation_rate
+        @_reset_fitness
+        @_loop_random_mutations
+        def insert_gene(ga, chromosome, index):
+            """Moves a random gene to a random index, shifting
+            only the genes between the two indexes."""
+
+            new_index = random.randrange(len(chromosome))
+
+            # Rotate the genes between the indexes
+            if index < new_index:
+                segment = chromosome[index:new_index+1]
+                chromosome[index:new_index+1] = segment[1:] + segment[:1]
+            elif new_index < index:
+                segment = chromosome[new_index:index+1]
+                chromosome[new_index:index+1] = segment[-1:] + segment[:-1]
+
+
+        @_check_gene_mutation_rate
+        @_reset_fitness
+        def invert_segment(ga, chromosome):
+            """Reverses the order of the genes between two random indexes."""
+
+            # Chromosome too short to mutate
+            if len(chromosome) < 2:
+                return
+
+            index_2 = random.randrange(1, len(chromosome)+1)
+            index_1 = random.randrange(index_2)
+
+            chromosome[index_1:index_2] = chromosome[index_1:index_2][::-1]
+
+
+    class Binary:
+        """Methods for mutating bit chromosomes using masks."""
+
+        @_check_gene_mutation_rate
+        @_reset_fitness
+        def flip_bits(ga, chromosome):
+            """Flips random bits, each with a probability of the gene
+            mutation rate, using XOR with a random mask."""
+            chromosome.flip(random_mask(len(chromosome), ga.gene_mutation_rate))
@@ -1,5 +1,7 @@
 import random
 
+import numpy as np
+
 # Import all parent decorators
 from decorators import _check_selection_probability, _check_positive_fitness, _ensure_sorted, _compute_parent_amount
 
@@ -67,14 +69,10 @@ class Rank:
         # Set the weights of each parent based on their rank.
         # Each chromosome is (1-selection_probability) times
         # more likely to become a parent than the next ranked.
-        weights = [
-            (1-ga.selection_probability) ** i
-            for i
-            in range(len(ga.population))
-        ]
+        weights = (1-ga.selection_probability) ** np.arange(len(ga.population))
 
         # Set the mating pool.
-        ga.population.mating_pool = random.choices(ga.population, weights, k = parent_amount)
+        ga.population.mating_pool = random.choices(ga.population, weights.tolist(), k = parent_amount)
 
 
     @_check_selection_probability
@@ -121,33 +119,19 @@ class Fitness:
         the ball falls is a randomly generated number between 0 and 1.
         """
 
-        # The sum of all the fitnessess in a population
-        fitness_sum = sum(
-            ga.get_chromosome_fitness(index)
-            for index
-            in range(len(ga.population))
-        )
-
-        # A list of ranges that represent the probability of a chromosome getting chosen
-        probability = [ga.selection_probability]
+        fitness_values = ga.get_all_fitness()
 
+        # An array of ranges that represent the probability of a chromosome getting chosen
         # The chance of being selected increases incrementally
-        for index in range(len(ga.population)):
-            probability.append(probability[-1]+ga.get_chromosome_fitness(index)/fitness_sum)
-
-        probability = probability[1:]
-
-        # Loops until it reaches a desired mating pool size
-        while len(ga.population.mating_pool) < parent_amount:
+        probability = ga.selection_probability + np.cumsum(fitness_values) / fitness_values.sum()
 
-            # Spin the roulette
-            rand_number = random.random()
+        # Spin the roulette until it reaches a desired mating pool size
+        spin_amount = parent_amount - len(ga.population.mating_pool)
+        rand_numbers = [random.random() for _ in range(spin_amount)]
 
-            # Find where the roulette landed.
-            for index in range(len(probability)):
-                if (probability[index] >= rand_number):
-                    ga.population.set_parent(index)
-                    break
+        # Find where the roulette landed.
+        for index in np.searchsorted(probability, rand_numbers).tolist():
+            ga.population.set_parent(index)
 
 
     @_check_selection_probability
@@ -160,37 +144,31 @@ class Fitness:
         weighted values to select parents and may produce duplicate parents.
         """
 
+        fitness_values = ga.get_all_fitness()
+
         # All fitnesses are the same, select randomly.
-        if ga.get_chromosome_fitness(-1) == ga.get_chromosome_fitness(0):
-            offset = 1-ga.get_chromosome_fitness(-1)
+        if fitness_values[-1] == fitness_values[0]:
+            offset = 1-fitness_values[-1]
 
         # Some chromosomes have negative fitness, shift them all into positives.
-        elif ga.get_chromosome_fitness(-1) < 0:
-            offset = -ga.get_chromosome_fitness(-1)
+        elif fitness_values[-1] < 0:
+            offset = -fitness_values[-1]
 
         # No change needed.
         else:
             offset = 0
 
         # Set the weights of each parent based on their fitness + offset.
-        weights = [
-            ga.get_chromosome_fitness(index) + offset
-            for index
-            in range(len(ga.population))
-        ]
+        weights = fitness_values + offset
 
-        inflation = sum(weights) * (1 - ga.selection_probability)
+        inflation = weights.sum() * (1 - ga.selection_probability)
 
         # Rescale and adjust using selection_probability so that
         #   if selection_probability is high, a low inflation is used,
         #     making selection mostly based on fitness.
         #   if selection_probability is low, a high offset is used,
         #     so everyone has a more equal chance.
-        weights = [
-            weight + inflation
-            for weight
-            in weights
-        ]
+        weights += inflation
 
         # Set the mating pool.
-        ga.population.mating_pool = random.choices(ga.population, weights, k = parent_amount)
+        ga.population.mating_pool = random.choices(ga.population, weights.tolist(), k = parent_amount)
@@ -0,0 +1,553 @@
+from itertools import chain
+
+import numpy as np
+
+from structure import Gene as make_gene
+from structure import Chromosome
+from structure import Population
+from structure.chromosome import Inexact_Fitness
+from structure.gene import to_hashable
+
+
+def infer_dtype(value_lists):
+    """Returns the NumPy dtype used to store the gene values.
+    Uses bool, int64, or float64 for numbers and object otherwise,
+    to avoid NumPy converting mixed values to strings."""
+
+    value_types = set(map(type, chain.from_iterable(value_lists)))
+
+    if value_types <= {bool}:
+        return bool
+    elif value_types <= {int}:
+        return np.int64
+    elif value_types <= {int, float}:
+        return np.float64
+    else:
+        return object
+
+
+def to_values(gene_list):
+    """Returns the gene values from an iterable of genes or values."""
+
+    if isinstance(gene_list, Array_Chromosome):
+        return gene_list.values
+
+    return [getattr(gene, 'value', gene) for gene in gene_list]
+
+
+class Array_Gene:
+    """Gene which views a value stored in an array chromosome.
+    Setting the value writes it into the chromosome.
+
+    Not a Gene subclass, so that adding it to another chromosome
+    copies the value instead of keeping the view.
+    """
+
+    __eq__   = make_gene.__eq__
+    __repr__ = make_gene.__repr__
+    __str__  = make_gene.__str__
+
+
+    def __init__(self, chromosome, index):
+        self.chromosome = chromosome
+        self.index = index
+
+
+    @property
+    def value(self):
+        chromosome = self.chromosome
+        return chromosome._store.item(chromosome._row, self.index)
+
+
+    @value.setter
+    def value(self, value):
+        self.chromosome[self.index] = value
+
+
+class Array_Chromosome(Chromosome):
+    """Chromosome storing its gene values in a row of a NumPy array,
+    usually shared with the rest of an Array_Population. The genes
+    are views created on access. The length can't be changed."""
+
+
+    def __init__(self, gene_list, dtype = None):
+        """Initialize the chromosome with a copy of the gene values
+        and fitness value of None."""
+
+        values = to_values(gene_list)
+
+        if dtype is None and not isinstance(values, np.ndarray):
+            dtype = infer_dtype([values])
+
+        self.previous_fitness = None
+        self.changes = None
+        self._inexact_fitness = None
+
+        # Own storage until attached to a population
+        self._store = np.array([values], dtype = dtype)
+        self._fitness_store = np.full(1, np.nan)
+        self._row = 0
+
+
+    @classmethod
+    def view(cls, store, fitness_store, row):
+        """Returns a new chromosome viewing the given row of the arrays."""
+
+        chromosome = cls.__new__(cls)
+        chromosome.previous_fitness = None
+        chromosome.changes = None
+        chromosome._inexact_fitness = None
+        chromosome._attach(store, fitness_store, row)
+        return chromosome
+
+
+    def _attach(self, store, fitness_store, row):
+        """Views the given row of the population's arrays."""
+
+        self._store = store
+        self._fitness_store = fitness_store
+        self._row = row
+
+
+    def _detach(self):
+        """Copies the row into its own storage."""
+
+        self._store = self._store[self._row : self._row+1].copy()
+        self._fitness_store = self._fitness_store[self._row : self._row+1].copy()
+        self._row = 0
+
+
+    @property
+    def values(self):
+        """Returns the gene values as a 1-D NumPy array view."""
+        return self._store[self._row]
+
+
+    @property
+    def fitness(self):
+        """Returns the fitness, stored as a float with NaN for None."""
+
+        fitness = self._fitness_store[self._row]
+
+        if np.isnan(fitness):
+            return None
+
+        # Keep an inexact fitness marked, unless the array was written since
+        if self._inexact_fitness == fitness:
+            return self._inexact_fitness
+
+        return fitness.item()
+
+
+    @fitness.setter
+    def fitness(self, fitness):
+        """Sets the fitness, stored as a float with NaN for None."""
+
+        self._fitness_store[self._row] = np.nan if fitness is None else fitness
+        self._inexact_fitness = fitness if isinstance(fitness, Inexact_Fitness) else None
+
+
+    @property
+    def gene_list(self):
+        """Returns a list of gene views."""
+        return [Array_Gene(self, index) for index in range(len(self))]
+
+
+    @gene_list.setter
+    def gene_list(self, gene_list):
+        """Replaces the gene values, which stops tracking changes."""
+
+        values = to_values(gene_list)
+
+        if len(values) != len(self):
+            raise ValueError("Array chromosomes can't change length.")
+
+        self.stop_tracking_changes()
+        self._modified()
+        self._store[self._row] = values
+
+
+    def recycle(self, gene_list):
+        """Reuses the chromosome for the new gene values
+        with fitness value of None."""
+
+        self.gene_list = gene_list
+        self.fitness = None
+
+
+    def _modified(self):
+        """Tells the populations indexing the chromosome
+        about the change, the hash isn't cached."""
+        self._outdate_indexing_populations()
+
+
+    @property
+    def gene_value_list(self):
+        """Returns a list of gene values"""
+        return self.values.tolist()
+
+
+    @property
+    def gene_value_iter(self):
+        """Returns an iterable of gene values"""
+        return iter(self.values.tolist())
+
+
+    #==================================================#
+    # Magic-Dunder Methods replicating list structure. #
+    #==================================================#
+
+
+    def __iter__(self):
+        """Loops through views of the genes."""
+        return (Array_Gene(self, index) for index in range(len(self)))
+
+
+    def __getitem__(self, index):
+        """
+        Allows the user to use
+                gene = chromosome[index]
+                chromosome_slice = chromosome[start:stop]
+        to get a view of the indexed gene, or a
+        new array chromosome for slices.
+        """
+
+        if isinstance(index, slice):
+            return Array_Chromosome(self.values[index])
+
+        # Wrap around negative indexes for the view
+        if not -len(self) <= index < len(self):
+            raise IndexError("chromosome index out of range")
+
+        return Array_Gene(self, index % len(self))
+
+
+    def __setitem__(self, index, gene):
+        """
+        Allows the user to use
+                chromosome[index] = gene
+        to set the indexed gene value.
+        """
+
+        self._modified()
+
+        # Single gene
+        if isinstance(index, (int, np.integer)):
+            if self.changes is not None:
+                self.changes.setdefault(index % len(self), self._store.item(self._row, index))
+            self._store[self._row, index] = getattr(gene, 'value', gene)
+
+        # Multiple genes
+        else:
+            values = to_values(gene)
+            if self.changes is not None:
+                indexes = range(*index.indices(len(self)))
+                if len(indexes) == len(values):
+                    for i in indexes:
+                        self.changes.setdefault(i, self._store.item(self._row, i))
+                else:
+                    self.stop_tracking_changes()
+            self._store[self._row, index] = values
+
+
+    def __len__(self):
+        """Returns the length of the chromosome."""
+        return self._store.shape[1]
+
+
+    def __eq__(self, chromosome):
+        """Returns self == chromosome, True if all genes match."""
+
+        if isinstance(chromosome, Array_Chromosome):
+            return np.array_equal(self.values, chromosome.values)
+
+        return self.gene_value_list == [gene.value for gene in chromosome]
+
+
+    def __hash__(self):
+        """Returns a hash of the gene values, computed each time
+        since the values may be written to the array directly."""
+        return hash(tuple(to_hashable(value) for value in self.values.tolist()))
+
+
+    def __add__(self, chromosome):
+        """Return self + chromosome, an array chromosome made by concatenating the genes."""
+        return Array_Chromosome(np.concatenate((self.values, np.asarray(to_values(chromosome)))))
+
+
+    def __radd__(self, gene_list):
+        """Return gene_list + self, a list of genes."""
+        return list(gene_list) + self.gene_list
+
+
+    def __getstate__(self):
+        """Pickles only the chromosome's own row."""
+
+        return {
+            'values'           : self.values.copy(),
+            'fitness'          : self.fitness,
+            'previous_fitness' : self.previous_fitness,
+            'changes'          : self.changes,
+        }
+
+
+    def __setstate__(self, state):
+        """Restores the chromosome with its own storage."""
+
+        self.__init__(state['values'])
+        self.fitness = state['fitness']
+        self.previous_fitness = state['previous_fitness']
+        self.changes = state['changes']
+
+
+    def _fixed_length(self, *args, **kwargs):
+        """Array chromosomes have a fixed length."""
+        raise TypeError("Array chromosomes can't change length.")
+
+
+    __delitem__ = __iadd__ = append = clear = insert = pop = remove = _fixed_length
+
+
+    def copy(self):
+        """Return a copy of the chromosome."""
+        return Array_Chromosome(self.values.copy())
+
+
+    def __repr__(self):
+        """Returns the representation of the gene values."""
+        return repr(self.gene_value_list)
+
+
+class Array_Population(Population):
+    """Population storing all gene values in one contiguous 2-D NumPy array
+    and all fitness values in a parallel 1-D float array, with NaN for None.
+    Chromosomes in the population are Array_Chromosome views of the rows.
+
+    The dtype is fixed when the population is made, so use dtype = float
+    if integer genes may become floats, e.g. with arithmetic crossover.
+
+    Values written to the arrays directly are not seen by the cached
+    hash index, so write through the chromosomes to keep "in" working.
+    """
+
+
+    # Set as an array instead of the Population property
+    fitness_values = None
+
+
+    def __init__(self, chromosome_list, dtype = None):
+        """Initialize the population with a copy of the chromosomes."""
+
+        # Copy only the gene values, like make_chromosome does
+        value_lists = [
+            chromosome.gene_value_list if isinstance(chromosome, Chromosome) else to_values(chromosome)
+            for chromosome
+            in chromosome_list
+        ]
+
+        if dtype is None:
+            dtype = infer_dtype(value_lists)
+
+        self.dtype = dtype
+        self.mating_pool = []
+        self.next_population = []
+        self._pack(value_lists)
+
+
+    def _pack(self, chromosome_list):
+        """Copies the chromosomes into newly allocated arrays
+        and makes the chromosomes views of their rows."""
+
+        chromosome_list = list(chromosome_list)
+        length = len(chromosome_list[0]) if len(chromosome_list) > 0 else 0
+
+        values, fitness_values = self._allocate(len(chromosome_list), length)
+        fitness_values[:] = np.nan
+        attached = set()
+
+        for row, chromosome in enumerate(chromosome_list):
+
+            # Copy the gene values and fitness
+            if isinstance(chromosome, Array_Chromosome):
+                values[row] = chromosome.values
+            elif isinstance(chromosome, Chromosome):
+                values[row] = chromosome.gene_value_list
+            else:
+                values[row] = to_values(chromosome)
+
+            fitness = getattr(chromosome, 'fitness', None)
+            if fitness is not None:
+                fitness_values[row] = fitness
+
+            # Chromosomes can only view one row
+            if not isinstance(chromosome, Array_Chromosome) or id(chromosome) in attached:
+                chromosome = Array_Chromosome.view(values, fitness_values, row)
+                chromosome_list[row] = chromosome
+
+            attached.add(id(chromosome))
+
+        for row, chromosome in enumerate(chromosome_list):
+            chromosome._attach(values, fitness_values, row)
+
+        self.values = values
+        self.fitness_values = fitness_values
+        self.chromosome_list = chromosome_list
+
+
+    def _allocate(self, rows, length):
+        """Returns new arrays for the gene values and fitness values."""
+        return np.empty((rows, length), dtype = self.dtype), np.empty(rows)
+
+
+    def update(self):
+        """Sets all the population variables to what they should be at
+        the end of the generation """
+        self._pack(self.next_population)
+        self.reset_mating_pool()
+        self.reset_next_population()
+
+
+    def remove_chromosome(self, index):
+        """Removes and returns a chromosome from the indicated index from the population"""
+        return self.pop(index)
+
+
+    def add_chromosome(self, chromosome, index = None):
+        """Adds a chromosome to the population at the input index,
+        defaulted to the end of the chromosome set"""
+
+        if index is None:
+            index = len(self)
+        self.insert(index, chromosome)
+
+
+    #==================================================#
+    # Magic-Dunder Methods replicating list structure. #
+    #==================================================#
+
+
+    def __setitem__(self, index, chromosome):
+        """
+        Allows the user to use
+                population[index] = chromosome
+        to copy the chromosome into the indexed row.
+        """
+
+        # Just one chromosome, written into its row
+        if isinstance(index, (int, np.integer)):
+            index %= len(self)
+
+            # Chromosomes can only view one row
+            if isinstance(chromosome, Array_Chromosome) and chromosome._store is self.values:
+                chromosome = chromosome.copy()
+            elif not isinstance(chromosome, Array_Chromosome):
+                chromosome = Array_Chromosome(chromosome, self.dtype)
+
+            fitness = chromosome.fitness
+            self._chromosome_list[index]._detach()
+            self.values[index] = chromosome.values
+            chromosome._attach(self.values, self.fitness_values, index)
+            chromosome.fitness = fitness
+            self._chromosome_list[index] = chromosome
+            self._modified()
+
+        # Multiple chromosomes
+        else:
+            chromosome_list = list(self._chromosome_list)
+            chromosome_list[index] = list(chromosome)
+            self._pack(chromosome_list)
+
+
+    def __delitem__(self, index):
+        """Deletes the indexed chromosomes."""
+
+        chromosome_list = list(self._chromosome_list)
+        del chromosome_list[index]
+        self._pack(chromosome_list)
+
+
+    def __add__(self, population):
+        """Returns self + population, a population made by concatenating the chromosomes."""
+        return Array_Population(chain(self, population), self.dtype)
+
+
+    def __iadd__(self, population):
+        """Implement self += population by concatenating the new chromosomes."""
+        self._pack(chain(self._chromosome_list, population))
+        return self
+
+
+    def append(self, chromosome):
+        """Append chromosome to the end of the population."""
+        self._pack(chain(self._chromosome_list, [chromosome]))
+
+
+    def clear(self):
+        """Remove all chromosomes from the population."""
+        self._pack([])
+
+
+    def copy(self):
+        """Return a copy of the population."""
+        return Array_Population(self, self.dtype)
+
+
+    def insert(self, index, chromosome):
+        """Insert chromosome so that self[index] == chromsome."""
+
+        chromosome_list = list(self._chromosome_list)
+        chromosome_list.insert(index, chromosome)
+        self._pack(chromosome_list)
+
+
+    def pop(self, index = -1):
+        """Remove and return chromosome at index (default last).
+
+        Raises IndexError if population is empty or index is out of range.
+        """
+
+        chromosome_list = list(self._chromosome_list)
+        chromosome = chromosome_list.pop(index)
+        self._pack(chromosome_list)
+        return chromosome
+
+
+    def ranking(self, reverse = False):
+        """Returns an array of the indexes of the chromosomes ordered
+        by fitness, lowest first or highest first if reversed, with
+        unevaluated chromosomes last and ties kept in order."""
+
+        return np.argsort(-self.fitness_values if reverse else self.fitness_values, kind = 'stable')
+
+
+    def sort_by_fitness(self, reverse = False):
+        """Sorts the population by the ranking, doing
+        nothing if it is already in order."""
+
+        fitness_values = -self.fitness_values if reverse else self.fitness_values
+
+        # Already sorted, including when there are no NaNs
+        if np.all(fitness_values[:-1] <= fitness_values[1:]):
+            return
+
+        order = np.argsort(fitness_values, kind = 'stable')
+
+        if np.any(order != np.arange(len(order))):
+            self._reorder(order)
+
+
+    def sort(self, *, key = lambda chromosome: chromosome.fitness, reverse):
+        """Sorts the population, reordering the rows in place."""
+
+        self._reorder(sorted(range(len(self)), key = lambda index: key(self._chromosome_list[index]), reverse = reverse))
+
+
+    def _reorder(self, order):
+        """Reorders the rows in place by the given indexes."""
+
+        self.values[:] = self.values[order]
+        self.fitness_values[:] = self.fitness_values[order]
+        self.chromosome_list = [self._chromosome_list[index] for index in order]
+
+        for row, chromosome in enumerate(self._chromosome_list):
+            chromosome._row = row
@@ -0,0 +1,361 @@
+import random
+
+from structure import Gene as make_gene
+from structure import Chromosome
+
+
+def popcount(bits):
+    """Returns the number of set bits."""
+    return bin(bits).count('1')
+
+
+def random_mask(length, probability = 0.5):
+    """Returns a random int with the given length in bits, with
+    each bit set independently with the given probability.
+
+    Uses the binary digits of the probability (to 32 digits) from the
+    least significant digit up, combining the mask with random words
+    using OR for a 1 digit and AND for a 0 digit.
+    """
+
+    digits = round(probability * 2**32)
+
+    # Probability of 0 or 1
+    if digits <= 0:
+        return 0
+    if digits >= 2**32:
+        return (1 << length) - 1
+
+    # Trailing 0 digits have no effect on a mask of 0s
+    digit_amount = 32
+    while digits % 2 == 0:
+        digits //= 2
+        digit_amount -= 1
+
+    mask = 0
+    for _ in range(digit_amount):
+        if digits % 2 == 1:
+            mask |= random.getrandbits(length)
+        else:
+            mask &= random.getrandbits(length)
+        digits //= 2
+
+    return mask
+
+
+def to_bit(gene):
+    """Returns the gene value as a bit."""
+
+    value = getattr(gene, 'value', gene)
+
+    if value not in (0, 1):
+        raise ValueError("Bit chromosome gene values must be 0 or 1.")
+
+    return int(value)
+
+
+def pack_bits(values):
+    """Returns an int with bit i set to the value at index i."""
+
+    bit_string = ''.join('1' if to_bit(value) else '0' for value in reversed(values))
+    return int(bit_string, 2) if bit_string else 0
+
+
+class Bit_Chromosome(Chromosome):
+    """Chromosome storing its genes as the bits of a Python int,
+    gene i being bit i, so each gene value takes 1 bit of memory.
+    Gene values must be 0 or 1.
+
+    Genes are created on access, so set the gene values
+    through the chromosome using chromosome[index] = value.
+    """
+
+
+    def __init__(self, gene_list):
+        """Initialize the chromosome with a copy of the bits
+        and fitness value of None."""
+
+        self.previous_fitness = None
+        self.changes = None
+        self._hash = None
+
+        if isinstance(gene_list, Bit_Chromosome):
+            self.bits = gene_list.bits
+            self.length = gene_list.length
+        else:
+            values = [to_bit(gene) for gene in gene_list]
+            self.bits = pack_bits(values)
+            self.length = len(values)
+
+        self.fitness = None
+
+
+    @classmethod
+    def from_bits(cls, bits, length):
+        """Returns a chromosome with the given bits and length."""
+
+        chromosome = cls(())
+        chromosome.bits = bits & ((1 << length) - 1)
+        chromosome.length = length
+        return chromosome
+
+
+    def track_changes_from(self, chromosome):
+        """Tracks the bits which differ from the given chromosome
+        so that the fitness can be computed from its fitness by
+        ga.delta_fitness_impl instead of a full evaluation."""
+
+        if not isinstance(chromosome, Bit_Chromosome):
+            return super().track_changes_from(chromosome)
+
+        # Changes can't be tracked
+        if chromosome.fitness is None or len(self) != len(chromosome):
+            self.stop_tracking_changes()
+            return
+
+        self.previous_fitness = chromosome.fitness
+        self.changes = {}
+
+        # Loop through the differing bits
+        difference = self.bits ^ chromosome.bits
+        while difference > 0:
+            index = (difference & -difference).bit_length() - 1
+            self.changes[index] = (chromosome.bits >> index) & 1
+            difference &= difference - 1
+
+
+    def flip(self, mask):
+        """Flips the bits set in the mask, tracking the changes."""
+
+        mask &= (1 << self.length) - 1
+
+        # Loop through the flipped bits
+        if self.changes is not None:
+            flipped = mask
+            while flipped > 0:
+                index = (flipped & -flipped).bit_length() - 1
+                self.changes.setdefault(index, (self.bits >> index) & 1)
+                flipped &= flipped - 1
+
+        self.bits ^= mask
+
+        self._modified()
+
+
+    @property
+    def gene_list(self):
+        """Returns a list of new genes."""
+        return [make_gene(value) for value in self.gene_value_list]
+
+
+    @gene_list.setter
+    def gene_list(self, gene_list):
+        """Replaces the bits, which stops tracking changes."""
+
+        values = [to_bit(gene) for gene in gene_list]
+
+        self.stop_tracking_changes()
+        self._modified()
+        self.bits = pack_bits(values)
+        self.length = len(values)
+
+
+    def recycle(self, gene_list):
+        """Reuses the chromosome for the new bits
+        with fitness value of None."""
+
+        if isinstance(gene_list, Bit_Chromosome):
+            self.stop_tracking_changes()
+            self._modified()
+            self.bits = gene_list.bits
+            self.length = gene_list.length
+        else:
+            self.gene_list = gene_list
+
+        self.fitness = None
+
+
+    @property
+    def gene_value_list(self):
+        """Returns a list of gene values"""
+
+        if self.length == 0:
+            return []
+
+        return [int(bit) for bit in reversed(format(self.bits, f'0{self.length}b'))]
+
+
+    @property
+    def gene_value_iter(self):
+        """Returns an iterable of gene values"""
+        return iter(self.gene_value_list)
+
+
+    def _edit_values(self, list_method, *args):
+        """Applies the list method to a list of the gene values,
+        then stores the new values and returns the result."""
+
+        values = self.gene_value_list
+        result = list_method(values, *args)
+        self.gene_list = values
+        return result
+
+
+    #==================================================#
+    # Magic-Dunder Methods replicating list structure. #
+    #==================================================#
+
+
+    def __iter__(self):
+        """Loops through new genes."""
+        return (make_gene(value) for value in self.gene_value_list)
+
+
+    def __getitem__(self, index):
+        """
+        Allows the user to use
+                gene = chromosome[index]
+                chromosome_slice = chromosome[start:stop]
+        to get a new gene, or a new bit chromosome for slices.
+        """
+
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+
+            # Shift and mask contiguous bits
+            if step == 1:
+                return type(self).from_bits(self.bits >> start, max(0, stop-start))
+
+            return type(self)(self.gene_value_list[index])
+
+        if not -self.length <= index < self.length:
+            raise IndexError("chromosome index out of range")
+
+        return make_gene((self.bits >> (index % self.length)) & 1)
+
+
+    def __setitem__(self, index, gene):
+        """
+        Allows the user to use
+                chromosome[index] = gene
+        to set the indexed gene value.
+        """
+
+        # Multiple genes
+        if isinstance(index, slice):
+            values = [to_bit(item) for item in gene]
+            indexes = range(*index.indices(self.length))
+
+            # Same length, set each bit
+            if len(indexes) == len(values):
+                for i, value in zip(indexes, values):
+                    self[i] = value
+
+            else:
+                self._edit_values(list.__setitem__, index, values)
+
+            return
+
+        if not -self.length <= index < self.length:
+            raise IndexError("chromosome index out of range")
+
+        index %= self.length
+        old_bit = (self.bits >> index) & 1
+
+        if to_bit(gene) != old_bit:
+            if self.changes is not None:
+                self.changes.setdefault(index, old_bit)
+            self.bits ^= 1 << index
+            self._modified()
+
+
+    def __delitem__(self, index):
+        """Deletes the indexed genes."""
+        self._edit_values(list.__delitem__, index)
+
+
+    def __len__(self):
+        """Returns the length of the chromosome."""
+        return self.length
+
+
+    def __eq__(self, chromosome):
+        """Returns self == chromosome, True if all genes match."""
+
+        if isinstance(chromosome, Bit_Chromosome):
+            return self.length == chromosome.length and self.bits == chromosome.bits
+
+        return self.gene_value_list == [gene.value for gene in chromosome]
+
+
+    __hash__ = Chromosome.__hash__
+
+
+    def __add__(self, chromosome):
+        """Return self + chromosome, a bit chromosome made by concatenating the genes."""
+
+        if not isinstance(chromosome, Bit_Chromosome):
+            chromosome = Bit_Chromosome(chromosome)
+
+        return type(self).from_bits(
+            self.bits | (chromosome.bits << self.length),
+            self.length + chromosome.length,
+        )
+
+
+    def __iadd__(self, chromosome):
+        """Implement self += chromosome by concatenating the new genes."""
+        self._edit_values(list.extend, [to_bit(gene) for gene in chromosome])
+        return self
+
+
+    def append(self, gene):
+        """Append gene to the end of the chromosome."""
+        self._edit_values(list.append, to_bit(gene))
+
+
+    def copy(self):
+        """Return a copy of the chromosome."""
+        chromosome = type(self).from_bits(self.bits, self.length)
+        chromosome._hash = self._hash
+        return chromosome
+
+
+    def count(self, gene):
+        """Return number of occurrences of the gene in the chromosome."""
+
+        value = getattr(gene, 'value', gene)
+        ones = popcount(self.bits)
+
+        if value == 1:
+            return ones
+        elif value == 0:
+            return self.length - ones
+        else:
+            return 0
+
+
+    def insert(self, index, gene):
+        """Insert gene so that self[index] == gene."""
+        self._edit_values(list.insert, index, to_bit(gene))
+
+
+    def pop(self, index = -1):
+        """Remove and return gene at index (default last).
+
+        Raises IndexError if chromosome is empty or index is out of range.
+        """
+        return make_gene(self._edit_values(list.pop, index))
+
+
+    def remove(self, gene):
+        """Remove first occurrence of gene.
+
+        Raises ValueError if the gene in not present.
+        """
+        self._edit_values(list.remove, getattr(gene, 'value', gene))
+
+
+    def __repr__(self):
+        """Returns the representation of the gene values."""
+        return repr(self.gene_value_list)
@@ -1,5 +1,17 @@
 from structure import Gene as make_gene
+from structure.gene import is_immutable, to_hashable
 from itertools import chain
+import weakref
+
+def copy_gene(gene):
+    """Copies the input to a gene, sharing genes with immutable values."""
+
+    if type(gene) is make_gene and is_immutable(gene.value):
+        gene.__dict__['_shared'] = True
+        return gene
+    else:
+        return make_gene(gene)
+
 
 def to_gene(gene):
     """Converts the input to a gene if it isn't already one."""
@@ -10,16 +22,121 @@ def to_gene(gene):
         return make_gene(gene)
 
 
+class Inexact_Fitness(float):
+    """Fitness value which is not the exact fitness of the chromosome,
+    e.g. one predicted by a surrogate model. Used like any other float,
+    but kept out of the fitness caches, the surrogate's archive, and
+    delta fitness evaluation."""
+
+    def __repr__(self):
+        return f"Inexact_Fitness({float(self)!r})"
+
+
+def is_exact(fitness):
+    """Returns if the fitness is set to an exact fitness value."""
+    return fitness is not None and not isinstance(fitness, Inexact_Fitness)
+
+
 class Chromosome():
 
+    # Weak references to the populations whose hash index
+    # includes the chromosome, by the id of the population
+    _indexing_populations = None
+
+
     def __init__(self, gene_list):
         """Initialize the chromosome with fitness value of None, and a
         set of genes dependent on user-passed parameter."""
 
-        self.gene_list = [make_gene(gene) for gene in gene_list]
+        # Fitness before the tracked changes and the old values of
+        # the changed genes by index, used for delta fitness evaluation
+        self.previous_fitness = None
+        self.changes = None
+
+        # Hash of the gene values, cached until the genes are changed
+        self._hash = None
+
+        # Genes with immutable values are shared with the input
+        self._gene_list = [copy_gene(gene) for gene in gene_list]
         self.fitness = None
 
 
+    @property
+    def gene_list(self):
+        """Returns the list of genes."""
+        return self._gene_list
+
+
+    @gene_list.setter
+    def gene_list(self, gene_list):
+        """Replaces the list of genes, which stops tracking changes."""
+        self.stop_tracking_changes()
+        self._modified()
+        self._gene_list = gene_list
+
+
+    def _modified(self):
+        """Clears the cached hash after the genes are changed."""
+        self._hash = None
+        self._outdate_indexing_populations()
+
+
+    def _indexed_by(self, population):
+        """Tells the population when the chromosome is changed,
+        so that it can rebuild its hash index."""
+
+        if self._indexing_populations is None:
+            self._indexing_populations = {}
+
+        self._indexing_populations[id(population)] = weakref.ref(population)
+
+
+    def _outdate_indexing_populations(self):
+        """Tells the populations indexing the chromosome that
+        it changed, after which they index it again."""
+
+        if self._indexing_populations is not None:
+            for reference in self._indexing_populations.values():
+                population = reference()
+                if population is not None:
+                    population._modified()
+            self._indexing_populations = None
+
+
+    def track_changes_from(self, chromosome):
+        """Tracks the genes which differ from the given chromosome
+        so that the fitness can be computed from its fitness by
+        ga.delta_fitness_impl instead of a full evaluation."""
+
+        # Changes can't be tracked
+        if chromosome.fitness is None or len(self) != len(chromosome):
+            self.stop_tracking_changes()
+            return
+
+        self.previous_fitness = chromosome.fitness
+        self.changes = {
+            index : gene.value
+            for index, (gene, new_gene)
+            in enumerate(zip(chromosome, self))
+            if gene != new_gene
+        }
+
+
+    def recycle(self, gene_list):
+        """Reuses the chromosome for a copy of the new genes
+        with fitness value of None, see Chromosome_Pool."""
+
+        self.gene_list = [copy_gene(gene) for gene in gene_list]
+        self.fitness = None
+
+
+    def stop_tracking_changes(self):
+        """Stops tracking changes, requiring a full fitness evaluation."""
+
+        self.previous_fitness = None
+        self.changes = None
+
+
     @property
     def gene_value_list(self):
         """Returns a list of gene values"""
@@ -59,9 +176,18 @@ class Chromosome():
         """
         Allows the user to use
                 gene = chromosome[index]
-        to get the indexed gene.
+        to get the indexed gene. A gene shared with other
+        chromosomes is copied first, so that assigning
+        its value only changes this chromosome.
         """
-        return self.gene_list[index]
+
+        gene = self.gene_list[index]
+
+        if isinstance(index, int) and gene._shared:
+            gene = make_gene(gene)
+            self._gene_list[index] = gene
+
+        return gene
 
 
     def __setitem__(self, index, gene):
@@ -71,13 +197,25 @@ class Chromosome():
         to set the indexed gene.
         """
 
+        self._modified()
+
         # Single gene
         if isinstance(index, int):
+            if self.changes is not None:
+                self.changes.setdefault(index % len(self), self.gene_list[index].value)
             self.gene_list[index] = to_gene(gene)
 
         # Multiple genes
         else:
-            self.gene_list[index] = [to_gene(item) for item in gene]
+            gene = [to_gene(item) for item in gene]
+            if self.changes is not None:
+                indexes = range(*index.indices(len(self)))
+                if len(indexes) == len(gene):
+                    for i in indexes:
+                        self.changes.setdefault(i, self.gene_list[i].value)
+                else:
+                    self.stop_tracking_changes()
+            self.gene_list[index] = gene
 
 
     def __delitem__(self, index):
@@ -86,6 +224,8 @@ class Chromosome():
                 del chromosome[index]
         to delete a gene at the specified index.
         """
+        self.stop_tracking_changes()
+        self._modified()
         del self.gene_list[index]
 
 
@@ -112,6 +252,29 @@ class Chromosome():
         return self.gene_list == chromosome.gene_list
 
 
+    def __hash__(self):
+        """
+        Allows the user to use
+                chromosome_set = {chromosome}
+                if chromosome in chromosome_set
+        using a hash of the gene values, cached until the chromosome
+        is changed. Gene values should not be changed in place while
+        the chromosome is in a set or dict.
+        """
+
+        if self._hash is None:
+            self._hash = hash(tuple(to_hashable(value) for value in self.gene_value_iter))
+
+        return self._hash
+
+
+    def __getstate__(self):
+        """Pickles the chromosome without the cached hash, since
+        string hashes differ between processes, or the populations
+        indexing it."""
+        return {**self.__dict__, '_hash' : None, '_indexing_populations' : None}
+
+
     def __add__(self, chromosome):
         """Return self + chromosome, a chromosome made by concatenating the genes."""
         return Chromosome(chain(self, chromosome))
@@ -119,11 +282,16 @@ class Chromosome():
 
     def __iadd__(self, chromosome):
         """Implement self += chromosome by concatenating the new genes."""
+        self.stop_tracking_changes()
+        self._modified()
         self.gene_list += (to_gene(gene) for gene in chromosome)
+        return self
 
 
     def append(self, gene):
         """Append gene to the end of the chromosome."""
+        self.stop_tracking_changes()
+        self._modified()
         self.gene_list.append(to_gene(gene))
 
 
@@ -134,7 +302,9 @@ class Chromosome():
 
     def copy(self):
         """Return a copy of the chromosome."""
-        return Chromosome(self)
+        chromosome = type(self)(self)
+        chromosome._hash = self._hash
+        return chromosome
 
 
     def count(self, gene):
@@ -182,6 +352,8 @@ class Chromosome():
 
     def insert(self, index, gene):
         """Insert gene so that self[index] == gene."""
+        self.stop_tracking_changes()
+        self._modified()
         self.gene_list.insert(index, to_gene(gene))
 
 
@@ -190,6 +362,8 @@ class Chromosome():
 
         Raises IndexError if chromosome is empty or index is out of range.
         """
+        self.stop_tracking_changes()
+        self._modified()
         return self.gene_list.pop(index)
 
 
@@ -198,6 +372,8 @@ class Chromosome():
 
         Raises ValueError if the gene in not present.
         """
+        self.stop_tracking_changes()
+        self._modified()
         self.gene_list.remove(to_gene(gene))
 
 
@@ -209,7 +385,7 @@ class Chromosome():
                 chromosome        = ga.make_chromosome(chromosome_data)
         to get a backend representation of the chromosome
         which can be evaluated directly as code to create
-        the chromosome.
+        the chromosome. Use structure.codec to save chromosomes.
         """
         return repr(self.gene_list)
 
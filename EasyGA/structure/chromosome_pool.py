@@ -0,0 +1,72 @@
+class Chromosome_Pool:
+    """Makes chromosomes like make_chromosome, but reuses the chromosomes
+    of the retiring generation instead of allocating new ones, so only
+    two generations of chromosomes are ever allocated. Use it through
+    ga.pool_chromosomes().
+
+    Chromosomes carried into the next population, such as survivors,
+    are shared objects and are never recycled. Other chromosomes should
+    not be kept after their generation retires, copy them instead.
+
+    The amount of chromosomes allocated and reused in each
+    generation is recorded in the history.
+    """
+
+
+    def __init__(self, make_chromosome):
+        """Initialize the pool with no free chromosomes."""
+
+        self.make_chromosome = make_chromosome
+        self.free_chromosomes = []
+
+        # Counts for the current generation,
+        # and (allocations, reuses) for past generations
+        self.allocations = 0
+        self.reuses = 0
+        self.history = []
+
+
+    def __call__(self, gene_list):
+        """Returns a chromosome with a copy of the genes,
+        reusing a free chromosome if there is one."""
+
+        if len(self.free_chromosomes) > 0:
+            chromosome = self.free_chromosomes.pop()
+            chromosome.recycle(gene_list)
+            self.reuses += 1
+
+        else:
+            chromosome = self.make_chromosome(gene_list)
+            self.allocations += 1
+
+        return chromosome
+
+
+    def release(self, population):
+        """Frees the chromosomes of the population which are not in
+        its next population, to be reused for the next offspring,
+        replacing the previously freed chromosomes, and
+        records the counts of the generation. Called before updating
+        the population."""
+
+        survivor_ids = {id(chromosome) for chromosome in population.next_population}
+
+        # Chromosomes may appear more than once, but must only be freed once
+        retired = {
+            id(chromosome) : chromosome
+            for chromosome
+            in population
+            if id(chromosome) not in survivor_ids
+        }
+
+        # Unused free chromosomes are dropped, keeping one spare generation
+        self.free_chromosomes = list(retired.values())
+
+        self.history.append((self.allocations, self.reuses))
+        self.allocations = 0
+        self.reuses = 0
+
+
+    def __getstate__(self):
+        """Pickles the pool without its free chromosomes."""
+        return {**self.__dict__, 'free_chromosomes' : []}
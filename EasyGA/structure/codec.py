@@ -0,0 +1,353 @@
+import lzma
+import math
+import pickle
+import struct
+import sys
+import zlib
+from array import array
+from itertools import chain
+
+import numpy as np
+
+from structure import Chromosome, Population
+from structure.array_population import Array_Chromosome, Array_Population
+from structure.bit_chromosome import Bit_Chromosome
+from structure.permutation_chromosome import Permutation_Chromosome
+from structure.shared_population import Shared_Population
+
+
+# Format of the encoded data, increased when the format changes
+VERSION = 1
+MAGIC = b'EGA'
+
+# Kinds of encoded objects
+CHROMOSOME_LIST = 0
+CHROMOSOME = 1
+POPULATION = 2
+
+# Codes of the supported compressions
+compressions = {
+    None   : (0, lambda data: data, lambda data: data),
+    'zlib' : (1, zlib.compress, zlib.decompress),
+    'lzma' : (2, lzma.compress, lzma.decompress),
+}
+
+# Codes of the supported types, subclasses are stored as their base type
+chromosome_types = [Chromosome, Bit_Chromosome, Permutation_Chromosome, Array_Chromosome]
+population_types = [Population, Array_Population, Shared_Population]
+
+
+#=================================#
+# Encoding and decoding sections: #
+#=================================#
+
+
+def _pack_array(values):
+    """Returns the bytes of the array in little-endian order."""
+
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+
+    return values.tobytes()
+
+
+def _unpack_array(typecode, data):
+    """Returns the array of the little-endian bytes."""
+
+    values = array(typecode)
+    values.frombytes(data)
+
+    if sys.byteorder == 'big':
+        values.byteswap()
+
+    return values
+
+
+class _Reader:
+    """Reads the sections of encoded data in order."""
+
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.offset = 0
+
+
+    def read(self, size):
+        """Returns the next bytes."""
+
+        if self.offset + size > len(self.data):
+            raise ValueError("Encoded data is truncated.")
+
+        chunk = self.data[self.offset : self.offset+size]
+        self.offset += size
+        return chunk
+
+
+    def unpack(self, format):
+        """Returns the next values packed with the struct format."""
+        return struct.unpack(format, self.read(struct.calcsize(format)))
+
+
+    def section(self):
+        """Returns the next length-prefixed bytes."""
+        return self.read(*self.unpack('<I'))
+
+
+def _section(data):
+    """Returns the bytes prefixed by their length."""
+    return struct.pack('<I', len(data)) + data
+
+
+#======================#
+# Encoding gene values: #
+#======================#
+
+
+def _int_typecode(values):
+    """Returns the smallest signed array typecode for the ints,
+    or None if they don't fit in 64 bits."""
+
+    if len(values) == 0:
+        return 'b'
+
+    low, high = min(values), max(values)
+
+    for typecode in 'bhiq':
+        bits = array(typecode).itemsize * 8
+        if -2**(bits-1) <= low and high < 2**(bits-1):
+            return typecode
+
+    return None
+
+
+def _encode_values(chromosome_list):
+    """Returns the kind of encoding and the bytes of the gene values,
+    packing bits, bools, ints, and floats into arrays and pickling
+    anything else with out-of-band buffers."""
+
+    # Bits of bit chromosomes
+    if all(type(chromosome) is Bit_Chromosome for chromosome in chromosome_list):
+        return b'B', b''.join(
+            chromosome.bits.to_bytes((len(chromosome)+7) // 8, 'little')
+            for chromosome
+            in chromosome_list
+        )
+
+    # Rows of array chromosomes
+    if len(chromosome_list) > 0 and all(isinstance(chromosome, Array_Chromosome) for chromosome in chromosome_list):
+        values = np.concatenate([chromosome.values for chromosome in chromosome_list])
+        if values.dtype.kind in 'biuf':
+            return b'N', _section(values.dtype.str.encode()) + values.astype(values.dtype.newbyteorder('<')).tobytes()
+
+    values = list(chain.from_iterable(chromosome.gene_value_iter for chromosome in chromosome_list))
+    value_types = set(map(type, values))
+
+    # Numbers of one type
+    if value_types <= {bool}:
+        return b'?', _pack_array(array('b', values))
+
+    elif value_types <= {int}:
+        typecode = _int_typecode(values)
+        if typecode is not None:
+            return typecode.encode(), _pack_array(array(typecode, values))
+
+    elif value_types <= {float}:
+        return b'd', _pack_array(array('d', values))
+
+    # Pickle anything else, with large buffers e.g. numpy arrays kept out-of-band
+    buffers = []
+    pickled = pickle.dumps(values, protocol = 5, buffer_callback = buffers.append)
+    return b'p', b''.join([
+        _section(pickled),
+        struct.pack('<I', len(buffers)),
+        *(_section(buffer.raw().tobytes()) for buffer in buffers),
+    ])
+
+
+def _decode_values(kind, reader, lengths):
+    """Returns the gene value list of each chromosome."""
+
+    # Bits of bit chromosomes, decoded as ints
+    if kind == 'B':
+        return [
+            int.from_bytes(reader.read((length+7) // 8), 'little')
+            for length
+            in lengths
+        ]
+
+    # NumPy array of the gene values
+    if kind == 'N':
+        dtype = np.dtype(bytes(reader.section()).decode())
+        total = sum(lengths)
+        values = np.frombuffer(reader.read(total * dtype.itemsize), dtype = dtype.newbyteorder('<')).astype(dtype)
+
+    # Array of numbers
+    elif kind in '?bhiqd':
+        typecode = 'b' if kind == '?' else kind
+        total = sum(lengths)
+        values = _unpack_array(typecode, reader.read(total * array(typecode).itemsize)).tolist()
+        if kind == '?':
+            values = [bool(value) for value in values]
+
+    # Pickled values
+    elif kind == 'p':
+        pickled = reader.section()
+        buffers = [bytearray(reader.section()) for _ in range(*reader.unpack('<I'))]
+        values = pickle.loads(pickled, buffers = buffers)
+
+    else:
+        raise ValueError(f"Unknown gene value encoding {kind!r}.")
+
+    # Split into each chromosome
+    value_lists = []
+    start = 0
+    for length in lengths:
+        value_lists.append(values[start : start+length])
+        start += length
+
+    return value_lists
+
+
+#========================================#
+# Encoding chromosomes and populations: #
+#========================================#
+
+
+def _type_code(obj, type_list):
+    """Returns the index of the most specific type of the object in the list."""
+
+    for index in reversed(range(len(type_list))):
+        if isinstance(obj, type_list[index]):
+            return index
+
+    raise TypeError(f"Can't encode objects of type {type(obj).__name__}.")
+
+
+def _encode_chromosomes(chromosome_list):
+    """Returns the bytes of the chromosomes' types, lengths, fitness values, and genes."""
+
+    chromosome_list = list(chromosome_list)
+
+    type_codes = array('B', (_type_code(chromosome, chromosome_types) for chromosome in chromosome_list))
+    lengths    = array('I', map(len, chromosome_list))
+    fitnesses  = array('d', (
+        float('nan') if chromosome.fitness is None else chromosome.fitness
+        for chromosome
+        in chromosome_list
+    ))
+
+    value_kind, values = _encode_values(chromosome_list)
+
+    return b''.join([
+        struct.pack('<I', len(chromosome_list)),
+        _pack_array(type_codes),
+        _pack_array(lengths),
+        _pack_array(fitnesses),
+        value_kind,
+        values,
+    ])
+
+
+def _decode_chromosomes(reader):
+    """Returns the list of decoded chromosomes."""
+
+    amount,    = reader.unpack('<I')
+    type_codes = _unpack_array('B', reader.read(amount))
+    lengths    = _unpack_array('I', reader.read(amount * array('I').itemsize))
+    fitnesses  = _unpack_array('d', reader.read(amount * 8))
+    value_kind = bytes(reader.read(1)).decode()
+
+    value_lists = _decode_values(value_kind, reader, lengths)
+
+    chromosome_list = []
+
+    for type_code, length, fitness, values in zip(type_codes, lengths, fitnesses, value_lists):
+        make_chromosome = chromosome_types[type_code]
+
+        if value_kind == 'B':
+            chromosome = Bit_Chromosome.from_bits(values, length)
+        elif value_kind == 'N':
+            chromosome = make_chromosome(values, values.dtype)
+        else:
+            chromosome = make_chromosome(values)
+
+        chromosome.fitness = None if math.isnan(fitness) else fitness
+        chromosome_list.append(chromosome)
+
+    return chromosome_list
+
+
+def dumps(obj, compression = None):
+    """Returns the chromosome, population, or list of chromosomes encoded
+    as bytes, optionally compressed using 'zlib' or 'lzma'. Numeric gene
+    values are packed into arrays and other values are pickled.
+
+    Only the gene values and fitness values are kept. Chromosomes and
+    populations are decoded as the built-in type they are based on.
+    """
+
+    if compression not in compressions:
+        raise ValueError(f"Unknown compression {compression!r}, use one of {list(compressions)}.")
+
+    if isinstance(obj, Chromosome):
+        kind, body = CHROMOSOME, _encode_chromosomes([obj])
+
+    elif isinstance(obj, Population):
+        dtype = getattr(obj, 'dtype', None)
+        kind, body = POPULATION, b''.join([
+            struct.pack('<B', _type_code(obj, population_types)),
+            _section(b'' if dtype is None else np.dtype(dtype).str.encode()),
+            _encode_chromosomes(obj),
+        ])
+
+    else:
+        kind, body = CHROMOSOME_LIST, _encode_chromosomes(obj)
+
+    compression_code, compress, _ = compressions[compression]
+
+    return MAGIC + struct.pack('<BBB', VERSION, compression_code, kind) + compress(body)
+
+
+def loads(data):
+    """Returns the chromosome, population, or list
+    of chromosomes decoded from the bytes."""
+
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Data is not an encoded chromosome or population.")
+
+    version, compression_code, kind = struct.unpack('<BBB', data[len(MAGIC) : len(MAGIC)+3])
+
+    if version > VERSION:
+        raise ValueError(f"Data was encoded by a newer format, version {version}.")
+
+    for code, _, decompress in compressions.values():
+        if code == compression_code:
+            break
+    else:
+        raise ValueError(f"Unknown compression code {compression_code}.")
+
+    reader = _Reader(decompress(data[len(MAGIC)+3:]))
+
+    if kind == CHROMOSOME:
+        return _decode_chromosomes(reader)[0]
+
+    elif kind == POPULATION:
+        make_population, = reader.unpack('<B')
+        make_population = population_types[make_population]
+        dtype = bytes(reader.section()).decode() or None
+        chromosome_list = _decode_chromosomes(reader)
+
+        # Array populations copy the chromosomes into their arrays,
+        # otherwise use the decoded chromosomes instead of copying them
+        if make_population is not Population:
+            return make_population(chromosome_list, dtype)
+
+        population = Population([])
+        population.chromosome_list = chromosome_list
+        return population
+
+    elif kind == CHROMOSOME_LIST:
+        return _decode_chromosomes(reader)
+
+    raise ValueError(f"Unknown kind of encoded object {kind}.")
@@ -0,0 +1,215 @@
+import math
+import random
+
+import numpy as np
+
+
+def generator():
+    """Returns a NumPy random generator seeded from the random module,
+    so that random.seed also makes bulk generation reproducible."""
+    return np.random.default_rng(random.getrandbits(64))
+
+
+class Domain:
+    """Values a gene can take, used to generate genes in bulk and to
+    clip or round the values made by crossover and mutation.
+
+    Subclasses define the dtype and
+
+            sample(amount)      NumPy array of random values
+            random_value()      a single random value
+            clip(values)        NumPy array of the values clipped into the domain
+            clip_value(value)   a single value clipped into the domain
+
+    The same domain is used for every gene of the chromosome.
+    """
+
+    dtype = object
+
+
+    def sample_chromosomes(self, amount, length):
+        """Returns a 2-D array of random gene values with
+        a row for each of the amount of chromosomes."""
+        return self.sample(amount * length).reshape(amount, length)
+
+
+    def sample_gene(self, index):
+        """Returns a random value for the indexed gene."""
+        return self.random_value()
+
+
+    def clip_chromosome(self, values):
+        """Returns a list of the gene values clipped into the domain."""
+        return self.clip(values).tolist()
+
+
+    def clip_gene(self, index, value):
+        """Returns the value clipped into the domain of the indexed gene."""
+        return self.clip_value(value)
+
+
+class Int_Range(Domain):
+    """Integers from low to high, including both ends.
+    Clipping randomly rounds to a nearby integer with
+    higher probability the closer it is to that integer."""
+
+    dtype = np.int64
+
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+
+    def sample(self, amount):
+        return generator().integers(self.low, self.high, size = amount, endpoint = True)
+
+
+    def random_value(self):
+        return random.randint(self.low, self.high)
+
+
+    def clip(self, values):
+        values = np.asarray(values, dtype = float)
+        values = np.floor(values + generator().random(values.shape))
+        return np.clip(values, self.low, self.high).astype(np.int64)
+
+
+    def clip_value(self, value):
+        return min(max(math.floor(value + random.random()), self.low), self.high)
+
+
+class Float_Interval(Domain):
+    """Floats from low to high."""
+
+    dtype = np.float64
+
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+
+    def sample(self, amount):
+        return generator().uniform(self.low, self.high, size = amount)
+
+
+    def random_value(self):
+        return random.uniform(self.low, self.high)
+
+
+    def clip(self, values):
+        return np.clip(np.asarray(values, dtype = float), self.low, self.high)
+
+
+    def clip_value(self, value):
+        return min(max(float(value), self.low), self.high)
+
+
+class Boolean(Domain):
+    """True or False. Clipping treats numbers as the probability of
+    being True, e.g. the average of True and False becomes either."""
+
+    dtype = bool
+
+
+    def sample(self, amount):
+        return generator().random(amount) < 0.5
+
+
+    def random_value(self):
+        return random.random() < 0.5
+
+
+    def clip(self, values):
+        values = np.clip(np.asarray(values, dtype = float), 0, 1)
+        return generator().random(values.shape) < values
+
+
+    def clip_value(self, value):
+        return random.random() < value
+
+
+class Categorical(Domain):
+    """Any of the given hashable values.
+    Clipping replaces other values with random categories."""
+
+
+    def __init__(self, values):
+        self.values = list(values)
+        self.value_set = set(self.values)
+
+        # Store numbers compactly, otherwise as objects
+        value_types = set(map(type, self.values))
+        if value_types <= {bool}:
+            self.dtype = bool
+        elif value_types <= {int}:
+            self.dtype = np.int64
+        elif value_types <= {int, float}:
+            self.dtype = np.float64
+
+
+    def sample(self, amount):
+        values = np.empty(len(self.values), dtype = self.dtype)
+        values[:] = self.values
+        return values[generator().integers(len(self.values), size = amount)]
+
+
+    def random_value(self):
+        return random.choice(self.values)
+
+
+    def clip(self, values):
+        clipped_values = np.empty(len(values), dtype = self.dtype)
+        clipped_values[:] = [self.clip_value(value) for value in values]
+        return clipped_values
+
+
+    def clip_value(self, value):
+        return value if value in self.value_set else self.random_value()
+
+
+class Schema(Domain):
+    """Domain of each gene by index, for chromosomes mixing different
+    types of genes. The chromosome length must match the schema.
+    Mixed types of genes are stored as objects."""
+
+
+    def __init__(self, domains):
+        self.domains = list(domains)
+
+        dtypes = {domain.dtype for domain in self.domains}
+        self.dtype = dtypes.pop() if len(dtypes) == 1 else object
+
+
+    def __len__(self):
+        return len(self.domains)
+
+
+    def sample_chromosomes(self, amount, length):
+        """Returns a 2-D array of random gene values with
+        a row for each of the amount of chromosomes."""
+
+        if length != len(self):
+            raise ValueError("The chromosome length must match the length of the schema.")
+
+        values = np.empty((amount, length), dtype = self.dtype)
+        for index, domain in enumerate(self.domains):
+            values[:, index] = domain.sample(amount)
+
+        return values
+
+
+    def sample_gene(self, index):
+        """Returns a random value for the indexed gene."""
+        return self.domains[index].random_value()
+
+
+    def clip_chromosome(self, values):
+        """Returns a list of the gene values clipped into their domains."""
+        return [domain.clip_value(value) for domain, value in zip(self.domains, values)]
+
+
+    def clip_gene(self, index, value):
+        """Returns the value clipped into the domain of the indexed gene."""
+        return self.domains[index].clip_value(value)
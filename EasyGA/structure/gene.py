@@ -1,22 +1,95 @@
 from copy import deepcopy
 
+# Types whose values can't be changed in place
+immutable_types = {int, float, complex, bool, str, bytes, type(None), range}
+
+
+def is_immutable(value):
+    """Returns True if the value can't be changed in place,
+    meaning it can be shared instead of copied."""
+
+    value_type = type(value)
+
+    if value_type in immutable_types:
+        return True
+    elif value_type is tuple:
+        return all(map(is_immutable, value))
+    else:
+        return False
+
+
+def to_hashable(value):
+    """Converts a gene value to a hashable form, e.g. lists to tuples."""
+
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        pass
+
+    if isinstance(value, (list, tuple)):
+        return tuple(to_hashable(item) for item in value)
+
+    if isinstance(value, (set, frozenset)):
+        return frozenset(to_hashable(item) for item in value)
+
+    if isinstance(value, dict):
+        return frozenset((key, to_hashable(item)) for key, item in value.items())
+
+    # Fall back onto the representation of the value
+    return repr(value)
+
+
 class Gene:
+    """Gene storing a single value.
+
+    Genes with immutable values are shared between chromosomes instead
+    of being copied, and are then marked as shared. A shared gene is
+    copied by chromosome[index] before it is returned, so both
+            chromosome[index] = value
+            chromosome[index].value = value
+    only change that chromosome. Assigning the value of a gene which is
+    still shared, e.g. one reached by iterating over a chromosome,
+    raises an AttributeError instead of changing every chromosome.
+
+    Like other changes made to values in place, assigning the value of
+    a gene isn't seen by the chromosome's cached hash, so use
+    chromosome[index] = value for chromosomes in a set or population.
+    """
+
+    # If the gene may be used by more than one chromosome
+    _shared = False
+
 
     def __init__(self, value):
         """Initialize a gene with the input value."""
 
         # Copy another gene
         try:
-            self.value = deepcopy(value.value)
+            value = value.value
 
         # Otherwise copy the given value
-        except:
-            self.value = deepcopy(value)
+        except AttributeError:
+            pass
+
+        # Only mutable values need to be copied
+        # Set directly in the __dict__ since new genes aren't shared
+        self.__dict__['value'] = value if is_immutable(value) else deepcopy(value)
+
+
+    def __setattr__(self, name, value):
+        """Prevents the value from being assigned while
+        the gene is shared between chromosomes."""
+
+        if name == 'value' and self._shared:
+            raise AttributeError("Gene is shared between chromosomes, set the value using chromosome[index] = value instead.")
+
+        super().__setattr__(name, value)
 
 
     def __eq__(self, other_gene):
         """Comparing two genes by their value."""
-        return self.value == Gene(other_gene).value
+        return self.value == getattr(other_gene, 'value', other_gene)
 
 
     def __repr__(self):
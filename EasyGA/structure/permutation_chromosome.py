@@ -0,0 +1,158 @@
+from structure import Chromosome
+from structure.gene import to_hashable
+from structure.chromosome import to_gene
+
+
+def position_index(values):
+    """Returns a dict mapping each value to its index."""
+    return {to_hashable(value) : index for index, value in enumerate(values)}
+
+
+class Permutation_Chromosome(Chromosome):
+    """Chromosome of unique gene values which keeps an inverse index of
+    the position of each gene value, so that finding a gene takes O(1)
+    time. Setting genes through the chromosome keeps the index in sync,
+    but values may be repeated while genes are being swapped around.
+    """
+
+
+    def __init__(self, gene_list):
+        """Initialize the chromosome with fitness value of None,
+        a set of unique genes, and the index of their positions."""
+
+        super().__init__(gene_list)
+        self._index_positions()
+
+
+    def _index_positions(self):
+        """Rebuilds the index of the gene positions."""
+
+        self.positions = position_index(self.gene_value_iter)
+
+        if len(self.positions) != len(self):
+            raise ValueError("Permutation chromosome gene values must be unique.")
+
+
+    @property
+    def gene_list(self):
+        """Returns the list of genes."""
+        return self._gene_list
+
+
+    @gene_list.setter
+    def gene_list(self, gene_list):
+        """Replaces the list of genes, which stops tracking changes."""
+        Chromosome.gene_list.fset(self, gene_list)
+        self._index_positions()
+
+
+    def _set_gene(self, index, gene):
+        """Sets the gene at the non-negative index, keeping
+        the position index in sync and tracking the change."""
+
+        old_key = to_hashable(self._gene_list[index].value)
+
+        if self.changes is not None:
+            self.changes.setdefault(index, self._gene_list[index].value)
+
+        # The old value may have already been moved elsewhere
+        if self.positions.get(old_key) == index:
+            del self.positions[old_key]
+
+        self._gene_list[index] = gene
+        self.positions[to_hashable(gene.value)] = index
+
+
+    #==================================================#
+    # Magic-Dunder Methods replicating list structure. #
+    #==================================================#
+
+
+    def __setitem__(self, index, gene):
+        """
+        Allows the user to use
+                chromosome[index] = gene
+        to set the indexed gene.
+        """
+
+        self._modified()
+
+        # Single gene
+        if isinstance(index, int):
+            if not -len(self) <= index < len(self):
+                raise IndexError("chromosome index out of range")
+            self._set_gene(index % len(self), to_gene(gene))
+            return
+
+        # Multiple genes
+        gene_list = [to_gene(item) for item in gene]
+        indexes = range(*index.indices(len(self)))
+
+        # Same length, set each gene
+        if len(indexes) == len(gene_list):
+            for i, gene in zip(indexes, gene_list):
+                self._set_gene(i, gene)
+
+        # Changes length, stop tracking changes and reindex
+        else:
+            self.stop_tracking_changes()
+            self._gene_list[index] = gene_list
+            self._index_positions()
+
+
+    def __delitem__(self, index):
+        """Deletes the indexed genes."""
+        super().__delitem__(index)
+        self._index_positions()
+
+
+    def __contains__(self, gene):
+        """Returns if the gene is in the chromosome in O(1) time."""
+        return to_hashable(getattr(gene, 'value', gene)) in self.positions
+
+
+    def append(self, gene):
+        """Append gene to the end of the chromosome."""
+        super().append(gene)
+        self._index_positions()
+
+
+    def count(self, gene):
+        """Return number of occurrences of the gene in the chromosome."""
+        return int(gene in self)
+
+
+    def index(self, gene, guess = None):
+        """Returns the index of the gene in O(1) time.
+        The guess is ignored since gene values are unique."""
+
+        index = self.positions.get(to_hashable(getattr(gene, 'value', gene)))
+
+        if index is None:
+            raise ValueError("No such gene in the chromosome found")
+
+        return index
+
+
+    def insert(self, index, gene):
+        """Insert gene so that self[index] == gene."""
+        super().insert(index, gene)
+        self._index_positions()
+
+
+    def pop(self, index = -1):
+        """Remove and return gene at index (default last).
+
+        Raises IndexError if chromosome is empty or index is out of range.
+        """
+        gene = super().pop(index)
+        self._index_positions()
+        return gene
+
+
+    def remove(self, gene):
+        """Remove first occurrence of gene.
+
+        Raises ValueError if the gene in not present.
+        """
+        self.pop(self.index(gene))
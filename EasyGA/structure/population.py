@@ -1,6 +1,8 @@
 from structure import Chromosome as make_chromosome
 from itertools import chain
 
+import numpy as np
+
 def to_chromosome(chromosome):
     """Converts the input to a chromosome if it isn't already one."""
 
@@ -12,11 +14,24 @@ def to_chromosome(chromosome):
 
 class Population:
 
+    # Number of changes made to the population or its chromosomes, and
+    # the index of the chromosome hashes along with the version it was
+    # made from
+    _version = 0
+    _hash_index = None
+    _indexed_version = None
+
+
     def __init__(self, chromosome_list):
         """Initialize the population with a collection
         of chromosomes dependant on user-passed parameter."""
 
-        self.chromosome_list = [make_chromosome(chromosome) for chromosome in chromosome_list]
+        # Copy chromosomes using their own type
+        self.chromosome_list = [
+            chromosome.copy() if isinstance(chromosome, make_chromosome) else make_chromosome(chromosome)
+            for chromosome
+            in chromosome_list
+        ]
         self.mating_pool = []
         self.next_population = []
 
@@ -41,7 +56,8 @@ class Population:
 
     def remove_chromosome(self, index):
         """Removes and returns a chromosome from the indicated index from the population"""
-        return self.chromosome_list.pop(index)
+        self._modified()
+        return self._chromosome_list.pop(index)
 
 
     def remove_parent(self, index):
@@ -70,7 +86,8 @@ class Population:
 
         if index is None:
             index = len(self)
-        self.chromosome_list.insert(index, to_chromosome(chromosome))
+        self._modified()
+        self._chromosome_list.insert(index, to_chromosome(chromosome))
 
 
     def add_parent(self, chromosome):
@@ -88,6 +105,114 @@ class Population:
         self.add_parent(self[index])
 
 
+    def _modified(self):
+        """Counts the change so the hash index is rebuilt."""
+        self._version += 1
+
+
+    @property
+    def chromosome_list(self):
+        """Returns the list of chromosomes. The list may be changed
+        in place, so the hash index is rebuilt after it is used."""
+
+        self._modified()
+        return self._chromosome_list
+
+
+    @chromosome_list.setter
+    def chromosome_list(self, chromosome_list):
+        """Replaces the list of chromosomes."""
+
+        self._modified()
+        self._chromosome_list = chromosome_list
+
+
+    @property
+    def fitness_values(self):
+        """Returns a float array of the fitness values, with NaN for None."""
+
+        return np.array([
+            np.nan if chromosome.fitness is None else chromosome.fitness
+            for chromosome
+            in self._chromosome_list
+        ], dtype = float)
+
+
+    def _fitness_key(self, reverse):
+        """Returns the sort key for the fitness, moving
+        unevaluated chromosomes to the end."""
+
+        missing = float('-inf') if reverse else float('inf')
+        return lambda chromosome: missing if chromosome.fitness is None else chromosome.fitness
+
+
+    def ranking(self, reverse = False):
+        """Returns an array of the indexes of the chromosomes ordered
+        by fitness, lowest first or highest first if reversed, with
+        unevaluated chromosomes last and ties kept in order."""
+
+        key = self._fitness_key(reverse)
+        chromosome_list = self._chromosome_list
+        return np.array(sorted(
+            range(len(chromosome_list)),
+            key = lambda index: key(chromosome_list[index]),
+            reverse = reverse,
+        ), dtype = int)
+
+
+    def sort_by_fitness(self, reverse = False):
+        """Sorts the population by the ranking. The fitness values are
+        spread across the chromosomes, so the list is sorted directly,
+        which takes linear time if it is already in order."""
+
+        self.sort(key = self._fitness_key(reverse), reverse = reverse)
+
+
+    @property
+    def hash_index(self):
+        """Returns a dict mapping the hash of each chromosome to a list
+        of its indexes in the population. The index is cached until a
+        chromosome or the population is changed."""
+
+        if self._indexed_version != self._version:
+            hash_index = {}
+            for index, chromosome in enumerate(self._chromosome_list):
+                hash_index.setdefault(hash(chromosome), []).append(index)
+
+                # Rebuild the index if the chromosome is changed
+                chromosome._indexed_by(self)
+
+            self._hash_index = hash_index
+            self._indexed_version = self._version
+
+        return self._hash_index
+
+
+    def _matching_indexes(self, chromosome):
+        """Returns the indexes of the chromosomes equal to the input."""
+
+        chromosome = to_chromosome(chromosome)
+
+        return [
+            index
+            for index
+            in self.hash_index.get(hash(chromosome), [])
+            if self._chromosome_list[index] == chromosome
+        ]
+
+
+    def __getstate__(self):
+        """Pickles the population without the hash index,
+        since string hashes differ between processes."""
+
+        state = dict(self.__dict__)
+
+        for name in ('_hash_index', '_indexed_version'):
+            state.pop(name, None)
+
+        return state
+
+
     #==================================================#
     # Magic-Dunder Methods replicating list structure. #
     #==================================================#
@@ -104,7 +229,7 @@ class Population:
 
         to loop through the population.
         """
-        return iter(self.chromosome_list)
+        return iter(self._chromosome_list)
 
 
     def __getitem__(self, index):
@@ -113,7 +238,7 @@ class Population:
                 chromosome = population[index]
         to get the indexed chromosome.
         """
-        return self.chromosome_list[index]
+        return self._chromosome_list[index]
 
 
     def __setitem__(self, index, chromosome):
@@ -123,13 +248,15 @@ class Population:
         to set the indexed chromosome.
         """
 
+        self._modified()
+
         # Just one chromosome
         if isinstance(index, int):
-            self.chromosome_list[index] = to_chromosome(chromosome)
+            self._chromosome_list[index] = to_chromosome(chromosome)
 
         # Multiple chromosomes
         else:
-            self.chromosome_list[index] = [to_chromosome(item) for item in chromosome]
+            self._chromosome_list[index] = [to_chromosome(item) for item in chromosome]
 
 
     def __delitem__(self, index):
@@ -138,7 +265,8 @@ class Population:
                 del population[index]
         to delete a chromosome at the specified index.
         """
-        del self.chromosome_list[index]
+        self._modified()
+        del self._chromosome_list[index]
 
 
     def __len__(self):
@@ -147,7 +275,7 @@ class Population:
                 size = len(population)
         to get the length of the population.
         """
-        return len(self.chromosome_list)
+        return len(self._chromosome_list)
 
 
     def __contains__(self, chromosome):
@@ -156,12 +284,12 @@ class Population:
                 if chromosome in population
         to check if a chromosome is in the population.
         """
-        return (to_chromosome(chromosome) in self.chromosome_list)
+        return len(self._matching_indexes(chromosome)) > 0
 
 
     def __eq__(self, population):
         """Returns self == population, True if all chromosomes match."""
-        return self.chromosome_list == population.chromosome_list
+        return self._chromosome_list == population._chromosome_list
 
 
     def __add__(self, population):
@@ -171,12 +299,15 @@ class Population:
 
     def __iadd__(self, population):
         """Implement self += population by concatenating the new chromosomes."""
-        self.chromosome_list += (to_chromosome(chromosome) for chromosome in population)
+        self._modified()
+        self._chromosome_list += (to_chromosome(chromosome) for chromosome in population)
+        return self
 
 
     def append(self, chromosome):
         """Append chromosome to the end of the population."""
-        self.chromosome_list.append(to_chromosome(chromosome))
+        self._modified()
+        self._chromosome_list.append(to_chromosome(chromosome))
 
 
     def clear(self):
@@ -191,7 +322,7 @@ class Population:
 
     def count(self, chromosome):
         """Return number of occurrences of the chromosome in the population."""
-        return self.chromosome_list.count(to_chromosome(chromosome))
+        return len(self._matching_indexes(chromosome))
 
 
     def index(self, chromosome, guess = None):
@@ -205,35 +336,35 @@ class Population:
         If a guess is given, it finds index of the nearest match.
         """
 
-        chromosome = to_chromosome(chromosome)
+        index_list = self._matching_indexes(chromosome)
+
+        # Chromosome not found, raising ValueError
+        # like list.index unless a guess is given
+        if len(index_list) == 0:
+            if guess is None:
+                raise ValueError("No such chromosome in the population found")
+            raise IndexError("No such chromosome in the population found")
 
-        # Use built-in method
+        # First match
         if guess is None:
-            return self.chromosome_list.index(chromosome)
+            return index_list[0]
 
-        # Use symmetric mod
         guess %= len(self)
-        if guess >= len(self)//2:
-            guess -= len(self)
-
-        # Search outwards for the chromosome
-        for i in range(len(self)//2):
 
-            # Search to the left
-            if chromosome == self[guess-i]:
-                return (guess-i) % len(self)
-
-            # Search to the right
-            elif chromosome == self[guess+i]:
-                return (guess+i) % len(self)
-
-        # Chromosome not found
-        raise IndexError("No such chromosome in the population found")
+        # Nearest match, searching outwards from the guess to the left first
+        return min(
+            index_list,
+            key = lambda index: min(
+                ((guess-index) % len(self), 0),
+                ((index-guess) % len(self), 1),
+            )
+        )
 
 
     def insert(self, index, chromosome):
         """Insert chromosome so that self[index] == chromsome."""
-        self.chromosome_list.insert(index, to_chromosome(chromosome))
+        self._modified()
+        self._chromosome_list.insert(index, to_chromosome(chromosome))
 
 
     def pop(self, index = -1):
@@ -241,7 +372,8 @@ class Population:
 
         Raises IndexError if population is empty or index is out of range.
         """
-        return self.chromosome_list.pop(index)
+        self._modified()
+        return self._chromosome_list.pop(index)
 
 
     def remove(self, chromosome):
@@ -249,12 +381,19 @@ class Population:
 
         Raises ValueError if the chromosome is not present.
         """
-        self.chromosome_list.remove(to_chromosome(chromosome))
+
+        index_list = self._matching_indexes(chromosome)
+
+        if len(index_list) == 0:
+            raise ValueError("No such chromosome in the population found")
+
+        self.pop(index_list[0])
 
 
     def sort(self, *, key = lambda chromosome: chromosome.fitness, reverse):
         """Sorts the population."""
-        self.chromosome_list.sort(
+        self._modified()
+        self._chromosome_list.sort(
             key = key,
             reverse = reverse
         )
@@ -268,9 +407,9 @@ class Population:
                 population        = ga.make_population(population_data)
         to get a backend representation of the population
         which can be evaluated directly as code to create
-        the population.
+        the population. Use structure.codec to save populations.
         """
-        return repr(self.chromosome_list)
+        return repr(self._chromosome_list)
 
 
     def __str__(self):
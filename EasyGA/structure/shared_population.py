@@ -0,0 +1,170 @@
+import weakref
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from structure.array_population import Array_Population
+
+
+def create_shared_array(shape, dtype):
+    """Returns a new shared memory block and an array using it."""
+
+    dtype = np.dtype(dtype)
+    size = max(1, int(np.prod(shape)) * dtype.itemsize)
+    block = shared_memory.SharedMemory(create = True, size = size)
+    return block, np.ndarray(shape, dtype = dtype, buffer = block.buf)
+
+
+def unlink_blocks(blocks):
+    """Frees the names of the shared memory blocks. The memory is
+    released once every process stops using it."""
+
+    for block in blocks:
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# Shared memory blocks attached in this process by name,
+# closing the least recently used ones after a few are open.
+_attached_blocks = OrderedDict()
+
+
+def attach_shared_array(name, shape, dtype):
+    """Returns an array using the named shared memory block,
+    which is attached to once per process."""
+
+    if name in _attached_blocks:
+        _attached_blocks.move_to_end(name)
+
+    else:
+        # Blocks are owned by the population, so they are not tracked here
+        try:
+            block = shared_memory.SharedMemory(name = name, track = False)
+        except TypeError:
+            block = shared_memory.SharedMemory(name = name)
+
+        _attached_blocks[name] = block
+
+        while len(_attached_blocks) > 8:
+            _, old_block = _attached_blocks.popitem(last = False)
+            try:
+                old_block.close()
+            except BufferError:
+                pass
+
+    return np.ndarray(shape, dtype = np.dtype(dtype), buffer = _attached_blocks[name].buf)
+
+
+class Shared_Population(Array_Population):
+    """Array population storing the gene values and fitness values
+    in shared memory, so that worker processes can evaluate index
+    ranges of the chromosomes directly, see Evaluation.shared_memory.
+
+    Two sets of buffers are kept. Updating the population packs the
+    next population into the spare buffers and swaps them, detaching
+    chromosomes which are no longer in the population so they keep
+    their values. The dtype must be numeric or bool.
+    """
+
+
+    def __init__(self, chromosome_list, dtype = None):
+        """Initialize the population with a copy of the chromosomes."""
+
+        self._blocks = []
+        self._current = None
+        self._spare = None
+        self._pending = None
+
+        # Free the shared memory along with the population
+        self._finalizer = weakref.finalize(self, unlink_blocks, self._blocks)
+
+        super().__init__(chromosome_list, dtype)
+
+
+    def _allocate(self, rows, length):
+        """Returns the spare shared arrays if they fit,
+        otherwise new shared arrays."""
+
+        if np.dtype(self.dtype).hasobject:
+            raise ValueError("Shared populations can't store objects, use a numeric dtype.")
+
+        spare = self._spare
+
+        if spare is None or spare['values'].shape != (rows, length):
+            values_block, values = create_shared_array((rows, length), self.dtype)
+            fitness_block, fitness_values = create_shared_array((rows,), float)
+            self._blocks += [values_block, fitness_block]
+            spare = {
+                'values'         : values,
+                'fitness_values' : fitness_values,
+                'values_name'    : values_block.name,
+                'fitness_name'   : fitness_block.name,
+            }
+
+        self._pending = spare
+        return spare['values'], spare['fitness_values']
+
+
+    def _pack(self, chromosome_list):
+        """Copies the chromosomes into the spare arrays and swaps them in."""
+
+        old_chromosomes = getattr(self, '_chromosome_list', [])
+        old_values = getattr(self, 'values', None)
+
+        super()._pack(chromosome_list)
+
+        # The old arrays will be reused, so chromosomes still
+        # viewing them copy their rows into their own storage
+        for chromosome in old_chromosomes:
+            if chromosome._store is old_values:
+                chromosome._detach()
+
+        self._spare, self._current, self._pending = self._current, self._pending, None
+
+        # Free blocks which are no longer used
+        in_use = {
+            buffers[name]
+            for buffers in (self._current, self._spare)
+            if buffers is not None
+            for name in ('values_name', 'fitness_name')
+        }
+        unlink_blocks([block for block in self._blocks if block.name not in in_use])
+        self._blocks[:] = [block for block in self._blocks if block.name in in_use]
+
+
+    @property
+    def shared_buffers(self):
+        """Returns the names, shape and dtype of the shared arrays,
+        used to attach to them from other processes."""
+
+        return {
+            'values_name'  : self._current['values_name'],
+            'fitness_name' : self._current['fitness_name'],
+            'shape'        : self.values.shape,
+            'dtype'        : np.dtype(self.dtype).str,
+        }
+
+
+    def close(self):
+        """Frees the shared memory. The population
+        should not be used afterwards."""
+        self._finalizer()
+
+
+    def copy(self):
+        """Return a copy of the population."""
+        return Shared_Population(self, self.dtype)
+
+
+    def __add__(self, population):
+        """Returns self + population, a population made by concatenating the chromosomes."""
+        return Shared_Population([*self, *population], self.dtype)
+
+
+    def __reduce__(self):
+        """Pickles a copy of the chromosomes, which are
+        put into new shared memory when unpickled."""
+        return (Shared_Population, (list(self), self.dtype))
@@ -0,0 +1,334 @@
+import pickle
+import random
+from functools import partial
+
+import pytest
+
+from EasyGA import GA, Evaluation, Mutation, Crossover, Survivor
+from structure import Gene, Chromosome, Population
+from structure.array_population import Array_Population, Array_Chromosome
+from structure.bit_chromosome import Bit_Chromosome
+from structure.permutation_chromosome import Permutation_Chromosome
+from structure.domain import Int_Range, Float_Interval, Categorical, Boolean, Schema
+from structure import codec
+
+
+def test_copy_on_write_genes():
+    parent = Chromosome([1, 'a', (2, 3), [4, 5]])
+    child = Chromosome(parent)
+
+    # Immutable genes are shared, mutable genes are copied
+    assert [child.gene_list[i] is parent.gene_list[i] for i in range(4)] == [True, True, True, False]
+    assert child == parent
+
+    # Writing through the chromosome doesn't affect the parent
+    child[0] = 10
+    child[1].value = 'b'
+    child[3].value.append(6)
+    assert parent.gene_value_list == [1, 'a', (2, 3), [4, 5]]
+    assert child.gene_value_list == [10, 'b', (2, 3), [4, 5, 6]]
+
+    # Genes which are not shared can be changed directly
+    gene = Gene([1])
+    gene.value = [2]
+    assert gene.value == [2]
+
+    # Shared genes reached without indexing can't be changed directly
+    with pytest.raises(AttributeError):
+        child.gene_list[2].value = (4, 5)
+    assert parent[2].value == (2, 3)
+
+    # Array genes are views, so they are always copied
+    array_chromosome = Array_Chromosome([1, 2, 3])
+    chromosome = Chromosome(array_chromosome)
+    chromosome[0] = array_chromosome[1]
+    array_chromosome[1] = 20
+    assert chromosome.gene_value_list == [2, 2, 3]
+    assert all(type(gene) is Gene for gene in chromosome)
+
+
+def test_chromosome_hashing():
+    population = Population([[1, 2], [3, 4], [[5], 6], [1, 2]])
+
+    assert [1, 2] in population
+    assert [[5], 6] in population
+    assert [2, 1] not in population
+    assert population.count([1, 2]) == 2
+    assert population.index([1, 2]) == 0
+    assert population.index([1, 2], guess = 3) == 3
+
+    # Missing chromosomes raise ValueError like list.index
+    with pytest.raises(ValueError):
+        population.index([2, 1])
+    with pytest.raises(IndexError):
+        population.index([2, 1], guess = 0)
+
+    # Changes to the chromosomes and population update the index
+    population[1][0] = 2
+    assert [3, 4] not in population
+    assert [2, 4] in population
+    population.remove([1, 2])
+    assert population.index([1, 2]) == 2
+    assert len({*population, Chromosome([2, 4])}) == 3
+
+    # Changes made in place to the chromosome list update the index
+    population.chromosome_list.append(Chromosome([7, 8]))
+    assert population.index([7, 8]) == 3
+    population.chromosome_list.reverse()
+    assert population.index([7, 8]) == 0
+
+    # Changes to chromosomes of other populations keep the index
+    hash_index = population.hash_index
+    other_population = Population([[1, 2]])
+    assert [1, 2] in other_population
+    other_population[0][0] = 5
+    assert [5, 2] in other_population
+    assert population.hash_index is hash_index
+
+    # Sets of chromosomes dedupe by gene values
+    assert len({Chromosome([1, 2]), Chromosome([1, 2])}) == 1
+    assert hash(Array_Chromosome([1, 2])) == hash(Chromosome([1, 2]))
+
+
+def test_fill_in_parents_then_random():
+    ga = GA()
+    ga.survivor_selection_impl = Survivor.fill_in_parents_then_random
+    ga.evolve()
+
+    assert len(ga.population) == ga.population_size
+
+
+def test_bit_chromosome():
+    chromosome = Bit_Chromosome([1, 0, 1, 1])
+    assert chromosome.bits == 0b1101
+    assert chromosome == Chromosome([1, 0, 1, 1])
+    assert hash(chromosome) == hash(Chromosome([1, 0, 1, 1]))
+    assert chromosome[1:3].gene_value_list == [0, 1]
+    assert (chromosome + chromosome).gene_value_list == [1, 0, 1, 1] * 2
+    assert chromosome.count(1) == 3
+
+    chromosome.changes = {}
+    chromosome[1] = 1
+    chromosome.flip(0b1001)
+    assert chromosome.gene_value_list == [0, 1, 1, 0]
+    assert chromosome.changes == {0: 1, 1: 0, 3: 1}
+
+    chromosome.append(1)
+    assert chromosome.gene_value_list == [0, 1, 1, 0, 1]
+    assert pickle.loads(pickle.dumps(chromosome)) == chromosome
+
+
+def test_bitstring_chromosomes():
+    ga = GA()
+    ga.bitstring_chromosomes()
+    ga.chromosome_length = 100
+    ga.generation_goal = 30
+    ga.fitness_function_impl = lambda chromosome: chromosome.count(1)
+
+    for crossover in (Crossover.Individual.Binary.single_point, Crossover.Individual.Binary.multi_point):
+        ga.crossover_individual_impl = crossover
+        ga.evolve()
+
+        assert all(isinstance(chromosome, Bit_Chromosome) for chromosome in ga.population)
+        assert ga.population[0].fitness > 60
+        assert ga.dist(ga.population[0], ga.population[0]) == 0
+        ga.reset_run()
+
+
+def test_permutation_chromosome():
+    chromosome = Permutation_Chromosome('abcde')
+    assert chromosome.index('d') == 3
+    assert 'e' in chromosome and 'f' not in chromosome
+
+    chromosome[0], chromosome[4] = chromosome[4], chromosome[0]
+    chromosome[1:4] = chromosome[1:4][::-1]
+    assert chromosome.gene_value_list == list('edcba')
+    assert chromosome.positions == {'e': 0, 'd': 1, 'c': 2, 'b': 3, 'a': 4}
+
+    chromosome.pop(0)
+    assert chromosome.index('a') == 3
+
+
+def test_permutation_chromosomes():
+    operators = (
+        (Crossover.Individual.Permutation.ox1, Mutation.Individual.Permutation.swap_genes),
+        (Crossover.Individual.Permutation.pmx, Mutation.Individual.Permutation.insert_gene),
+        (Crossover.Individual.Permutation.cycle, Mutation.Individual.Permutation.invert_segment),
+    )
+
+    for crossover, mutation in operators:
+        ga = GA()
+        ga.permutation_chromosomes()
+        ga.crossover_individual_impl = crossover
+        ga.mutation_individual_impl = mutation
+        ga.chromosome_impl = lambda: random.sample(range(20), 20)
+        ga.generation_goal = 20
+        ga.evolve()
+
+        for chromosome in ga.population:
+            assert isinstance(chromosome, Permutation_Chromosome)
+            assert sorted(chromosome.gene_value_list) == list(range(20))
+            assert chromosome.positions == {value: index for index, value in enumerate(chromosome.gene_value_list)}
+
+
+def test_gene_domains():
+    ga = GA(gene_domain = Int_Range(1, 10))
+    ga.crossover_individual_impl = Crossover.Individual.Arithmetic.average
+    ga.mutation_individual_impl = Mutation.Individual.Arithmetic.reflect_genes
+    ga.evolve()
+
+    for chromosome in ga.population:
+        assert all(type(value) is int and 1 <= value <= 10 for value in chromosome.gene_value_list)
+
+    schema = Schema([Int_Range(0, 3), Float_Interval(-1, 1), Categorical('abc'), Boolean()])
+    ga = GA(gene_domain = schema, chromosome_length = 4)
+    ga.crossover_individual_impl = Crossover.Individual.uniform
+    ga.fitness_function_impl = lambda chromosome: chromosome[0].value + chromosome[1].value
+    ga.evolve()
+
+    for chromosome in ga.population:
+        assert [type(value) for value in chromosome.gene_value_list] == [int, float, str, bool]
+        assert schema.clip_chromosome(chromosome.gene_value_list) == chromosome.gene_value_list
+
+    # Rounding is random but stays within the domain
+    assert Int_Range(0, 5).clip([-1, 2, 2.5, 9]).tolist() in ([0, 2, 2, 5], [0, 2, 3, 5])
+    assert Categorical([1, 2]).clip_value(3) in (1, 2)
+
+    # Go back to using the gene_impl
+    ga.gene_domain = None
+    assert ga.gene_domain is None
+
+
+def test_chromosome_pool():
+    ga = GA()
+    ga.generation_goal = 6
+    ga.population_size = 20
+    ga.pool_chromosomes()
+
+    ga.evolve()
+
+    # Only the first offspring are allocated, later offspring reuse them
+    assert ga.chromosome_pool.history[0][0] > 0
+    assert all(allocations == 0 for allocations, _ in ga.chromosome_pool.history[1:])
+    assert sum(reuses for _, reuses in ga.chromosome_pool.history) > 0
+
+    # Recycling didn't change chromosomes still in use
+    assert len(set(map(id, ga.population))) == len(ga.population)
+    for chromosome in ga.population:
+        assert chromosome.fitness == ga.fitness_function_impl(chromosome)
+
+    # Free chromosomes aren't pickled
+    assert pickle.loads(pickle.dumps(ga.chromosome_pool)).free_chromosomes == []
+
+
+def test_codec():
+    population = Population([[random.randint(1, 10) for _ in range(10)] for _ in range(20)])
+    for index, chromosome in enumerate(population):
+        chromosome.fitness = index if index % 2 else None
+
+    # Populations keep their genes and fitness values
+    for compression in (None, 'zlib', 'lzma'):
+        decoded = codec.loads(codec.dumps(population, compression))
+        assert type(decoded) is Population
+        assert list(decoded) == list(population)
+        assert [c.fitness for c in decoded] == [c.fitness for c in population]
+
+    # Numbers are packed, anything else is pickled
+    assert len(codec.dumps(population)) < len(repr(population))
+    chromosome_list = [Chromosome([1.5, True, 'a', (1, 2)]), Chromosome([False])]
+    assert codec.loads(codec.dumps(chromosome_list)) == chromosome_list
+    assert codec.loads(codec.dumps(Chromosome([2**70]))) == Chromosome([2**70])
+
+    # Chromosome types are kept
+    bits = codec.loads(codec.dumps(Bit_Chromosome([1, 0, 1] * 30)))
+    assert type(bits) is Bit_Chromosome and bits.gene_value_list == [1, 0, 1] * 30
+    assert type(codec.loads(codec.dumps(Permutation_Chromosome([3, 1, 2])))) is Permutation_Chromosome
+
+    array_population = codec.loads(codec.dumps(Array_Population([[1.5, 2.5], [3.5, 4.5]])))
+    assert type(array_population) is Array_Population
+    assert array_population.values.tolist() == [[1.5, 2.5], [3.5, 4.5]]
+
+    # Saved populations are read back from the database
+    ga = GA()
+    ga.database_name = 'test_codec.db'
+    ga.generation_goal = 1
+    ga.evolve()
+    saved = ga.database.get_population(0)
+    assert list(saved) == list(ga.population)
+    assert [c.fitness for c in saved] == [c.fitness for c in ga.population]
+    ga.database.remove_database()
+
+
+def test_fitness_ranking():
+    population = Population([[1], [2], [3], [4]])
+    for chromosome, fitness in zip(population, [2, None, 5, 2]):
+        chromosome.fitness = fitness
+
+    assert population.ranking().tolist() == [0, 3, 2, 1]
+    assert population.ranking(reverse = True).tolist() == [2, 0, 3, 1]
+
+    population.sort_by_fitness(reverse = True)
+    assert [chromosome.fitness for chromosome in population] == [5, 2, 2, None]
+    assert population.index([1]) == 1
+
+    ga = GA()
+    ga.target_fitness_type = 'min'
+    ga.population = population
+    ga.sort_by_best_fitness()
+    assert [chromosome.fitness for chromosome in population] == [2, 2, 5, None]
+    population[-1].fitness = 7
+    assert ga.get_all_fitness().tolist() == [7, 7, 4, 2]
+
+
+def array_ga():
+    ga = GA()
+    ga.make_population = Array_Population
+    ga.make_chromosome = Array_Chromosome
+    return ga
+
+
+def test_array_population():
+    ga = array_ga()
+    ga.population_size = 20
+    ga.chromosome_length = 15
+    ga.evolve()
+
+    population = ga.population
+    assert population.values.shape == (20, 15)
+
+    # Chromosomes are views of the rows in sorted order
+    for row, chromosome in enumerate(population):
+        assert isinstance(chromosome, Array_Chromosome)
+        assert chromosome.gene_value_list == population.values[row].tolist()
+        assert chromosome.fitness == population.fitness_values[row]
+        assert chromosome.fitness == chromosome.gene_value_list.count(5)
+
+    # Writing to a gene writes to the population
+    population[0][3] = 11
+    assert population.values[0, 3] == 11
+    assert population[0][3].value == 11
+    assert population[0][-1].value == population.values[0, -1]
+
+    # Slicing and concatenating keep the list-like API
+    child = population[0][:5] + population[1][5:]
+    assert child.gene_value_list == population.values[0, :5].tolist() + population.values[1, 5:].tolist()
+
+
+def test_array_population_operators():
+    ga = array_ga()
+    ga.make_population = partial(Array_Population, dtype = float)
+    ga.crossover_individual_impl = Crossover.Individual.Arithmetic.average
+    ga.mutation_population_impl = Mutation.Population.best_replace_worst
+    ga.evaluation_impl = Evaluation.process_pool
+    ga.max_workers = 2
+    ga.evolve()
+    ga.close_executor()
+
+    for chromosome in ga.population:
+        assert chromosome.fitness == chromosome.gene_value_list.count(5)
+
+    # Pickling a chromosome only pickles its row
+    chromosome = pickle.loads(pickle.dumps(ga.population[0]))
+    assert chromosome == ga.population[0]
+    assert chromosome.fitness == ga.population[0].fitness
+    assert len(chromosome._store) == 1
@@ -15,14 +15,14 @@ def fill_in_random(ga):
     """Fills in the next population with random chromosomes from the last population"""
 
     needed_amount = len(ga.population) - len(ga.population.next_population)
-    ga.population.append_children(random.sample(ga.population, needed_amount))
+    ga.population.append_children(random.sample(ga.population.chromosome_list, needed_amount))
 
 
 def fill_in_parents_then_random(ga):
     """Fills in the next population with all parents followed by random chromosomes from the last population"""
 
-    # Remove dupes from the mating pool
-    mating_pool = set(ga.population.mating_pool)
+    # Remove dupes from the mating pool, keeping the order
+    mating_pool = list(dict.fromkeys(ga.population.mating_pool))
 
     needed_amount = len(ga.population) - len(ga.population.next_population)
     parent_amount = min(needed_amount, len(mating_pool))
@@ -30,19 +30,16 @@ def fill_in_parents_then_random(ga):
 
     # Only parents are used.
     if random_amount == 0:
-        ga.population.append_children(
-            chromosome
-            for i, chromosome
-            in enumerate(mating_pool)
-            if i < parent_amount
-        )
+        ga.population.append_children(mating_pool[:parent_amount])
 
     # Parents need to be removed from the random sample to avoid dupes.
     else:
+        parent_set = set(mating_pool)
+        non_parents = [chromosome for chromosome in ga.population if chromosome not in parent_set]
+
         ga.population.append_children(mating_pool)
-        ga.population.append_children(
-               random.sample(
-                  set(ga.population) - mating_pool,
-                  random_amount
-              )
-        )
+        ga.population.append_children(random.sample(non_parents, min(random_amount, len(non_parents))))
+
+        # Not enough unique chromosomes left
+        if len(non_parents) < random_amount:
+            fill_in_random(ga)
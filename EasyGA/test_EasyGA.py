@@ -1,5 +1,9 @@
 import random
-from EasyGA import GA, Parent, Crossover, Mutation, Survivor, Termination
+
+import pytest
+
+from EasyGA import GA, Parent, Crossover, Mutation, Survivor, Termination, Metrics, Island_Model
+from islands import migration_sources
 
 # USE THIS COMMAND WHEN TESTING -
     # python3 -m pytest
@@ -215,3 +219,136 @@ def test_termination_impl():
     ga.evolve()
 
     assert (ga.termination_impl == Termination.fitness_and_generation_based) and (ga != None)
+
+def test_metrics():
+    # Create the Genetic algorithm
+    ga = GA()
+    ga.generation_goal = 5
+    ga.population_size = 20
+    ga.metrics = Metrics(save_to_database = True)
+
+    # Evolve the genetic algorithm
+    ga.evolve()
+
+    # Every generation is recorded
+    assert ga.metrics.generation_list == list(range(5))
+    assert ga.metrics.evaluations(0) == 20
+    assert 0 < ga.metrics.evaluations(-1) < 20
+
+    totals = ga.metrics.totals()
+    assert totals['crossover'].calls == 4
+    assert totals['sort_by_best_fitness'].calls == 9
+    assert all(stage_metrics.wall_time >= 0 for stage_metrics in totals.values())
+
+    # Saved to the database
+    saved = {stage: calls for stage, _, _, calls in ga.database.get_metrics()}
+    assert saved == {stage: stage_metrics.calls for stage, stage_metrics in totals.items()}
+
+    # Stop recording metrics
+    ga.metrics = None
+    ga.evolve(1, consider_termination = False)
+    assert ga.metrics is None
+
+    # Start saving metrics after the first generation
+    ga = GA()
+    ga.database_name = 'late_metrics.db'
+    ga.evolve(1)
+    ga.metrics = Metrics(save_to_database = True)
+    ga.evolve(1, consider_termination = False)
+    assert len(ga.database.get_metrics()) > 0
+
+def test_steady_state():
+    # Create the Genetic algorithm
+    ga = GA()
+    ga.generation_goal = 50
+    ga.population_size = 20
+    ga.metrics = Metrics()
+
+    # Evolve the genetic algorithm
+    ga.evolve_steady_state(offspring_amount = 2, replacement = 'tournament')
+
+    # The population stays sorted and the same size
+    fitness_list = [chromosome.fitness for chromosome in ga.population]
+    assert fitness_list == sorted(fitness_list, reverse = True)
+    assert len(ga.population) == 20
+
+    # Only the offspring are evaluated and saved
+    assert all(ga.metrics.evaluations(index) <= 2 for index in range(1, 50))
+    assert ga.database.query_one_item(
+        f"SELECT COUNT(*) FROM data WHERE config_id = {ga.database.config_id} AND generation > 0"
+    ) <= 2*49
+
+    # Crossovers which don't make children raise an error instead of looping forever
+    ga = GA()
+    ga.crossover_individual_impl = lambda ga, parent_1, parent_2: None
+    ga.database_name = 'steady_state_no_children.db'
+    with pytest.raises(ValueError):
+        ga.evolve_steady_state()
+
+def test_asynchronous():
+    # Create the Genetic algorithm
+    ga = GA()
+    ga.generation_goal = 5
+    ga.population_size = 20
+    ga.max_workers = 4
+
+    # Evolve the genetic algorithm
+    ga.evolve_asynchronous(number_of_evaluations = 60)
+    ga.close_executor()
+
+    # Every 20 finished evaluations count as a generation
+    assert ga.current_generation == 4
+
+    # The population stays sorted and the same size
+    fitness_list = [chromosome.fitness for chromosome in ga.population]
+    assert fitness_list == sorted(fitness_list, reverse = True)
+    assert len(ga.population) == 20
+
+def test_island_model():
+    # Create islands using different crossover methods
+    ga_list = [GA() for _ in range(3)]
+    for ga in ga_list:
+        ga.generation_goal = 6
+        ga.population_size = 10
+    ga_list[1].crossover_individual_impl = Crossover.Individual.uniform
+
+    assert migration_sources('ring', 3) == [[2], [0], [1]]
+    assert migration_sources('star', 3) == [[1, 2], [0], [0]]
+    assert migration_sources('full', 3) == [[1, 2], [0, 2], [0, 1]]
+
+    # Evolve the islands in separate processes
+    island_model = Island_Model(ga_list, 'ring', migration_interval = 2, migration_amount = 2)
+    island_model.evolve()
+
+    # The gas get the final populations
+    for ga in ga_list:
+        assert ga.current_generation == 6
+        assert len(ga.population) == 10
+
+    best_fitness = max(ga.population[0].fitness for ga in ga_list)
+    assert island_model.best_chromosome().fitness == best_fitness
+
+    # Each island used its own database
+    assert len({ga.database_name for ga in ga_list}) == 3
+
+
+def test_run_batch():
+    # Run two configurations with three seeds each
+    configs = {
+        'small' : {'population_size' : 10, 'generation_goal' : 4},
+        'large' : {'population_size' : 20, 'generation_goal' : 4},
+    }
+    results = GA.run_batch(configs, [1, 2, 1], max_workers = 2)
+
+    assert len(results.rows) == 6
+
+    # Runs with the same seed are the same
+    small_runs = [row for row in results.rows if row[0] == 'small']
+    assert small_runs[0][2:] == small_runs[2][2:]
+
+    # One aggregated row per configuration
+    aggregate = {row[0] : row for row in results.aggregate()}
+    assert aggregate['small'][1] == 3
+    assert aggregate['large'][5] == 4
+    assert aggregate['large'][7] == sum(row[4] for row in results.rows if row[0] == 'large')
+    assert 'mean best fitness' in str(results)
@@ -9,7 +9,7 @@ setuptools.setup(
     version='1.5.1',
     description='EasyGA is a python package designed to provide an easy-to-use Genetic Algorithm. The package is designed to work right out of the box, while also allowing the user to customize features as they see fit.',
     packages=setuptools.find_packages(),
-    python_requires='>=3.6',
+    python_requires='>=3.8',
     url="https://github.com/danielwilczak101/EasyGA",
     author="Daniel Wilczak, Jack RyanNguyen, Ryley Griffith, Jared Curtis, Matthew Chase Oxamendi ",
     author_email="danielwilczak101@gmail.com",
@@ -21,6 +21,7 @@ setuptools.setup(
         "Operating System :: OS Independent",
         ],
     install_requires = ["matplotlib ~= 3.3.2",
+                        "numpy",
                         "pyserial ~= 3.4",
                         "pytest>=3.7",
                         "tabulate >=0.8.7"